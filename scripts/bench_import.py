@@ -0,0 +1,55 @@
+"""
+CLI 启动基准：用 python -X importtime 统计 import ytx.cli 的累计耗时，
+并检查 yt_dlp / openai / jinja2 / pysrt 等重依赖没有在启动时被导入。
+
+超过阈值或导入了重依赖时以非零状态退出，可用于 CI 回归检查。
+
+用法：
+    python scripts/bench_import.py [--threshold-ms 150] [--runs 5]
+"""
+import argparse
+import re
+import subprocess
+import sys
+
+HEAVY_MODULES = ("yt_dlp", "openai", "jinja2", "pysrt")
+
+# import time:  self [us] | cumulative | imported package
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_profile(module: str = "ytx.cli"):
+    """在新进程中导入 module，返回 (累计耗时 ms, 已导入模块集合)"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    total_us = 0
+    modules = set()
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        modules.add(m.group(4))
+        if m.group(4) == module:
+            total_us = int(m.group(2))
+    return total_us / 1000, modules
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threshold-ms", type=float, default=150.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # 第一次运行会编译 .pyc，不计入
+    import_profile()
+    results = [import_profile() for _ in range(args.runs)]
+    best_ms = min(ms for ms, _ in results)
+    heavy = sorted(m for m in results[0][1] if m.split(".")[0] in HEAVY_MODULES)
+
+    print(f"import ytx.cli: best {best_ms:.1f} ms of {args.runs} runs (threshold {args.threshold_ms:.0f} ms)")
+    if heavy:
+        print(f"heavy modules imported at startup: {', '.join(heavy[:10])}")
+    if best_ms > args.threshold_ms or heavy:
+        sys.exit(1)
@@ -0,0 +1,75 @@
+"""
+json3 分句性能基准：生成 1h / 2.5h / 5h 的合成 json3 字幕，
+验证 generate_sentence_md_from_json3 的耗时随 token 数线性增长，
+且流式解析的峰值内存不随时长增长；同时对比 (text, ms) 元组列表与 CaptionTrack 的内存占用。
+
+用法：
+    python scripts/bench_json3.py
+"""
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from ytx.core.utils import json3_utils
+
+WORDS = "the quick brown fox jumps over a lazy dog while we talk about life and work".split()
+
+
+def make_json3(path: Path, hours: float, wpm: int = 150, seed: int = 42) -> int:
+    """按 wpm 生成合成 json3，每个 event 约 2 秒、含若干 seg；返回 token 数"""
+    rnd = random.Random(seed)
+    total_words = int(hours * 60 * wpm)
+    events = []
+    t = 0
+    n = 0
+    while n < total_words:
+        segs = []
+        for k in range(rnd.randint(3, 6)):
+            word = rnd.choice(WORDS)
+            if rnd.random() < 0.08:
+                word += rnd.choice(".!?")
+            segs.append({"utf8": (" " if k else "") + word, "tOffsetMs": k * 320})
+            n += 1
+        events.append({"tStartMs": t, "dDurationMs": 2000, "segs": segs})
+        t += 2000
+    path.write_text(json.dumps({"wireMagic": "pb3", "events": events}), encoding="utf-8")
+    return n
+
+
+def traced(fn, *args):
+    """返回 (结果, fn 执行后仍驻留的内存字节数)"""
+    tracemalloc.start()
+    result = fn(*args)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = None
+        for hours in (1, 2.5, 5):
+            path = Path(tmp) / f"bench_{hours}h.en.json3"
+            n_tokens = make_json3(path, hours)
+            t0 = time.perf_counter()
+            json3_utils.generate_sentence_md_from_json3(path, force=True)
+            elapsed = time.perf_counter() - t0
+            per_token_us = elapsed / n_tokens * 1e6
+            baseline = baseline or per_token_us
+
+            tracemalloc.start()
+            json3_utils.generate_sentence_md_from_json3(path, force=True)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print(f"{hours:>4}h  tokens={n_tokens:>7,}  {elapsed * 1000:8.1f} ms  "
+                  f"{per_token_us:6.2f} µs/token  (x{per_token_us / baseline:.2f} vs 1h)  "
+                  f"peak={peak / 1024:7.1f} KiB  file={path.stat().st_size / 1024:8.1f} KiB")
+
+            _, tuples_bytes = traced(lambda p: list(json3_utils.iter_tokens(json3_utils.iter_json3_events(p))), path)
+            _, track_bytes = traced(json3_utils.load_track, path)
+            print(f"{'':>5}  tokens as tuples={tuples_bytes / 1024:8.1f} KiB  "
+                  f"CaptionTrack={track_bytes / 1024:8.1f} KiB  (x{tuples_bytes / track_bytes:.1f})")
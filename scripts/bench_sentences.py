@@ -0,0 +1,50 @@
+"""
+句子文件加载基准：10k 句的 .sentences.md 正则解析 vs .sentences.bin mmap 打开。
+
+用法：
+    python scripts/bench_sentences.py
+"""
+import random
+import tempfile
+import timeit
+from pathlib import Path
+
+from ytx.core.utils import caption_utils, json3_utils
+from ytx.core.utils.track_file import TrackWriter, TrackFile
+
+WORDS = "the quick brown fox jumps over a lazy dog while we talk about life and work".split()
+
+
+def make_sentences(md_path: Path, n: int = 10_000, seed: int = 42):
+    rnd = random.Random(seed)
+    t = 0
+    with TrackWriter(caption_utils.sentence_bin_path(md_path), ["start", "end"]) as writer, \
+            md_path.open("w", encoding="utf-8") as f:
+        for idx in range(1, n + 1):
+            text = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(4, 20))) + "."
+            start, end = t, t + rnd.randint(1000, 6000)
+            t = end + 100
+            writer.append(text, start, end)
+            f.write(f"[{idx}] {json3_utils.format_time(start)} → {json3_utils.format_time(end)} {text}\n")
+
+
+def _best(fn, repeat: int = 5) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        md_path = Path(tmp) / "bench.en.precise.sentences.md"
+        make_sentences(md_path)
+        bin_path = caption_utils.sentence_bin_path(md_path)
+
+        parse_md = _best(lambda: caption_utils.parse_sentences_md(md_path))
+        open_bin = _best(lambda: TrackFile(bin_path).close())
+        iter_md = _best(lambda: list(caption_utils.parse_sentences_md(md_path)))
+
+        def iter_bin():
+            with TrackFile(bin_path) as track:
+                list(track)
+
+        print(f"10k sentences: parse md={parse_md * 1000:7.2f} ms  open bin={open_bin * 1000:7.3f} ms")
+        print(f"               md + iterate={iter_md * 1000:7.2f} ms  bin + iterate={_best(iter_bin) * 1000:7.2f} ms")
@@ -0,0 +1,102 @@
+"""
+SRT 性能基准：
+- 对比旧实现（full_text.find + 倒序扫描 time_marks）与 generate_sentence_md_from_srt
+  在 10min / 1h / 5h 字幕上的耗时；
+- 对比 pysrt.open 与 srt_utils.read_srt 的解析吞吐。
+
+用法：
+    python scripts/bench_srt.py
+"""
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+
+import pysrt
+
+from ytx.core.utils import srt_utils
+
+WORDS = "the quick brown fox jumps over a lazy dog while we talk about life and work".split()
+
+
+def make_srt(path: Path, minutes: float, wpm: int = 150, seed: int = 42) -> int:
+    """每条字幕约 2 秒、5 个单词，约 8% 的单词带句末标点；返回字幕条数"""
+    rnd = random.Random(seed)
+    n_cues = int(minutes * wpm / 5)
+    lines = []
+    for i in range(n_cues):
+        start, end = i * 2000, i * 2000 + 1990
+        words = []
+        for _ in range(5):
+            word = rnd.choice(WORDS)
+            if rnd.random() < 0.08:
+                word += rnd.choice(".!?")
+            words.append(word)
+        lines.append(f"{i + 1}\n{_fmt(start)} --> {_fmt(end)}\n{' '.join(words)}\n")
+    path.write_text("\n".join(lines), encoding="utf-8")
+    return n_cues
+
+
+def _fmt(ms: int) -> str:
+    return f"{ms // 3600000:02}:{ms // 60000 % 60:02}:{ms // 1000 % 60:02},{ms % 1000:03}"
+
+
+def legacy_generate_sentence_md_from_srt(srt_path: Path) -> Path:
+    """旧实现，仅用于对比"""
+    subs = pysrt.open(srt_path, encoding='utf-8')
+    full_text = ""
+    time_marks = []
+    for sub in subs:
+        clean_text = sub.text.replace('\n', ' ').strip()
+        clean_text = re.sub(r'\[.*?\]', '', clean_text).strip()
+        if clean_text:
+            if full_text:
+                full_text += " "
+            time_marks.append((len(full_text), sub.start.to_time()))
+            full_text += clean_text
+    raw_sentences = re.split(r'(?<=[.!?。！？])\s+', full_text)
+    sentences = []
+    for idx, sentence in enumerate(raw_sentences):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        start_idx = full_text.find(sentence)
+        time_str = "None"
+        for offset, t in reversed(time_marks):
+            if offset <= start_idx:
+                time_str = t.strftime("%H:%M:%S")
+                break
+        sentences.append((idx + 1, time_str, sentence))
+    out_path = srt_path.with_name(srt_path.stem + ".legacy.sentences.md")
+    with out_path.open("w", encoding="utf-8") as f:
+        for idx, t, s in sentences:
+            f.write(f"[{idx}] {t} → {s}\n")
+    return out_path
+
+
+def _timeit(fn, path: Path, repeat: int = 1) -> float:
+    """repeat 次取最快一次"""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(path)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, minutes in (("10min", 10), ("1h", 60), ("5h", 300)):
+            path = Path(tmp) / f"bench_{label}.en.srt"
+            n_cues = make_srt(path, minutes)
+            legacy = _timeit(legacy_generate_sentence_md_from_srt, path)
+            current = _timeit(srt_utils.generate_sentence_md_from_srt, path)
+            print(f"{label:>5}  cues={n_cues:>6,}  legacy={legacy * 1000:9.1f} ms  "
+                  f"current={current * 1000:8.1f} ms  speedup=x{legacy / current:.1f}")
+
+            parse_pysrt = _timeit(lambda p: pysrt.open(str(p), encoding="utf-8"), path, repeat=5)
+            parse_native = _timeit(srt_utils.read_srt, path, repeat=5)
+            mb = path.stat().st_size / 1e6
+            print(f"{'':>5}  parse: pysrt={mb / parse_pysrt:6.1f} MB/s  "
+                  f"read_srt={mb / parse_native:6.1f} MB/s  speedup=x{parse_pysrt / parse_native:.1f}")
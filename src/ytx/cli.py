@@ -1,11 +1,10 @@
 import logging
+from typing import List
+
 import typer
-from rich.console import Console
-import ytx.core.service.init_service as init_service
-import ytx.core.service.overview_service as overview_service
-import ytx.core.service.summary_service as summary_service
-import ytx.core.service.download_service as download_service
-import ytx.core.service.preview_service as preview_service
+
+# 各命令依赖的服务（yt_dlp、openai、jinja2 等）在命令内部再导入，
+# 使 ytx --help 等不需要它们的调用保持快速启动
 
 logging.basicConfig(
     level=logging.WARNING,
@@ -14,10 +13,14 @@ logging.basicConfig(
 )
 logging.getLogger("ytx.core").setLevel(logging.WARNING)
 
-console = Console()
 app = typer.Typer()
 
 
+def _console():
+    from rich.console import Console
+    return Console()
+
+
 """
 ytx init -f --prefix=videos https://www.youtube.com/watch?v=74i7daegNZE
 ytx init -f --prefix=videos https://www.youtube.com/watch?v=kwpWhRXSwZY
@@ -31,36 +34,69 @@ def init(
     prefix: str = typer.Option(".", help="输出目录前缀"), 
     force: bool = typer.Option(False, "--force", "-f", help="强制重新初始化")
 ):
+    import ytx.core.service.init_service as init_service
     init_service.run(youtube_url, prefix, force)
 
 @app.command()
 def overview(
     force: bool = typer.Option(False, "--force", "-f", help="强制重新分析")
 ):
+    import ytx.core.service.overview_service as overview_service
     overview = overview_service.run(project_dir=".", force=force)
     if overview:
-        console.print(overview.to_pretty_text())
+        _console().print(overview.to_pretty_text())
     else:
-        console.print("[red]无法生成概览信息[/red]")
+        _console().print("[red]无法生成概览信息[/red]")
+
+@app.command()
+def summary(
+    force: bool = typer.Option(False, "--force", "-f", help="强制重新生成")
+):
+    import ytx.core.service.summary_service as summary_service
+    # 边生成边输出，结束后保存到 summary.txt；分块结果保存在 summary.chunks.json，未变化的块直接复用
+    for text in summary_service.stream(project_dir=".", force=force):
+        print(text, end="", flush=True)
+    print()
+
+@app.command()
+def analyze(
+    force: bool = typer.Option(False, "--force", "-f", help="强制重新分析")
+):
+    """一次调用同时生成 overview 和 summary"""
+    import ytx.core.service.analysis_service as analysis_service
+    overview, summary = analysis_service.run(project_dir=".", force=force)
+    _console().print(overview.to_pretty_text())
+    print()
+    print(summary)
 
 @app.command()
-def summary():
-    result = summary_service.run(project_dir=".")
-    print(result)
+def batch(
+    project_dirs: List[str] = typer.Argument(..., help="项目目录"),
+    force: bool = typer.Option(False, "--force", "-f", help="强制重新生成字幕句子"),
+    poll: float = typer.Option(30.0, "--poll", help="轮询间隔（秒）"),
+):
+    """通过 Batch API 离线生成多个项目的 overview 和 summary"""
+    import ytx.core.service.batch_service as batch_service
+    status = batch_service.run(project_dirs, force=force, poll_interval=poll)
+    for project_dir, done in status.items():
+        marks = " ".join(f"{name}={'✅' if ok else '❌'}" for name, ok in done.items())
+        print(f"{project_dir}: {marks}")
 
 @app.command()
 def download(force: bool = typer.Option(False, "--force", "-f", help="强制重新下载")):
+    import ytx.core.service.download_service as download_service
     download_service.run(force=force)
     print("下载完成")
 
 @app.command()
 def preview(force: bool = typer.Option(False, "--force", "-f", help="强制重新生成")):
+    import ytx.core.service.preview_service as preview_service
     preview_service.run(force)
         
 @app.callback(invoke_without_command=True)
 def main(ctx: typer.Context):
     if ctx.invoked_subcommand is None:
-        console.print(ctx.get_help())
+        _console().print(ctx.get_help())
         raise typer.Exit()
 
 if __name__ == "__main__":
@@ -0,0 +1,98 @@
+"""
+llm/analysis.py
+
+合并分析：一次调用、一份字幕同时生成 overview 的摘要和 summary 的章节目录与核心观点。
+分别调用 overview 和 summary 时字幕要发送两次、往返两次；合并后只发送一次。
+语言难度在本地计算（见 overview_service），不在此处生成。
+
+有上传者章节时把章节标题和时间写进提示词，要求模型沿用，不自行划分。
+字幕超过 summary.SINGLE_CALL_TOKENS 时需要分块 map-reduce，或模型返回的结果不完整时，
+返回 None，由调用方回退为分别调用（两次调用的提示词共享字幕前缀，仍可命中提供方的前缀缓存）。
+
+用法：
+    from ytx.core.llm import analysis as llm_analysis
+    summary_text = llm_analysis.run(overview, sentence_path, chapters)   # 同时写回 overview.summary
+"""
+
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+from ytx.core.llm import summary as llm_summary
+from ytx.core.llm.common import call_llm
+from ytx.core.llm.prompt import SYSTEM_PROMPT, clock, transcript_lines, transcript_prompt
+from ytx.core.llm.tokens import count_tokens
+from ytx.core.model.overview_model import Overview
+
+logger = logging.getLogger(__name__)
+
+
+def run(overview: Overview, sentence_path: Path, chapters: Sequence[llm_summary.Chapter] = ()) -> Optional[str]:
+    """成功时写回 overview.summary 并返回章节目录文本（与 summary.txt 格式一致），否则返回 None"""
+    lines = transcript_lines(sentence_path)
+    if not lines:
+        logger.warning("没有找到字幕内容")
+        return None
+    content = "\n".join(lines)
+    if count_tokens(content) > llm_summary.SINGLE_CALL_TOKENS:
+        logger.info("字幕较长，无法一次完成合并分析")
+        return None
+
+    try:
+        result = call_llm(**_request(overview, content, chapters))
+    except Exception as e:
+        logger.error(f"LLM 调用失败: {e}")
+        return None
+
+    text = render_chapters(result)
+    if not result.get("summary") or not text:
+        logger.warning("合并分析结果不完整")
+        return None
+    overview.summary = result["summary"]
+    logger.info("合并分析完成")
+    return text
+
+
+def render_chapters(result: Dict[str, Any]) -> str:
+    """JSON 中的 chapters / key_points → 纯文本目录"""
+    blocks = []
+    for i, chapter in enumerate(result.get("chapters") or [], 1):
+        if not isinstance(chapter, dict) or not chapter.get("title"):
+            continue
+        span = f" ({chapter.get('start', '')} - {chapter.get('end', '')})" if chapter.get("start") else ""
+        blocks.append(f"{i}. {chapter['title']}{span}\n{chapter.get('content', '')}".strip())
+    if not blocks:
+        return ""
+    points = [p for p in result.get("key_points") or [] if isinstance(p, str) and p]
+    if points:
+        blocks.append("核心观点：\n" + "\n".join(f"- {p}" for p in points))
+    return "\n\n".join(blocks)
+
+
+def _request(overview: Overview, content: str, chapters: Sequence[llm_summary.Chapter] = ()) -> Dict[str, Any]:
+    if chapters:
+        listing = "\n".join(f"- {clock(start)} - {clock(end)} {title}" for start, end, title in chapters)
+        chapter_task = f"chapters：视频已有以下章节，请逐一沿用其标题和起止时间，不要自行划分，每个章节的描述尽量详细\n{listing}"
+    else:
+        chapter_task = "chapters：视频章节，原则上不超过5个，标注起止时间，每个章节的描述尽量详细，说清楚关键内容"
+    prompt = transcript_prompt(content, f"""
+视频标题：{overview.title}
+作者：{overview.author}
+时长：{overview.duration}
+语言：{overview.language.get('name', 'Unknown')}
+
+请基于以上字幕（每行开头为该句的起始时间）完成：
+1. summary：200-300字的中文摘要，描述视频的主要内容和要点
+2. {chapter_task}
+3. key_points：视频的核心观点
+
+请以JSON格式返回结果，格式如下：
+{{
+  "summary": "视频摘要内容",
+  "chapters": [
+    {{"start": "00:00", "end": "01:30", "title": "章节标题", "content": "章节的关键内容"}}
+  ],
+  "key_points": ["核心观点"]
+}}
+""")
+    return {"prompt": prompt, "system_prompt": SYSTEM_PROMPT, "model": "gpt-4o-mini", "temperature": 0.3}
@@ -0,0 +1,112 @@
+"""
+llm/batch.py
+
+通过 OpenAI Batch API 离线提交大量 chat.completions 请求：
+生成 JSONL → 上传文件 → 创建 batch → 轮询状态 → 下载结果。
+吞吐远高于逐个交互式调用、费用更低，但结果可能要数小时才返回，适合夜间批量处理。
+
+用法：
+    from ytx.core.llm import batch as llm_batch
+    results = llm_batch.run({"a": {"prompt": "..."}, "b": {...}})   # custom_id → 输出文本
+
+请求参数与 call_llm 一致（prompt / model / temperature / system_prompt / max_tokens）。
+调用方校验结果后可用 remember() 写入 LLM 缓存，之后相同的交互式调用直接命中。
+"""
+
+import io
+import json
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from ytx.core.llm.cache import get_cache
+from ytx.core.llm.common import cache_key, chat_body, get_client
+
+logger = logging.getLogger(__name__)
+
+ENDPOINT = "/v1/chat/completions"
+POLL_INTERVAL = 30.0
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def build_jsonl(requests: Dict[str, Dict[str, Any]]) -> bytes:
+    """custom_id → call_llm 参数，生成 Batch API 的输入文件"""
+    lines = (
+        json.dumps({"custom_id": custom_id, "method": "POST", "url": ENDPOINT, "body": chat_body(**params)},
+                   ensure_ascii=False)
+        for custom_id, params in requests.items()
+    )
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def submit(requests: Dict[str, Dict[str, Any]], client=None) -> str:
+    """上传请求并创建 batch，返回 batch id"""
+    client = client or get_client()
+    input_file = client.files.create(file=("ytx-batch.jsonl", io.BytesIO(build_jsonl(requests))), purpose="batch")
+    batch = client.batches.create(input_file_id=input_file.id, endpoint=ENDPOINT, completion_window="24h")
+    logger.info(f"已提交 batch {batch.id}，共 {len(requests)} 个请求")
+    return batch.id
+
+
+def wait(batch_id: str, client=None, poll_interval: float = POLL_INTERVAL, timeout: Optional[float] = None):
+    """轮询直到 batch 结束（completed / failed / expired / cancelled），超过 timeout 秒抛出 TimeoutError"""
+    client = client or get_client()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        if counts is not None:
+            logger.info(f"batch {batch_id}: {batch.status} ({counts.completed}/{counts.total} 完成, {counts.failed} 失败)")
+        if batch.status in TERMINAL_STATUSES:
+            return batch
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(f"batch {batch_id} 未在 {timeout}s 内完成（{batch.status}）")
+        time.sleep(poll_interval)
+
+
+def fetch_results(batch, client=None) -> Dict[str, str]:
+    """下载结果，返回 custom_id → 输出文本；失败的请求记录日志后跳过"""
+    client = client or get_client()
+    if batch.status != "completed":
+        logger.warning(f"batch {batch.id} 状态为 {batch.status}，只取回已完成的部分")
+    if batch.error_file_id:
+        for line in client.files.content(batch.error_file_id).text.splitlines():
+            if line.strip():
+                record = json.loads(line)
+                logger.warning(f"batch 请求 {record.get('custom_id')} 失败: {record.get('error') or record.get('response')}")
+    results: Dict[str, str] = {}
+    if not batch.output_file_id:
+        return results
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            logger.warning(f"batch 请求 {record.get('custom_id')} 失败: {record.get('error') or response}")
+            continue
+        results[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"].strip()
+    return results
+
+
+def run(
+    requests: Dict[str, Dict[str, Any]],
+    client=None,
+    poll_interval: float = POLL_INTERVAL,
+    timeout: Optional[float] = None,
+) -> Dict[str, str]:
+    """提交、等待并取回结果"""
+    if not requests:
+        return {}
+    client = client or get_client()
+    batch = wait(submit(requests, client), client, poll_interval, timeout)
+    results = fetch_results(batch, client)
+    logger.info(f"batch {batch.id} 完成：{len(results)}/{len(requests)} 个请求成功")
+    return results
+
+
+def remember(params: Dict[str, Any], content: str):
+    """把 batch 结果写入 LLM 缓存，键与相同参数的 call_llm 一致"""
+    cache = get_cache()
+    if cache is not None:
+        cache.put(cache_key(**params), content)
@@ -0,0 +1,141 @@
+"""
+llm/cache.py
+
+LLM 响应的本地持久化缓存（SQLite），按请求内容寻址：相同的模型、温度、系统提示词、
+用户提示词和 max_tokens 直接返回上次的结果，不再请求 API。
+
+- 容量有上限，超出后按最近访问时间淘汰（LRU）
+- 可选 TTL，过期条目视为未命中并删除
+- hits / misses 计数，便于观察命中率
+- 多个进程共用缓存文件时可能遇到 "database is locked" 等错误，读写失败按未命中 / 不写入处理，
+  不影响 LLM 调用本身
+- 环境变量 YTX_LLM_CACHE 指定缓存文件路径，设为 "off" 时关闭缓存；
+  也可以对单次调用传入 call_llm(..., use_cache=False)
+- 环境变量 YTX_LLM_CACHE_TTL 指定条目有效期（秒），未设置时不过期
+
+用法：
+    from ytx.core.llm.cache import LLMCache, make_key
+    cache = LLMCache(path)
+    key = make_key(model="gpt-4o-mini", prompt="...")
+    cache.get(key) or cache.put(key, content)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = Path.home() / ".cache" / "ytx" / "llm_cache.sqlite3"
+DEFAULT_MAX_ENTRIES = 10_000
+
+_default_cache: Optional["LLMCache"] = None
+_default_lock = threading.Lock()
+
+
+def make_key(**parts) -> str:
+    """请求参数 → sha256，参数顺序无关"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path: Path, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: Optional[float] = None):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # map-reduce 等场景会在线程池中调用，共用一个连接并加锁
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row and self.ttl is not None and now - row[1] > self.ttl:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    row = None
+                if row is not None:
+                    self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            except sqlite3.Error as e:
+                logger.warning(f"读取 LLM 缓存失败，按未命中处理: {e}")
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now),
+                )
+                (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+                if count > self.max_entries:
+                    self._conn.execute(
+                        "DELETE FROM responses WHERE key IN "
+                        "(SELECT key FROM responses ORDER BY accessed LIMIT ?)",
+                        (count - self.max_entries,),
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"写入 LLM 缓存失败，跳过: {e}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def get_cache() -> Optional[LLMCache]:
+    """进程内共享的默认缓存；YTX_LLM_CACHE=off 或无法打开时返回 None"""
+    global _default_cache
+    setting = os.getenv("YTX_LLM_CACHE", "")
+    if setting.lower() in ("off", "0", "false", "no"):
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            try:
+                _default_cache = LLMCache(Path(setting) if setting else DEFAULT_PATH, ttl=_ttl())
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"LLM 缓存不可用，直接请求 API: {e}")
+                return None
+        return _default_cache
+
+
+def _ttl() -> Optional[float]:
+    """YTX_LLM_CACHE_TTL（秒），未设置或无效时不过期"""
+    setting = os.getenv("YTX_LLM_CACHE_TTL", "").strip()
+    if not setting:
+        return None
+    try:
+        return float(setting)
+    except ValueError:
+        logger.warning(f"YTX_LLM_CACHE_TTL 无效，缓存不过期: {setting}")
+        return None
@@ -0,0 +1,272 @@
+"""
+llm/client.py
+
+OpenAI 客户端层：连接池、超时、重试与对冲请求（hedged request）。
+
+- build_client / build_async_client：共享 keep-alive 连接池（大小 POOL_SIZE，需不小于并发数），
+  关闭 SDK 自带的重试，统一由本模块处理
+- with_retry / awith_retry：对 429、5xx、连接错误和超时做指数退避重试（full jitter），
+  服务端返回 Retry-After 时按其等待
+- 对冲请求（默认关闭，YTX_LLM_HEDGE=1 开启）：一次请求耗时超过近期延迟的 HEDGE_PERCENTILE 分位时，
+  再发一个相同的请求，取先返回的结果。可以削减长尾延迟，代价是少量重复请求
+
+可通过环境变量调整：YTX_LLM_POOL_SIZE、YTX_LLM_MAX_RETRIES、YTX_LLM_HEDGE
+"""
+
+import asyncio
+import email.utils
+import inspect
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional, TypeVar
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+POOL_SIZE = int(os.getenv("YTX_LLM_POOL_SIZE", "32"))
+CONNECT_TIMEOUT = 10.0
+READ_TIMEOUT = 120.0
+
+MAX_RETRIES = int(os.getenv("YTX_LLM_MAX_RETRIES", "4"))
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+# 另外所有 5xx 均重试
+RETRY_STATUS = {408, 409, 429}
+
+HEDGE = os.getenv("YTX_LLM_HEDGE", "").lower() in ("1", "true", "yes", "on")
+HEDGE_PERCENTILE = 0.95
+# 延迟样本不足时不对冲
+HEDGE_MIN_SAMPLES = 20
+
+
+def build_client() -> "OpenAI":
+    import openai
+    return openai.OpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        max_retries=0,
+        timeout=_timeout(),
+        http_client=openai.DefaultHttpxClient(limits=_limits(), timeout=_timeout()),
+    )
+
+
+def build_async_client() -> "AsyncOpenAI":
+    import openai
+    return openai.AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        max_retries=0,
+        timeout=_timeout(),
+        http_client=openai.DefaultAsyncHttpxClient(limits=_limits(), timeout=_timeout()),
+    )
+
+
+def _limits():
+    import httpx
+    return httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+
+
+def _timeout():
+    import openai
+    return openai.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """429 / 5xx 等状态码、连接错误和超时可以重试；4xx 参数错误、鉴权失败等不重试"""
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in RETRY_STATUS or status >= 500
+    try:
+        import openai
+    except ImportError:
+        return False
+    return isinstance(exc, openai.APIConnectionError)
+
+
+def retry_delay(exc: BaseException, attempt: int) -> float:
+    """第 attempt 次（从 0 开始）重试前等待的秒数：优先 Retry-After，否则指数退避 + full jitter"""
+    retry_after = _retry_after(exc)
+    if retry_after is not None:
+        return min(retry_after, BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    ms = headers.get("retry-after-ms")
+    if ms:
+        try:
+            return float(ms) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    # HTTP 日期格式
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class LatencyTracker:
+    """最近 size 次成功请求的耗时（秒），用于计算对冲阈值"""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < HEDGE_MIN_SAMPLES:
+                return None
+            samples = sorted(self._samples)
+        return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+
+latency = LatencyTracker()
+_hedge_pool: Optional[ThreadPoolExecutor] = None
+_hedge_pool_lock = threading.Lock()
+
+
+def _hedge_after() -> Optional[float]:
+    return latency.percentile(HEDGE_PERCENTILE) if HEDGE else None
+
+
+def with_retry(fn: Callable[[], T], hedge: bool = True) -> T:
+    """
+    调用 fn()，可重试的错误按退避策略重试，最多 MAX_RETRIES 次。
+    hedge=False 时不发对冲请求、不记录延迟（如流式请求：建立流的耗时不代表整次请求的延迟）
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return _hedged(fn) if hedge else fn()
+        except Exception as e:
+            if attempt >= MAX_RETRIES or not is_retryable(e):
+                raise
+            delay = retry_delay(e, attempt)
+            logger.warning(f"LLM 请求失败，{delay:.1f}s 后重试（{attempt + 1}/{MAX_RETRIES}）: {e}")
+            time.sleep(delay)
+
+
+async def awith_retry(fn: Callable[[], Awaitable[T]], hedge: bool = True) -> T:
+    """with_retry 的异步版本，fn 每次调用返回一个新的 awaitable"""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return await (_ahedged(fn) if hedge else fn())
+        except Exception as e:
+            if attempt >= MAX_RETRIES or not is_retryable(e):
+                raise
+            delay = retry_delay(e, attempt)
+            logger.warning(f"LLM 请求失败，{delay:.1f}s 后重试（{attempt + 1}/{MAX_RETRIES}）: {e}")
+            await asyncio.sleep(delay)
+
+
+def _hedged(fn: Callable[[], T]) -> T:
+    hedge_after = _hedge_after()
+    start = time.perf_counter()
+    if hedge_after is None:
+        result = fn()
+        latency.record(time.perf_counter() - start)
+        return result
+
+    # 同步请求无法取消，落后的那个请求在后台线程中自然结束，结果丢弃
+    pool = _get_hedge_pool()
+    futures = [pool.submit(fn)]
+    done, _ = wait(futures, timeout=hedge_after)
+    if not done:
+        logger.debug(f"LLM 请求超过 {hedge_after:.1f}s，发出对冲请求")
+        futures.append(pool.submit(fn))
+    # 取先成功的结果；都失败时抛出最后一个错误
+    pending = set(futures)
+    while True:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        succeeded = [future for future in done if future.exception() is None]
+        if succeeded:
+            latency.record(time.perf_counter() - start)
+            # 落后的请求结束后关闭其结果（如 Stream），归还连接池中的连接
+            for future in futures:
+                if future is not succeeded[0]:
+                    future.add_done_callback(_close_result)
+            return succeeded[0].result()
+        if not pending:
+            return done.pop().result()
+
+
+async def _ahedged(fn: Callable[[], Awaitable[T]]) -> T:
+    hedge_after = _hedge_after()
+    start = time.perf_counter()
+    if hedge_after is None:
+        result = await fn()
+        latency.record(time.perf_counter() - start)
+        return result
+
+    tasks = [asyncio.ensure_future(fn())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done:
+            logger.debug(f"LLM 请求超过 {hedge_after:.1f}s，发出对冲请求")
+            tasks.append(asyncio.ensure_future(fn()))
+        pending = set(tasks)
+        while True:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            succeeded = [task for task in done if task.exception() is None]
+            if succeeded:
+                latency.record(time.perf_counter() - start)
+                for task in done:
+                    if task is not succeeded[0] and task.exception() is None:
+                        await _aclose(task.result())
+                return succeeded[0].result()
+            if not pending:
+                return done.pop().result()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _close_result(future: Future) -> None:
+    if future.cancelled() or future.exception() is not None:
+        return
+    close = getattr(future.result(), "close", None)
+    if callable(close):
+        try:
+            close()
+        except Exception as e:
+            logger.debug(f"关闭对冲请求的结果失败: {e}")
+
+
+async def _aclose(result: object) -> None:
+    close = getattr(result, "close", None)
+    if callable(close):
+        try:
+            closed = close()
+            if inspect.isawaitable(closed):
+                await closed
+        except Exception as e:
+            logger.debug(f"关闭对冲请求的结果失败: {e}")
+
+
+def _get_hedge_pool() -> ThreadPoolExecutor:
+    global _hedge_pool
+    with _hedge_pool_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="ytx-llm-hedge")
+        return _hedge_pool
@@ -1,20 +1,53 @@
 import os
 import json
+import asyncio
 import logging
-from typing import Optional, Literal
+import threading
+import weakref
+from typing import TYPE_CHECKING, Iterator, Optional, Literal
 
-from openai import OpenAI
-from openai.types.chat import ChatCompletion
+from ytx.core.llm import client as llm_client
+from ytx.core.llm.cache import get_cache, make_key
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+    from openai.types.chat import ChatCompletion
 
 logger = logging.getLogger(__name__)
 
-# 初始化 OpenAI 客户端（可扩展支持 base_url、自托管等）
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# OpenAI 客户端（连接池、超时、重试见 llm/client.py）在第一次调用时才创建，
+# 导入 openai 本身就要数百毫秒，不调用 LLM 的命令不应付出这个代价
+_client: Optional["OpenAI"] = None
+_async_client: Optional["AsyncOpenAI"] = None
+_client_lock = threading.Lock()
+
+# 异步调用的全局并发上限（整个进程内同时在途的请求数）与单次请求超时（秒）
+MAX_CONCURRENCY = int(os.getenv("YTX_LLM_CONCURRENCY", "8"))
+DEFAULT_TIMEOUT = 120.0
+
+# asyncio.Semaphore 绑定事件循环，每个循环一个
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
 
 # 可支持的模型类型（你也可以改成 Enum）
 ModelType = Literal["gpt-3.5-turbo", "gpt-4", "gpt-4o", "gpt-4o-mini", "o4-mini"]
 
 
+def get_client() -> "OpenAI":
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = llm_client.build_client()
+        return _client
+
+
+def get_async_client() -> "AsyncOpenAI":
+    global _async_client
+    with _client_lock:
+        if _async_client is None:
+            _async_client = llm_client.build_async_client()
+        return _async_client
+
+
 def call_llm(
     prompt: str,
     model: ModelType = "gpt-4o-mini",
@@ -22,28 +55,164 @@ def call_llm(
     system_prompt: Optional[str] = None,
     return_raw: bool = False,
     max_tokens: Optional[int] = None,
+    use_cache: bool = True,
 ) -> dict:
-    messages = []
-    if system_prompt:
-        messages.append({"role": "system", "content": system_prompt})
-    messages.append({"role": "user", "content": prompt})
+    cache = get_cache() if use_cache else None
+    key = cache_key(prompt, model, temperature, system_prompt, max_tokens)
+    content = cache.get(key) if cache is not None else None
+    if content is not None:
+        logger.debug(f"LLM cache hit ({cache.hits} hits / {cache.misses} misses)")
+        return content if return_raw else _safe_json_parse(content)
 
     try:
         logger.debug(f"Calling OpenAI model: {model}")
-        response: ChatCompletion = client.chat.completions.create(
+        client = get_client()
+        response: "ChatCompletion" = llm_client.with_retry(lambda: client.chat.completions.create(
             model=model,
-            messages=messages,
+            messages=_messages(prompt, system_prompt),
             temperature=temperature,
             max_tokens=max_tokens,
-        )
-        content = response.choices[0].message.content.strip()
-        if return_raw:
-            return content
-        return _safe_json_parse(content)
+        ))
+        return _finish(response, return_raw, cache, key)
     except Exception as e:
         logger.exception("LLM call failed.")
         raise RuntimeError(f"LLM call failed: {e}")
 
+
+async def acall_llm(
+    prompt: str,
+    model: ModelType = "gpt-4o-mini",
+    temperature: float = 0.2,
+    system_prompt: Optional[str] = None,
+    return_raw: bool = False,
+    max_tokens: Optional[int] = None,
+    use_cache: bool = True,
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+) -> dict:
+    """call_llm 的异步版本：同一事件循环内最多 MAX_CONCURRENCY 个请求在途，单次请求超过 timeout 秒视为失败"""
+    cache = get_cache() if use_cache else None
+    key = cache_key(prompt, model, temperature, system_prompt, max_tokens)
+    content = cache.get(key) if cache is not None else None
+    if content is not None:
+        logger.debug(f"LLM cache hit ({cache.hits} hits / {cache.misses} misses)")
+        return content if return_raw else _safe_json_parse(content)
+
+    try:
+        async with _semaphore():
+            logger.debug(f"Calling OpenAI model (async): {model}")
+            client = get_async_client()
+            # timeout 限制整个调用（含重试）的耗时
+            response: "ChatCompletion" = await asyncio.wait_for(
+                llm_client.awith_retry(lambda: client.chat.completions.create(
+                    model=model,
+                    messages=_messages(prompt, system_prompt),
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )),
+                timeout,
+            )
+        return _finish(response, return_raw, cache, key)
+    except asyncio.TimeoutError:
+        logger.error(f"LLM call timed out after {timeout}s.")
+        raise RuntimeError(f"LLM call timed out after {timeout}s")
+    except Exception as e:
+        logger.exception("LLM call failed.")
+        raise RuntimeError(f"LLM call failed: {e}")
+
+
+def stream_llm(
+    prompt: str,
+    model: ModelType = "gpt-4o-mini",
+    temperature: float = 0.2,
+    system_prompt: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+    use_cache: bool = True,
+) -> Iterator[str]:
+    """流式调用，逐段 yield 模型输出的文本；完整输出结束且不为空时写入缓存，缓存命中时一次 yield 全文"""
+    cache = get_cache() if use_cache else None
+    key = cache_key(prompt, model, temperature, system_prompt, max_tokens)
+    content = cache.get(key) if cache is not None else None
+    if content is not None:
+        logger.debug(f"LLM cache hit ({cache.hits} hits / {cache.misses} misses)")
+        yield content
+        return
+
+    parts = []
+    try:
+        logger.debug(f"Calling OpenAI model (stream): {model}")
+        client = get_client()
+        # 只重试建立流之前的错误，输出开始后出错直接失败，避免重复输出；
+        # 不对冲：落后的流会占着连接，建流耗时也不应计入对冲阈值
+        stream = llm_client.with_retry(lambda: client.chat.completions.create(
+            model=model,
+            messages=_messages(prompt, system_prompt),
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+        ), hedge=False)
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                yield delta
+    except Exception as e:
+        logger.exception("LLM call failed.")
+        raise RuntimeError(f"LLM call failed: {e}")
+    content = "".join(parts).strip()
+    if cache is not None and content:
+        cache.put(key, content)
+
+
+def _semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(MAX_CONCURRENCY)
+    return semaphore
+
+
+def cache_key(
+    prompt: str,
+    model: ModelType = "gpt-4o-mini",
+    temperature: float = 0.2,
+    system_prompt: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+) -> str:
+    """请求在 LLM 缓存中的键，参数与 call_llm 一致"""
+    return make_key(model=model, temperature=temperature, system_prompt=system_prompt,
+                    prompt=prompt, max_tokens=max_tokens)
+
+
+def chat_body(
+    prompt: str,
+    model: ModelType = "gpt-4o-mini",
+    temperature: float = 0.2,
+    system_prompt: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+) -> dict:
+    """chat.completions 请求体，参数与 call_llm 一致（Batch API 等直接发送请求体的场景使用）"""
+    body = {"model": model, "messages": _messages(prompt, system_prompt), "temperature": temperature}
+    if max_tokens is not None:
+        body["max_tokens"] = max_tokens
+    return body
+
+
+def _messages(prompt: str, system_prompt: Optional[str]) -> list:
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+def _finish(response: "ChatCompletion", return_raw: bool, cache, key: str):
+    content = response.choices[0].message.content.strip()
+    result = content if return_raw else _safe_json_parse(content)
+    if cache is not None:
+        # 只缓存能正常解析的结果
+        cache.put(key, content)
+    return result
+
 def _safe_json_parse(content: str) -> dict:
     try:
         return json.loads(content)
@@ -0,0 +1,62 @@
+"""
+llm/prompt.py
+
+各分析调用（overview / summary / 合并分析）共用的提示词布局。
+
+OpenAI 等提供方会缓存请求的公共前缀（prompt caching），命中部分更便宜、首 token 更快，
+但只在前缀逐字节相同时生效。因此所有调用统一为：
+- 固定不变的 SYSTEM_PROMPT
+- 用户消息以字幕（或分段要点）开头，格式一致：每行 "[MM:SS] 句子"
+- 视频元数据和任务说明放在字幕之后
+同一视频需要分别调用时，这些调用共享 system + 字幕这段最长的前缀。
+
+用法：
+    from ytx.core.llm.prompt import SYSTEM_PROMPT, transcript_lines, transcript_prompt
+    prompt = transcript_prompt("\n".join(transcript_lines(sentence_path)), "请生成……")
+"""
+
+import logging
+import re
+from pathlib import Path
+from typing import List, Tuple
+
+from ytx.core.utils import caption_utils
+
+logger = logging.getLogger(__name__)
+
+_TAG = re.compile(r'\[.*?\]')
+
+SYSTEM_PROMPT = "你是一个专业的视频内容分析专家，根据提供的视频字幕完成用户要求的分析任务。"
+
+
+def transcript_lines(sentence_path: Path) -> List[str]:
+    """每句一行，带起始时间，如 "[01:05] text"，供模型标注章节时间"""
+    return [line for _, line in transcript_units(sentence_path)]
+
+
+def transcript_units(sentence_path: Path) -> List[Tuple[int, str]]:
+    """[(起始时间 ms, 该句的行)]，起始时间未知时为 -1"""
+    try:
+        units = []
+        with caption_utils.load_sentences(sentence_path) as track:
+            for text, start_ms, _ in track:
+                # 去除无效标签，如 [Music] 等
+                text = _TAG.sub('', text).strip()
+                if text:
+                    units.append((start_ms, f"[{clock(start_ms)}] {text}" if start_ms >= 0 else text))
+        return units
+    except Exception as e:
+        logger.error(f"读取字幕文件失败: {e}")
+        return []
+
+
+def clock(ms: int) -> str:
+    """ms → MM:SS，超过一小时为 H:MM:SS"""
+    h, rest = divmod(ms // 1000, 3600)
+    m, s = divmod(rest, 60)
+    return f"{h}:{m:02}:{s:02}" if h else f"{m:02}:{s:02}"
+
+
+def transcript_prompt(content: str, instructions: str, source: str = "字幕内容") -> str:
+    """内容在前、任务说明在后"""
+    return f"### {source}：\n{content}\n\n{instructions.strip()}\n"
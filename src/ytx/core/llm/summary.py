@@ -1,73 +1,415 @@
 """
-llm/overview.py
+llm/summary.py
 
 本模块用于通过大语言模型（LLM）分析视频字幕内容，自动生成视频目录和摘要。
 
 主要功能：
 - 读取 .sentences.md 字幕文件，自动过滤无效内容（如 [Music] 等）
 - 调用 LLM（如 OpenAI GPT-4o-mini）生成视频目录以及每段 200-300 字的中文摘要
+- 字幕较长时按句子边界分块，并发生成各块要点（map），再汇总为目录和摘要（reduce）；
+  没有上传者章节时先在本地检测话题转换点（utils/topic_segment.py），块尽量在话题边界处切分，
+  每块只讲一个话题，要点和最终章节更贴合内容结构
+- 传入 SummaryStore 时按块保存要点和结果，字幕不变直接返回，字幕变化只重新生成变化的块
+- 视频有上传者章节（meta.json 的 chapters）时按章节切分字幕、并发生成各章节描述，
+  章节标题和时间直接沿用，不再让模型划分章节；没有章节时才回退为上面的方式
+- 提示词按 llm/prompt.py 的布局组织（字幕在前），与 overview 调用共享可缓存的前缀
 
 用法：
     from ytx.core.llm import summary as llm_summary
     llm_summary.run(sentence_path)
+    await llm_summary.arun(sentence_path)   # 异步版本，分块调用在同一事件循环内并发
+    for text in llm_summary.run_stream(sentence_path):   # 流式输出，边生成边返回
+        print(text, end="", flush=True)
 
 参数：
     sentence_path: Path，字幕句子文件路径（.sentences.md）
+    mode: "auto"（默认，有章节按章节，否则按长度选择）| "single"（一次调用）| "map_reduce"（分块并发）| "chapters"
+    chapters: 上传者章节 [(start_ms, end_ms, title)]，见 caption_utils.load_chapters
+    store: SummaryStore，可选，持久化的分块结果（见 llm/summary_store.py）
 
 返回：
     string, 视频目录和摘要
 """
 
+import asyncio
 import logging
+import zlib
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Collection, Dict, Generator, Iterator, List, Literal, Optional, Sequence, Tuple
 
-from ytx.core.llm.common import call_llm
+from ytx.core.llm.common import acall_llm, call_llm, stream_llm
+from ytx.core.llm.prompt import SYSTEM_PROMPT, clock, transcript_prompt, transcript_units
+from ytx.core.llm.summary_store import SummaryStore, chunk_key, summary_key
+from ytx.core.llm.tokens import count_tokens, split_text
+from ytx.core.utils import topic_segment
 
 logger = logging.getLogger(__name__)
 
-def run(sentence_path: Path):
+# auto 模式下，字幕不超过该 token 数时一次调用完成，否则分块 map-reduce
+SINGLE_CALL_TOKENS = 12_000
+# map 阶段每块的 token 预算，按句子边界切分
+CHUNK_TOKENS = 3_000
+# 块达到预算的该比例后，平均每 CHUNK_BOUNDARY_MOD 句出现一个内容决定的边界
+CHUNK_MIN_SHARE = 0.75
+CHUNK_BOUNDARY_MOD = 16
+# 块达到预算的该比例后，遇到话题转换点即切分
+TOPIC_MIN_SHARE = 0.3
+# map 阶段并发调用数
+MAX_WORKERS = 4
+
+SummaryMode = Literal["auto", "single", "map_reduce", "chapters"]
+# 上传者定义的章节 (start_ms, end_ms, title)，见 caption_utils.load_chapters
+Chapter = Tuple[int, int, str]
+
+# 所有调用使用相同的 system prompt，见 llm/prompt.py
+_OPTIONS: Dict[str, Any] = {"model": "gpt-4o-mini", "system_prompt": SYSTEM_PROMPT}
+
+def run(
+    sentence_path: Path,
+    mode: SummaryMode = "auto",
+    store: Optional[SummaryStore] = None,
+    chapters: Sequence[Chapter] = (),
+):
+    store = store or SummaryStore()
     try:
-        sentences = _load_sentences(sentence_path)
-        if not sentences:
+        plan = _plan(sentence_path, mode, chapters)
+        if plan is None:
             logger.warning("没有找到字幕内容")
             return "No valid content found."
-        
-        # 调用 LLM 生成视频目录和摘要
-        logger.info("调用 LLM 生成目录和摘要")
-        result = _generate_summary(sentences)
-        
+
+        # 调用 LLM 生成视频目录和摘要；中途失败时也保存已生成的要点，下次只重新生成失败的部分
+        try:
+            result = _saved_summary(plan, store)
+            if result is None:
+                notes = list(_iter_notes(plan, store))
+                if plan.mode == "chapters":
+                    result = plan.render(notes)
+                else:
+                    logger.info("调用 LLM 生成目录和摘要")
+                    result = _generate(plan.reduce_prompt(notes))
+                store.put_summary(plan.key, result)
+        finally:
+            store.save()
         logger.info("LLM 分析完成")
         return result
     except Exception as e:
         logger.error(f"LLM 分析失败: {e}")
         return f"Error occurred: {e}"
 
-def _load_sentences(sentence_path: Path) -> str:
+def run_stream(
+    sentence_path: Path,
+    mode: SummaryMode = "auto",
+    store: Optional[SummaryStore] = None,
+    chapters: Sequence[Chapter] = (),
+) -> Generator[str, None, bool]:
+    """
+    与 run 相同，但逐段 yield 最终输出；map-reduce 模式下流式输出的是汇总调用，
+    按章节模式下各章节并发生成、按顺序逐章输出，已保存的结果一次返回。
+    出错或模型没有返回内容时，已输出的部分不撤回，出错时最后再 yield 错误信息；
+    生成器的返回值表示是否完整生成（可用 ok = yield from run_stream(...) 取得），调用方据此决定是否保存。
+    """
+    store = store or SummaryStore()
     try:
-        with open(sentence_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        sentences = []
-        for line in content.strip().split('\n'):
-            if ' → ' in line:
-                sentence = line.split(' → ', 1)[1].strip()
-                if sentence:
-                    import re
-                    sentence = re.sub(r'\[.*?\]', '', sentence).strip()  # 去除无效标签，如 [Music] 等
-                    if sentence:
-                        sentences.append(sentence)
-        return ' '.join(sentences)  # 返回有效的字幕文本
+        plan = _plan(sentence_path, mode, chapters)
+        if plan is None:
+            logger.warning("没有找到字幕内容")
+            yield "No valid content found."
+            return False
+
+        try:
+            result = _saved_summary(plan, store)
+            if result is not None:
+                yield result
+            elif plan.mode == "chapters":
+                notes: List[str] = []
+                for note in _iter_notes(plan, store):
+                    index = len(notes)
+                    notes.append(note)
+                    yield ("\n\n" if index else "") + _render_chapter(index + 1, plan.slices[index][0], note)
+                store.put_summary(plan.key, plan.render(notes))
+            else:
+                notes = list(_iter_notes(plan, store))
+                logger.info("调用 LLM 生成目录和摘要")
+                parts = []
+                for text in stream_llm(plan.reduce_prompt(notes), **_OPTIONS):
+                    parts.append(text)
+                    yield text
+                if not "".join(parts).strip():
+                    logger.warning("LLM 没有返回内容")
+                    return False
+                store.put_summary(plan.key, "".join(parts))
+        finally:
+            store.save()
+        logger.info("LLM 分析完成")
+        return True
     except Exception as e:
-        logger.error(f"读取字幕文件失败: {e}")
-        return ""
+        logger.error(f"LLM 分析失败: {e}")
+        yield f"Error occurred: {e}"
+        return False
 
-def _generate_summary(content: str) -> str:
-    prompt = f"""
-以下是视频字幕的内容，请根据内容生成视频章节, 章节原则上不超过5个，每个章节的描述尽量详细，说清楚每个章节的关键内容。
-最后整理核心观点。
+async def arun(
+    sentence_path: Path,
+    mode: SummaryMode = "auto",
+    store: Optional[SummaryStore] = None,
+    chapters: Sequence[Chapter] = (),
+):
+    store = store or SummaryStore()
+    try:
+        plan = _plan(sentence_path, mode, chapters)
+        if plan is None:
+            logger.warning("没有找到字幕内容")
+            return "No valid content found."
+
+        try:
+            result = _saved_summary(plan, store)
+            if result is None:
+                notes = await _anotes(plan, store)
+                if plan.mode == "chapters":
+                    result = plan.render(notes)
+                else:
+                    logger.info("调用 LLM 生成目录和摘要")
+                    result = await _agenerate(plan.reduce_prompt(notes))
+                store.put_summary(plan.key, result)
+        finally:
+            store.save()
+        logger.info("LLM 分析完成")
+        return result
+    except Exception as e:
+        logger.error(f"LLM 分析失败: {e}")
+        return f"Error occurred: {e}"
+
+def build_requests(
+    sentence_path: Path, chapters: Sequence[Chapter] = ()
+) -> Tuple[SummaryMode, List[Dict[str, Any]]]:
+    """
+    批量模式用：返回 (mode, 第一阶段的 call_llm 参数列表)。
+    mode 为 "single" 时只有一个请求，其结果即最终摘要；
+    为 "chapters" 时每个章节一个请求，结果按顺序传给 build_chapters_summary 拼成最终摘要；
+    为 "map_reduce" 时每块一个请求，结果按顺序传给 build_reduce_request 生成汇总请求。
+    """
+    plan = _plan(sentence_path, "auto", chapters)
+    if plan is None:
+        return "single", []
+    if plan.mode == "single":
+        return "single", [_request(plan.reduce_prompt([]))]
+    return plan.mode, [_request(prompt) for _, prompt in plan.requests]
+
+def build_reduce_request(notes: List[str]) -> Dict[str, Any]:
+    """批量模式用：由各块要点生成汇总请求"""
+    return _request(_reduce_prompt(notes))
+
+def build_chapters_summary(sentence_path: Path, chapters: Sequence[Chapter], notes: List[str]) -> str:
+    """批量模式用：由各章节的描述拼成最终摘要"""
+    return _render_chapters(_slice_chapters(transcript_units(sentence_path), chapters), notes)
+
+def _request(prompt: str) -> Dict[str, Any]:
+    return {"prompt": prompt, **_OPTIONS}
+
+def _resolve_mode(lines: List[str], mode: SummaryMode, chapters: Sequence[Chapter] = ()) -> SummaryMode:
+    # 有上传者章节时按章节切分，不再让模型划分章节；没有章节时才回退
+    if mode in ("auto", "chapters") and len(chapters) >= 2:
+        return "chapters"
+    if mode in ("auto", "chapters"):
+        return "single" if _estimate_tokens(lines) <= SINGLE_CALL_TOKENS else "map_reduce"
+    return mode
+
+def _estimate_tokens(lines: List[str]) -> int:
+    return count_tokens("\n".join(lines))
+
+def _topic_chunks(units: List[Tuple[int, str]], budget: int) -> List[List[str]]:
+    """按话题转换点和 token 预算切块"""
+    breaks = {i for i, _ in topic_segment.boundaries(units)[1:]}
+    logger.info(f"检测到 {len(breaks) + 1} 个话题段")
+    return _chunk_lines([line for _, line in units], budget, breaks)
+
+def _chunk_lines(lines: List[str], budget: int, breaks: Collection[int] = ()) -> List[List[str]]:
+    """
+    按句子边界把字幕切成不超过 budget token 的块，单句超出 budget 时先在词边界处切开。
+    边界由内容决定：块达到预算的 CHUNK_MIN_SHARE 后，遇到哈希满足条件的句子即切分，
+    因此插入或修改字幕只影响附近的块，其余块内容不变，可复用已保存的要点。
+    breaks 为话题转换点（新话题第一句的下标），块达到预算的 TOPIC_MIN_SHARE 后在此处切分。
+    """
+    min_size = budget * CHUNK_MIN_SHARE
+    topic_size = budget * TOPIC_MIN_SHARE
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    size = 0
+    for i, line in enumerate(lines):
+        cost = count_tokens(line) + 1
+        pieces = [(line, cost)] if cost <= budget else [(p, count_tokens(p) + 1) for p in split_text(line, budget)]
+        for k, (piece, cost) in enumerate(pieces):
+            if current and (size + cost > budget or k == 0 and i in breaks and size >= topic_size):
+                chunks.append(current)
+                current, size = [], 0
+            current.append(piece)
+            size += cost
+            if size >= min_size and zlib.crc32(piece.encode("utf-8")) % CHUNK_BOUNDARY_MOD == 0:
+                chunks.append(current)
+                current, size = [], 0
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _slice_chapters(units: List[Tuple[int, str]], chapters: Sequence[Chapter]) -> List[Tuple[Chapter, List[str]]]:
+    """按章节的时间范围切分字幕，没有字幕的章节（如纯音乐片头）跳过；起始时间未知的句子归入上一句所在章节"""
+    starts = []
+    last = 0
+    for start_ms, _ in units:
+        last = start_ms if start_ms >= 0 else last
+        starts.append(last)
+    slices = []
+    for k, chapter in enumerate(chapters):
+        # 第一个章节从头开始，最后一个章节到结尾，章节之间的空隙归入前一个章节
+        lo = 0 if k == 0 else bisect_left(starts, chapter[0])
+        hi = len(units) if k == len(chapters) - 1 else bisect_left(starts, chapters[k + 1][0])
+        if lo < hi:
+            slices.append((chapter, [line for _, line in units[lo:hi]]))
+    return slices
+
+def _chapter_key(chapter: Chapter, chunk: List[str]) -> str:
+    start_ms, end_ms, title = chapter
+    return chunk_key([f"{title} {start_ms}-{end_ms}", *chunk])
 
-### 字幕内容：
-{content}
+def _render_chapters(slices: List[Tuple[Chapter, List[str]]], notes: List[str]) -> str:
+    return "\n\n".join(_render_chapter(i, chapter, note) for i, ((chapter, _), note) in enumerate(zip(slices, notes), 1))
+
+def _render_chapter(index: int, chapter: Chapter, note: str) -> str:
+    start_ms, end_ms, title = chapter
+    return f"{index}. {title} ({clock(start_ms)} - {clock(end_ms)})\n{note.strip()}"
+
+class _Plan:
+    """
+    一次摘要的执行计划，run / run_stream / arun 共用：
+    map 阶段的各个请求（分块要点或章节描述，single 模式没有），以及由其结果得到最终摘要的方式
+    （chapters 模式直接拼接章节描述，其余模式再调用一次 LLM 汇总）。
+    """
+
+    def __init__(
+        self,
+        mode: SummaryMode,
+        key: str,
+        requests: List[Tuple[str, str]],
+        content: str = "",
+        slices: Optional[List[Tuple[Chapter, List[str]]]] = None,
+    ):
+        self.mode = mode
+        self.key = key                  # 最终摘要在 SummaryStore 中的键
+        self.requests = requests        # map 阶段的 (要点键, 提示词)
+        self.content = content          # single 模式的字幕全文
+        self.slices = slices or []      # chapters 模式的章节及其字幕
+
+    def reduce_prompt(self, notes: List[str]) -> str:
+        if self.mode == "single":
+            return _summary_prompt(self.content)
+        return _reduce_prompt(notes)
+
+    def render(self, notes: List[str]) -> str:
+        return _render_chapters(self.slices, notes)
+
+def _plan(sentence_path: Path, mode: SummaryMode, chapters: Sequence[Chapter]) -> Optional[_Plan]:
+    """读取字幕并确定模式、切分和提示词；没有字幕内容时返回 None"""
+    units = transcript_units(sentence_path)
+    lines = [line for _, line in units]
+    if not lines:
+        return None
+    mode = _resolve_mode(lines, mode, chapters)
+    if mode == "chapters":
+        slices = _slice_chapters(units, chapters)
+        requests = [(_chapter_key(chapter, chunk), _chapter_prompt(chapter, "\n".join(chunk))) for chapter, chunk in slices]
+        return _Plan(mode, summary_key(mode, [key for key, _ in requests]), requests, slices=slices)
+    if mode == "single":
+        return _Plan(mode, summary_key(mode, [chunk_key(lines)]), [], content="\n".join(lines))
+    chunks = _topic_chunks(units, CHUNK_TOKENS)
+    requests = [(chunk_key(chunk), _chunk_prompt(i, len(chunks), "\n".join(chunk))) for i, chunk in enumerate(chunks, 1)]
+    return _Plan(mode, summary_key(mode, [key for key, _ in requests]), requests)
+
+def _saved_summary(plan: _Plan, store: SummaryStore) -> Optional[str]:
+    """已保存的最终摘要；同时标记各段要点仍在使用，保存时不被清除"""
+    for key, _ in plan.requests:
+        store.note(key)
+    return store.summary(plan.key)
+
+def _missing(plan: _Plan, store: SummaryStore) -> List[int]:
+    """还没有保存要点的段"""
+    missing = [i for i, (key, _) in enumerate(plan.requests) if store.note(key) is None]
+    if plan.requests:
+        label = "按上传者章节切分为" if plan.mode == "chapters" else "字幕较长，分为"
+        logger.info(f"{label} {len(plan.requests)} 段，其中 {len(missing)} 段需要生成")
+    return missing
+
+def _iter_notes(plan: _Plan, store: SummaryStore) -> Iterator[str]:
+    """map 阶段：缺少的段在线程池中并发生成（最多 MAX_WORKERS 个），按顺序逐个返回；已保存的直接复用"""
+    missing = _missing(plan, store)
+    if not missing:
+        yield from (store.note(key) for key, _ in plan.requests)
+        return
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {i: pool.submit(_generate, plan.requests[i][1]) for i in missing}
+        try:
+            for i, (key, _) in enumerate(plan.requests):
+                if i in futures:
+                    store.put_note(key, futures[i].result())
+                yield store.note(key)
+        finally:
+            # 某段失败时，其余段的结果照样保存
+            wait(futures.values())
+            for i, future in futures.items():
+                if future.exception() is None:
+                    store.put_note(plan.requests[i][0], future.result())
+
+async def _anotes(plan: _Plan, store: SummaryStore) -> List[str]:
+    """_iter_notes 的异步版本，并发上限由 acall_llm 的全局信号量控制"""
+    missing = _missing(plan, store)
+    results = await asyncio.gather(*(_agenerate(plan.requests[i][1]) for i in missing), return_exceptions=True)
+    # 某段失败时，其余段的结果照样保存
+    for i, result in zip(missing, results):
+        if not isinstance(result, BaseException):
+            store.put_note(plan.requests[i][0], result)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return [store.note(key) for key, _ in plan.requests]
+
+def _generate(prompt: str) -> str:
+    return call_llm(prompt, return_raw=True, **_OPTIONS)
+
+async def _agenerate(prompt: str) -> str:
+    return await acall_llm(prompt, return_raw=True, **_OPTIONS)
+
+def _note(index: int, result: str) -> str:
+    return f"第 {index} 段：\n{result}"
+
+def _chunk_prompt(index: int, total: int, content: str) -> str:
+    return transcript_prompt(content, f"""
+以上是一段视频字幕（第 {index}/{total} 段），每行开头为该句的起始时间。
+请按时间顺序提炼这一段的主要话题和关键内容，每个话题一行，标注起止时间。
+
+### 返回格式：
+- 每行格式：(起始时间 - 结束时间) 话题：关键内容
+- 不要采用markdown格式，直接输出纯文本
+""")
+
+def _chapter_prompt(chapter: Chapter, content: str) -> str:
+    start_ms, end_ms, title = chapter
+    return transcript_prompt(content, f"""
+以上是视频章节「{title}」（{clock(start_ms)} - {clock(end_ms)}）的字幕，每行开头为该句的起始时间。
+请详细描述这一章节的关键内容，说清楚讲了什么、有哪些要点。
+
+### 返回格式：
+- 直接输出一段描述，不要重复章节标题和时间
+- 不要采用markdown格式，直接输出纯文本
+""")
+
+def _reduce_prompt(notes: List[str]) -> str:
+    content = "\n\n".join(_note(i, note) for i, note in enumerate(notes, 1))
+    return _summary_prompt(content, source="分段要点")
+
+def _summary_prompt(content: str, source: str = "字幕内容") -> str:
+    return transcript_prompt(content, f"""
+以上是视频{source}，请根据内容生成视频章节, 章节原则上不超过5个，每个章节的描述尽量详细，说清楚每个章节的关键内容。
+最后整理核心观点。
 
 ### 返回格式：
 - 章节目录以其对应的内容和核心观点，详细一些
@@ -84,8 +426,4 @@ def _generate_summary(content: str) -> str:
 3. 消息平台与AI的结合 (08:00 - 08:30)
 演讲者探讨了在不同国家（如泰国和越南）中，低成本人力劳动如何促进了基于消息的商业模式的发展。他认为，随着AI技术的进步，未来每个企业都将拥有一个AI代理，能够在消息平台上进行客户支持和销售。这种转变将使得企业能够以更低的成本提供高质量的客户服务，进而推动商业的快速增长。
 
-"""
-
-
-    result = call_llm(prompt, model="gpt-4o-mini", return_raw=True)
-    return result
+""")
@@ -0,0 +1,92 @@
+"""
+llm/summary_store.py
+
+按块持久化 summary 的中间结果和最终结果，保存在项目目录下的 summary.chunks.json：
+
+- notes：分块要点，键为该块字幕（含时间）的 sha256
+- summaries：最终目录和摘要，键为模式加各块键的顺序组合
+
+字幕不变时重新运行直接从磁盘返回；字幕变化后只有内容变化的块需要重新生成要点，
+再重新汇总。保存时只保留本次用到的条目，文件不会无限增长。
+SUMMARY_VERSION 随提示词变化递增，旧文件整体失效。
+
+用法：
+    store = SummaryStore(Path(project_dir) / STORE_FILE)
+    note = store.note(chunk_key(lines))
+    store.put_note(key, text)
+    store.save()
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+STORE_FILE = "summary.chunks.json"
+SUMMARY_VERSION = 1
+
+
+def chunk_key(lines: Sequence[str]) -> str:
+    return hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+def summary_key(mode: str, chunk_keys: Iterable[str]) -> str:
+    return hashlib.sha256(":".join([mode, *chunk_keys]).encode("utf-8")).hexdigest()
+
+
+class SummaryStore:
+    """path 为 None 时只在内存中使用；reuse=False 时不读取已有结果（如 --force），但仍会保存新结果"""
+
+    def __init__(self, path: Optional[Path] = None, reuse: bool = True):
+        self.path = path
+        self._notes: Dict[str, str] = {}
+        self._summaries: Dict[str, str] = {}
+        self._used = set()
+        if path is not None and reuse:
+            self._load()
+
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取摘要缓存失败，将重新生成: {e}")
+            return
+        if data.get("version") != SUMMARY_VERSION:
+            return
+        self._notes = data.get("notes", {})
+        self._summaries = data.get("summaries", {})
+
+    def note(self, key: str) -> Optional[str]:
+        self._used.add(key)
+        return self._notes.get(key)
+
+    def put_note(self, key: str, text: str):
+        self._used.add(key)
+        self._notes[key] = text
+
+    def summary(self, key: str) -> Optional[str]:
+        self._used.add(key)
+        return self._summaries.get(key)
+
+    def put_summary(self, key: str, text: str) -> str:
+        self._used.add(key)
+        self._summaries[key] = text
+        return text
+
+    def save(self):
+        if self.path is None:
+            return
+        data = {
+            "version": SUMMARY_VERSION,
+            "notes": {k: v for k, v in self._notes.items() if k in self._used},
+            "summaries": {k: v for k, v in self._summaries.items() if k in self._used},
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp_path, self.path)
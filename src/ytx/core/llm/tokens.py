@@ -0,0 +1,158 @@
+"""
+llm/tokens.py
+
+本地 token 计数与按预算抽样字幕。
+
+- count_tokens：安装了 tiktoken（pip install ytx[tokens]）时按模型的编码精确计数，
+  否则按字符数估算（英文约 4 个字符一个 token，中日韩字符各算一个）
+- sample_sentences：字幕超出预算时做分层抽样：开头、中间若干等距窗口、结尾，
+  均在句子边界截断，保证送给模型的内容覆盖全片且长度有上限
+- split_text：把超出预算的单句（如没有标点的自动字幕）在词边界处切成若干段
+
+用法：
+    from ytx.core.llm.tokens import count_tokens, sample_sentences
+    windows = sample_sentences(sentences, budget=6000)
+    content = "\n[...]\n".join(" ".join(w) for w in windows)
+"""
+
+import logging
+import math
+import re
+from functools import lru_cache
+from typing import List, Sequence
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+_CJK = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+# 抽样时开头、结尾各占预算的比例，其余平均分给中间的窗口
+HEAD_SHARE = 0.2
+TAIL_SHARE = 0.1
+WINDOWS = 5
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:  # 编码表需联网下载，失败时退回估算
+        logger.debug(f"tiktoken 不可用，按字符数估算 token: {e}")
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """不依赖 tokenizer 的估算"""
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / CHARS_PER_TOKEN)
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    encoding = _encoding(model)
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def sample_sentences(
+    sentences: Sequence[str],
+    budget: int,
+    model: str = "gpt-4o-mini",
+    windows: int = WINDOWS,
+) -> List[List[str]]:
+    """
+    在 token 预算内抽样句子，返回按时间顺序排列、互不重叠的若干窗口（每个窗口是连续的句子）。
+    未超出预算时返回包含全部句子的单个窗口。
+    单句超过窗口预算时先在词边界处切开，因此输入非空时结果也不会为空。
+    """
+    costs = [count_tokens(s, model) + 1 for s in sentences]  # +1 为分隔的空格
+    if sum(costs) <= budget:
+        return [list(sentences)] if sentences else []
+
+    head_budget = int(budget * HEAD_SHARE)
+    tail_budget = int(budget * TAIL_SHARE)
+    window_budget = (budget - head_budget - tail_budget) // max(windows, 1)
+
+    # 超长的句子切成能放进最小窗口的若干段
+    piece_budget = max(min(head_budget, tail_budget, window_budget), 1)
+    if max(costs) > piece_budget:
+        sentences = [
+            piece
+            for s, cost in zip(sentences, costs)
+            for piece in (split_text(s, piece_budget, model) if cost > piece_budget else [s])
+        ]
+        costs = [count_tokens(s, model) + 1 for s in sentences]
+    n = len(sentences)
+
+    # 结尾：从最后一句往前取
+    tail_start = n
+    used = 0
+    while tail_start > 0 and used + costs[tail_start - 1] <= tail_budget:
+        tail_start -= 1
+        used += costs[tail_start]
+
+    spans = []
+    head_end = _take(costs, 0, tail_start, head_budget)
+    spans.append((0, head_end))
+    # 中间窗口：在开头与结尾之间等距取起点
+    lo, hi = head_end, tail_start
+    for k in range(windows):
+        start = max(lo + (hi - lo) * (2 * k + 1) // (2 * windows), spans[-1][1])
+        limit = lo + (hi - lo) * (k + 1) // windows if k + 1 < windows else hi
+        spans.append((start, _take(costs, start, max(limit, start), window_budget)))
+    spans.append((tail_start, n))
+
+    result: List[List[str]] = []
+    result_end = -1
+    for start, end in spans:
+        if start >= end:
+            continue
+        if result and start == result_end:
+            result[-1].extend(sentences[start:end])
+        else:
+            result.append(list(sentences[start:end]))
+        result_end = end
+    # 预算小到一段也放不下时，至少保留开头
+    return result or [[sentences[0]]]
+
+
+def split_text(text: str, budget: int, model: str = "gpt-4o-mini") -> List[str]:
+    """
+    把文本在词边界处切成若干段，每段（计入分隔的空格）不超过 budget token；
+    单个词本身超出预算时（如没有空格的中文）按字符切开
+    """
+    budget = max(budget, 2)
+    pieces: List[str] = []
+    current: List[str] = []
+    used = 0
+    for word in text.split():
+        parts = [(word, count_tokens(word, model) + 1)]
+        if parts[0][1] > budget:
+            # 每个字符最多一个 token，按 budget - 1 个字符切开
+            step = budget - 1
+            parts = [(word[i:i + step], count_tokens(word[i:i + step], model) + 1) for i in range(0, len(word), step)]
+        for part, cost in parts:
+            if current and used + cost > budget:
+                pieces.append(" ".join(current))
+                current, used = [], 0
+            current.append(part)
+            used += cost
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def _take(costs: Sequence[int], start: int, limit: int, budget: int) -> int:
+    """从 start 起连续取句子，不超过 budget 且不越过 limit，返回结束下标（不含）"""
+    end = start
+    used = 0
+    while end < limit and used + costs[end] <= budget:
+        used += costs[end]
+        end += 1
+    return end
@@ -0,0 +1,177 @@
+'''
+# CaptionTrack：srt / json3 / 句子文件共用的紧凑字幕轨
+#
+# 每个单元（json3 的单词、SRT 的字幕段、.sentences.md 的句子）不单独建对象：
+# - text:    所有单元文本以单个空格连接成的一个字符串（即全文）
+# - offsets: array('q')，offsets[i] 为第 i 个单元在 text 中的起始位置，
+#            末尾额外存一个 len(text) + 1，因此第 i 个单元为 text[offsets[i]:offsets[i + 1] - 1]
+# - starts:  array('q')，起始时间（ms），-1 表示未知
+# - ends:    array('q')，结束时间（ms），-1 表示未知
+#
+# 用法：
+#   track = CaptionTrack.from_units([("Hello", 0, 500), ("world.", 500, 900)])
+#   track.text                      # "Hello world."
+#   track[1]                        # ("world.", 500, 900)
+#   track.time_range(0, 600)        # 起始时间落在 [0, 600) 的子轨
+#   list(track.sentences())         # [(0, 900, "Hello world.", 0, 1)]
+'''
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, Literal, Optional, Pattern, Tuple, Union
+
+# 按英文/中文句末标点加空白断句
+SENTENCE_BREAK = re.compile(r'(?<=[.!?。！？])\s+')
+# 句末标点（后接空白或位于末尾），用于判断字幕是否带标点
+SENTENCE_END = re.compile(r'[.!?。！？](?:\s|$)')
+
+
+class CaptionTrack:
+    __slots__ = ("text", "offsets", "starts", "ends")
+
+    def __init__(self, text: str = "", offsets: array = None, starts: array = None, ends: array = None):
+        self.text = text
+        self.offsets = offsets if offsets is not None else array("q", [len(text) + 1 if text else 0])
+        self.starts = starts if starts is not None else array("q")
+        self.ends = ends if ends is not None else array("q")
+
+    @classmethod
+    def from_units(cls, units: Iterable[Tuple[str, int, int]]) -> "CaptionTrack":
+        """由 (text, start_ms, end_ms) 序列构建；空文本单元会被跳过"""
+        parts = []
+        offsets = array("q")
+        starts = array("q")
+        ends = array("q")
+        pos = 0
+        for text, start_ms, end_ms in units:
+            if not text:
+                continue
+            offsets.append(pos)
+            starts.append(start_ms)
+            ends.append(end_ms)
+            parts.append(text)
+            pos += len(text) + 1
+        offsets.append(pos)
+        return cls(" ".join(parts), offsets, starts, ends)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def unit_text(self, i: int) -> str:
+        return self.text[self.offsets[i]:self.offsets[i + 1] - 1]
+
+    def __getitem__(self, key: Union[int, slice]):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("CaptionTrack 切片不支持步长")
+            stop = max(start, stop)
+            base = self.offsets[start]
+            offsets = array("q", (o - base for o in self.offsets[start:stop + 1]))
+            return CaptionTrack(
+                self.text[base:self.offsets[stop] - 1] if stop > start else "",
+                offsets,
+                self.starts[start:stop],
+                self.ends[start:stop],
+            )
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("CaptionTrack index out of range")
+        return self.unit_text(key), self.starts[key], self.ends[key]
+
+    def __iter__(self) -> Iterator[Tuple[str, int, int]]:
+        for i in range(len(self)):
+            yield self.unit_text(i), self.starts[i], self.ends[i]
+
+    def texts(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self.unit_text(i)
+
+    # 与 TrackFile 接口一致，可统一用 with 管理；数据在内存中，无需释放
+    def close(self):
+        pass
+
+    def __enter__(self) -> "CaptionTrack":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def index_at(self, ms: int) -> int:
+        """时间 ms 时正在进行的单元下标（起始时间不晚于 ms 的最后一个），没有则为 -1"""
+        return bisect_right(self.starts, ms) - 1
+
+    def time_range(self, start_ms: int, end_ms: int) -> "CaptionTrack":
+        """起始时间落在 [start_ms, end_ms) 内的单元组成的子轨（要求 starts 有序）"""
+        return self[bisect_left(self.starts, start_ms):bisect_left(self.starts, end_ms)]
+
+    def sentences(
+        self,
+        pattern: Pattern = SENTENCE_BREAK,
+        attach: Literal["cue", "token"] = "cue",
+        pause_ms: Optional[int] = None,
+        max_words: Optional[int] = None,
+    ) -> Iterator[Tuple[int, int, str, int, int]]:
+        """
+        在全文上分句，通过偏移二分查找每句对应的单元区间。
+
+        attach="cue"：句子归属其起点所在的单元（SRT 字幕段，一个字幕段可包含多句）；
+        attach="token"：句子只包含起点落在句内的单元（json3 单词），没有单元的句子被跳过。
+
+        对没有标点的自动字幕，另外在句子内部的单元边界处断句：
+        上一单元结束到下一单元开始的静音 >= pause_ms，或当前句子已有 max_words 个词。
+        默认 None 关闭对应规则。
+
+        yield (start_ms, end_ms, text, first_unit, last_unit)
+        """
+        text = self.text
+        offsets = self.offsets
+        spans = _iter_spans(text, pattern)
+        if pause_ms is not None or max_words is not None:
+            spans = self._split_spans(spans, pause_ms, max_words)
+        for a, b in spans:
+            sentence = text[a:b].strip()
+            if not sentence:
+                continue
+            if attach == "cue":
+                first = bisect_right(offsets, a) - 1
+                last = bisect_right(offsets, b - 1) - 1
+                if first < 0:
+                    continue
+            else:
+                first = bisect_left(offsets, a)
+                last = bisect_left(offsets, b) - 1
+                if first > last:
+                    continue
+            yield self.starts[first], self.ends[last], sentence, first, last
+
+    def _split_spans(
+        self, spans: Iterable[Tuple[int, int]], pause_ms: Optional[int], max_words: Optional[int]
+    ) -> Iterator[Tuple[int, int]]:
+        """在句子内部的单元边界处按停顿和长度上限继续切分"""
+        text = self.text
+        offsets = self.offsets
+        for a, b in spans:
+            words = 0
+            pos = a
+            # 起点落在 (a, b) 内的单元，即句子内部的单元边界
+            for u in range(bisect_right(offsets, a), bisect_left(offsets, b)):
+                words += len(text[pos:offsets[u]].split())
+                pos = offsets[u]
+                prev_end, start = self.ends[u - 1], self.starts[u]
+                if (
+                    pause_ms is not None and prev_end >= 0 and start >= 0 and start - prev_end >= pause_ms
+                    or max_words is not None and words >= max_words
+                ):
+                    yield a, offsets[u] - 1
+                    a, words = offsets[u], 0
+            yield a, b
+
+
+def _iter_spans(text: str, pattern: Pattern) -> Iterator[Tuple[int, int]]:
+    pos = 0
+    for m in pattern.finditer(text):
+        yield pos, m.start()
+        pos = m.end()
+    yield pos, len(text)
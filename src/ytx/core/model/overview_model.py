@@ -32,11 +32,15 @@
 #     "syntax": "中等",
 #     "style": "自然",
 #     "vocab": "短语丰富，含少量俚语"
-#   }
+#   },
+#   "speech_rate": [128, 141, 136, ...]
 # }
+#
+# wpm、voice_coverage、speech_rate 由字幕时间轴在本地计算（见 utils/speech_rate.py），
+# speech_rate 为按分钟统计的语速曲线（WPM）
 
 '''
-from typing import Dict, Any
+from typing import Dict, Any, List
 from datetime import datetime
 
 class Overview:
@@ -53,6 +57,7 @@ class Overview:
         summary: str = "",
         language: Dict[str, str] = None,
         difficulty: Dict[str, Any] = None,
+        speech_rate: List[int] = None,
     ):
         self.title = title
         self.published_at = published_at
@@ -72,6 +77,7 @@ class Overview:
             "style": "N/A",
             "vocab": "N/A"
         }
+        self.speech_rate = speech_rate or []
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -86,6 +92,7 @@ class Overview:
             "summary": self.summary,
             "language": self.language,
             "difficulty": self.difficulty,
+            "speech_rate": self.speech_rate,
         }
 
     def _format_number(self, n: int) -> str:
@@ -95,6 +102,14 @@ class Overview:
             return f"{round(n / 1_000, 1)}K"
         return str(n)
 
+    def _format_curve(self, values: List[int]) -> str:
+        """语速曲线 → 迷你柱状图，每个字符为一分钟"""
+        if not values:
+            return "N/A"
+        bars = "▁▂▃▄▅▆▇█"
+        top = max(values) or 1
+        return "".join(bars[min(len(bars) - 1, v * len(bars) // top)] for v in values) + f"（峰值 {max(values)} WPM）"
+
     def _format_date(self, date_str: str) -> str:
         try:
             dt = datetime.strptime(date_str, "%Y-%m-%d")
@@ -130,6 +145,7 @@ class Overview:
         table.add_row("CEFR 等级", self.difficulty.get("cefr", "N/A"))
         table.add_row("语音覆盖率", f"{self.difficulty.get('voice_coverage', 'N/A')}%")
         table.add_row("语速 (WPM)", str(self.difficulty.get("wpm", "N/A")))
+        table.add_row("语速曲线", self._format_curve(self.speech_rate))
         table.add_row("句法复杂度", self.difficulty.get("syntax", "N/A"))
         table.add_row("风格", self.difficulty.get("style", "N/A"))
         table.add_row("词汇特点", self.difficulty.get("vocab", "N/A"))
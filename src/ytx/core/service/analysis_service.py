@@ -0,0 +1,31 @@
+"""
+合并分析：一次 LLM 调用同时生成 overview.json 和 summary.txt。
+
+字幕过长或合并结果不完整时，回退为分别调用 llm/overview 和 llm/summary。
+"""
+
+import logging
+from typing import Tuple
+
+from ytx.core.llm import analysis as llm_analysis
+from ytx.core.llm import overview as llm_overview
+from ytx.core.llm import summary as llm_summary
+from ytx.core.model.overview_model import Overview
+from ytx.core.service import overview_service, summary_service
+from ytx.core.utils import caption_utils
+
+log = logging.getLogger(__name__)
+
+
+def run(project_dir: str = ".", force: bool = False) -> Tuple[Overview, str]:
+    overview, sentence_path = overview_service.prepare(project_dir, force)
+    chapters = caption_utils.load_chapters(project_dir)
+    summary = llm_analysis.run(overview, sentence_path, chapters)
+    if summary is None:
+        log.info("合并分析不可用，分别生成概览和摘要")
+        llm_overview.update(overview, sentence_path)
+        store = summary_service.open_store(project_dir, force)
+        summary = llm_summary.run(sentence_path, store=store, chapters=chapters)
+    overview_service.save_overview(overview, project_dir)
+    summary_service.save_summary(project_dir, summary)
+    return overview, summary
@@ -0,0 +1,127 @@
+"""
+batch_service.py
+
+批量处理多个项目的 overview 与 summary：一次性收集所有 LLM 请求，通过 Batch API 离线提交，
+结果返回后写回各项目的 overview.json 和 summary.txt。
+
+流程：
+- 第一阶段：每个项目的 overview 请求，以及 summary 的单次请求、按上传者章节的各章节请求或分块（map）请求；
+- 第二阶段：字幕较长、需要 map-reduce 的项目，用第一阶段的分块要点生成汇总（reduce）请求；
+  按章节的项目直接由各章节描述拼成摘要，不需要第二阶段。
+
+说明：
+- 本模块只负责业务逻辑，不直接负责终端输出；返回各项目的处理结果供 CLI 展示。
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ytx.core.llm import batch as llm_batch
+from ytx.core.llm import overview as llm_overview
+from ytx.core.llm import summary as llm_summary
+from ytx.core.model.overview_model import Overview
+from ytx.core.service import overview_service, summary_service
+from ytx.core.utils import caption_utils
+
+log = logging.getLogger(__name__)
+
+
+def run(
+    project_dirs: List[str],
+    force: bool = False,
+    poll_interval: float = llm_batch.POLL_INTERVAL,
+    timeout: Optional[float] = None,
+    client=None,
+) -> Dict[str, Dict[str, bool]]:
+    """返回 项目目录 → {"overview": 是否写回, "summary": 是否写回}"""
+    status = {d: {"overview": False, "summary": False} for d in project_dirs}
+    overviews: Dict[str, Overview] = {}
+    requests: Dict[str, Dict[str, Any]] = {}
+    chunked: Dict[str, int] = {}  # 需要 reduce 的项目 → 分块数
+    # 按章节的项目 → (句子文件, 章节, 有字幕的章节数)
+    chaptered: Dict[str, Tuple[Path, Sequence[llm_summary.Chapter], int]] = {}
+    summaries: Dict[str, str] = {}  # 按章节拼好的摘要
+
+    for i, project_dir in enumerate(project_dirs):
+        try:
+            overview, sentence_path = overview_service.prepare(project_dir, force)
+        except Exception as e:
+            log.error(f"准备字幕失败，跳过 {project_dir}: {e}")
+            continue
+
+        request = llm_overview.build_request(overview, sentence_path)
+        if request:
+            overviews[project_dir] = overview
+            requests[f"{i}:overview"] = request
+
+        chapters = caption_utils.load_chapters(project_dir)
+        mode, summary_requests = llm_summary.build_requests(sentence_path, chapters)
+        if mode == "single":
+            if summary_requests:
+                requests[f"{i}:summary"] = summary_requests[0]
+        elif mode == "chapters":
+            chaptered[project_dir] = (sentence_path, chapters, len(summary_requests))
+            for k, request in enumerate(summary_requests):
+                requests[f"{i}:chapter:{k}"] = request
+        else:
+            chunked[project_dir] = len(summary_requests)
+            for k, request in enumerate(summary_requests):
+                requests[f"{i}:chunk:{k}"] = request
+
+    results = llm_batch.run(requests, client, poll_interval, timeout)
+
+    for i, project_dir in enumerate(project_dirs):
+        if project_dir not in chaptered:
+            continue
+        sentence_path, chapters, n = chaptered[project_dir]
+        notes = [results.get(f"{i}:chapter:{k}") for k in range(n)]
+        for k, note in enumerate(notes):
+            if note:
+                llm_batch.remember(requests[f"{i}:chapter:{k}"], note)
+        if all(notes):
+            summaries[project_dir] = llm_summary.build_chapters_summary(sentence_path, chapters, notes)
+        else:
+            log.warning(f"部分章节描述缺失，跳过 {project_dir} 的摘要")
+
+    # 第二阶段：分块要点齐全的项目生成汇总请求
+    reduce_requests: Dict[str, Dict[str, Any]] = {}
+    for i, project_dir in enumerate(project_dirs):
+        if project_dir not in chunked:
+            continue
+        notes = [results.get(f"{i}:chunk:{k}") for k in range(chunked[project_dir])]
+        for k, note in enumerate(notes):
+            if note:
+                llm_batch.remember(requests[f"{i}:chunk:{k}"], note)
+        if all(notes):
+            reduce_requests[f"{i}:summary"] = llm_summary.build_reduce_request(notes)
+        else:
+            log.warning(f"部分分块要点缺失，跳过 {project_dir} 的摘要")
+    if reduce_requests:
+        results.update(llm_batch.run(reduce_requests, client, poll_interval, timeout))
+    requests.update(reduce_requests)
+
+    for i, project_dir in enumerate(project_dirs):
+        content = results.get(f"{i}:overview")
+        if content is not None and project_dir in overviews:
+            try:
+                llm_overview.apply_result(overviews[project_dir], json.loads(content))
+            except json.JSONDecodeError:
+                log.warning(f"overview 结果不是合法 JSON，跳过 {project_dir}")
+            else:
+                overview_service.save_overview(overviews[project_dir], project_dir)
+                llm_batch.remember(requests[f"{i}:overview"], content)
+                status[project_dir]["overview"] = True
+
+        if project_dir in summaries:
+            summary_service.save_summary(project_dir, summaries[project_dir])
+            status[project_dir]["summary"] = True
+            continue
+        content = results.get(f"{i}:summary")
+        if content:
+            summary_service.save_summary(project_dir, content)
+            llm_batch.remember(requests[f"{i}:summary"], content)
+            status[project_dir]["summary"] = True
+
+    return status
@@ -12,7 +12,7 @@ import logging
 import os
 import re
 from typing import Dict, Any
-from yt_dlp import YoutubeDL
+from ytx.core.utils import srt_utils
 
 log = logging.getLogger(__name__)
 
@@ -48,6 +48,7 @@ def download_video(url: str, project_dir: str = ".", force: bool = False):
             'retries': 1,
             'nocheckcertificate': True
         }
+        from yt_dlp import YoutubeDL
         with YoutubeDL(ydl_opts) as ydl:
             ydl.download([url])
         log.info(f"✅ 视频已保存为 {mp4_file}")
@@ -100,6 +101,7 @@ def download_orig_captions(url: str, project_dir: str = ".", force: bool = False
             'retries': 1,
             'nocheckcertificate': True
         }
+        from yt_dlp import YoutubeDL
         with YoutubeDL(ydl_opts) as ydl:
             ydl.download([url])
         
@@ -146,6 +148,7 @@ def download_zh_captions(url: str, project_dir: str = ".", force: bool = False):
             'retries': 1,
             'nocheckcertificate': True
         }
+        from yt_dlp import YoutubeDL
         with YoutubeDL(ydl_opts) as ydl:
             ydl.download([url])
         
@@ -188,29 +191,17 @@ def merge_captions(url: str, project_dir: str = ".", force: bool = False):
         return None
     
     try:
-        import pysrt
-        
-        # 读取字幕文件
-        orig_subs = pysrt.open(orig_srt)
-        zh_subs = pysrt.open(zh_srt)
-        
-        # 创建合并字幕列表
-        merged_subs = []
-        
-        # 以原始字幕为基准进行合并
-        for i, orig_sub in enumerate(orig_subs):
-            merged_sub = pysrt.SubRipItem(
-                index=i + 1,
-                start=orig_sub.start,
-                end=orig_sub.end,
-                text=f"{orig_sub.text}\n{zh_subs[i].text if i < len(zh_subs) else ''}"
-            )
-            merged_subs.append(merged_sub)
-        
-        # 保存合并字幕
-        merged_file = pysrt.SubRipFile(items=merged_subs)
-        merged_file.save(merged_srt, encoding='utf-8')
-        
+        # 以原始字幕为基准，按时间重叠把中文字幕归入对应的原始字幕，边读边写
+        aligned = srt_utils.align_cues(srt_utils.iter_srt(orig_srt), srt_utils.iter_srt(zh_srt))
+        with open(merged_srt, 'w', encoding='utf-8') as f:
+            for i, (start, end, text, zh_texts) in enumerate(aligned, 1):
+                lines = "\n".join(t for t in (text, *zh_texts) if t)
+                f.write(
+                    f"{i}\n"
+                    f"{srt_utils.format_srt_time(start)} --> {srt_utils.format_srt_time(end)}\n"
+                    f"{lines}\n\n"
+                )
+
         log.info(f"✅ 合并字幕已保存为 {merged_srt}")
         return merged_srt
         
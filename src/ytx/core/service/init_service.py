@@ -19,7 +19,6 @@ import shutil
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional
-from yt_dlp import YoutubeDL
 from rich.console import Console
 import logging
 
@@ -115,6 +114,7 @@ def extract_metadata(url: str) -> Optional[Dict[str, Any]]:
         'nocheckcertificate': True
     }
     try:
+        from yt_dlp import YoutubeDL
         with YoutubeDL(ydl_opts) as ydl:
             return ydl.extract_info(url, download=False)
     except Exception as e:
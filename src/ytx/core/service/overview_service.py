@@ -5,7 +5,8 @@
 - 加载指定项目目录下的 project.json；
 - 下载字幕文件；
 - 提取基础元数据与分析结果字段；
-- 基于字幕文件计算语速（WPM）；
+- 基于字幕时间轴在本地计算语速（WPM）、语音覆盖率和按分钟的语速曲线；
+- 基于句子文件在本地评估语言难度（CEFR、句法、风格、词汇）；
 - 截断摘要内容至前 10%；
 - 返回封装后的 Context 实例，供 CLI 层或其他系统渲染。
 
@@ -17,10 +18,11 @@
 import json
 import logging
 import os
-from typing import Optional, Dict, Any
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
 from rich.console import Console
 from ytx.core.model.overview_model import Overview
-from ytx.core.utils import srt_utils
+from ytx.core.utils import caption_utils, lexical, speech_rate, srt_utils
 from ytx.core.llm import overview as llm_overview
 
 console = Console()
@@ -32,26 +34,33 @@ def run(project_dir: str, force: bool = False):
         if overview is not None:
             return overview
 
-    overview = Overview()
-
-    update_overview_meta(project_dir, overview)
-    captions_path = srt_utils.download_en_captions(project_dir, force)
-    sentence_path = srt_utils.generate_sentence_md_from_srt(captions_path)
+    overview, sentence_path = prepare(project_dir, force)
     llm_overview.update(overview, sentence_path)
-    save_overview(overview)
+    save_overview(overview, project_dir)
 
     return overview
 
+def prepare(project_dir: str, force: bool = False) -> Tuple[Overview, Path]:
+    """填充元数据和本地计算的语速、难度，返回 (overview, 句子文件路径)；摘要留给调用方生成"""
+    overview = Overview()
+    meta_data = update_overview_meta(project_dir, overview)
+    captions_path = srt_utils.download_en_captions(project_dir, force)
+    update_speech_rate(overview, captions_path, meta_data.get("duration"))
+    sentence_path = srt_utils.generate_sentence_md_from_srt(captions_path, force)
+    update_lexical_difficulty(overview, sentence_path)
+    return overview, sentence_path
+
 def try_load_overview() -> Optional[Overview]:
     return None
 
-def update_overview_meta(project_dir: str, overview: Overview):
+def update_overview_meta(project_dir: str, overview: Overview) -> Dict[str, Any]:
+    """用 project.json 和视频元数据填充 overview，返回元数据（读取失败时为空 dict）"""
     try:
         # 读取 project.json
         project_path = os.path.join(project_dir, "project.json")
         if not os.path.exists(project_path):
             log.warning(f"项目文件不存在: {project_path}")
-            return
+            return {}
             
         with open(project_path, 'r', encoding='utf-8') as f:
             project_data = json.load(f)
@@ -60,12 +69,12 @@ def update_overview_meta(project_dir: str, overview: Overview):
         meta_filename = project_data.get("assets", {}).get("metadata")
         if not meta_filename:
             log.warning("未找到元数据文件名")
-            return
+            return {}
             
         meta_path = os.path.join(project_dir, meta_filename)
         if not os.path.exists(meta_path):
             log.warning(f"元数据文件不存在: {meta_path}")
-            return
+            return {}
             
         with open(meta_path, 'r', encoding='utf-8') as f:
             meta_data = json.load(f)
@@ -135,16 +144,42 @@ def update_overview_meta(project_dir: str, overview: Overview):
         overview.difficulty = difficulty
         
         log.info(f"成功更新视频元数据: {overview.title}")
-        
+        return meta_data
+
     except Exception as e:
         log.error(f"更新元数据时出错: {e}")
         console.print(f"[red]错误：无法更新视频元数据 - {e}[/red]")
+        return {}
+
+
+def update_speech_rate(overview: Overview, captions_path: Path, duration: Optional[float] = None):
+    """由字幕时间轴计算 wpm、voice_coverage 和语速曲线；duration 为元数据中的视频时长（秒）"""
+    try:
+        track = srt_utils.load_track(captions_path)
+        stats = speech_rate.compute(track, round(duration * 1000) if duration else None)
+    except Exception as e:
+        log.error(f"计算语速时出错: {e}")
+        return
+    overview.difficulty["wpm"] = stats["wpm"]
+    overview.difficulty["voice_coverage"] = stats["voice_coverage"]
+    overview.speech_rate = stats["speech_rate"]
+
+
+def update_lexical_difficulty(overview: Overview, sentence_path: Path):
+    """由句子文件评估 cefr、syntax、style、vocab"""
+    try:
+        with caption_utils.load_sentences(sentence_path) as track:
+            result = lexical.analyze(track.texts())
+    except Exception as e:
+        log.error(f"评估语言难度时出错: {e}")
+        return
+    overview.difficulty.update(result)
 
 
-def save_overview(overview: Overview):
+def save_overview(overview: Overview, project_dir: str = "."):
     try:
         overview_data = overview.to_dict()
-        overview_path = "overview.json"
+        overview_path = os.path.join(project_dir, "overview.json")
         
         with open(overview_path, 'w', encoding='utf-8') as f:
             json.dump(overview_data, f, ensure_ascii=False, indent=2)
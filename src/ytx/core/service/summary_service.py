@@ -1,8 +1,52 @@
+import logging
+from pathlib import Path
+from typing import Generator, Iterator, List
+
 import ytx.core.utils.srt_utils as srt_utils
+from ytx.core.utils import caption_utils
 from ytx.core.llm import summary as llm_summary
+from ytx.core.llm.summary_store import STORE_FILE, SummaryStore
+
+log = logging.getLogger(__name__)
+
+SUMMARY_FILE = "summary.txt"
 
 def run(project_dir: str, force: bool=False):
-    captions_path = srt_utils.download_en_captions(project_dir, force=False)
-    sentence_path = srt_utils.generate_sentence_md_from_srt(captions_path)
-    result = llm_summary.run(sentence_path)
+    captions_path = srt_utils.download_en_captions(project_dir, force)
+    sentence_path = srt_utils.generate_sentence_md_from_srt(captions_path, force)
+    chapters = caption_utils.load_chapters(project_dir)
+    result = llm_summary.run(sentence_path, store=open_store(project_dir, force), chapters=chapters)
+    save_summary(project_dir, result)
     return result
+
+def stream(project_dir: str, force: bool = False) -> Iterator[str]:
+    """与 run 相同，但边生成边 yield，完整生成后保存全文；中途出错时不保存，保留原有的 summary.txt"""
+    captions_path = srt_utils.download_en_captions(project_dir, force)
+    sentence_path = srt_utils.generate_sentence_md_from_srt(captions_path, force)
+    parts: List[str] = []
+    chapters = caption_utils.load_chapters(project_dir)
+    texts = llm_summary.run_stream(sentence_path, store=open_store(project_dir, force), chapters=chapters)
+    if (yield from _record(texts, parts)):
+        save_summary(project_dir, "".join(parts))
+
+def _record(texts: Generator[str, None, bool], parts: List[str]) -> Generator[str, None, bool]:
+    """转发 texts 的输出并记录到 parts，返回 texts 的返回值"""
+    while True:
+        try:
+            text = next(texts)
+        except StopIteration as stop:
+            return bool(stop.value)
+        parts.append(text)
+        yield text
+
+def open_store(project_dir: str, force: bool = False) -> SummaryStore:
+    """项目目录下按块保存的摘要结果；force 时不复用已有结果"""
+    return SummaryStore(Path(project_dir) / STORE_FILE, reuse=not force)
+
+def save_summary(project_dir: str, result: str):
+    # 出错或没有字幕时不保存
+    if result.startswith(("Error occurred:", "No valid content found.")):
+        return
+    summary_path = Path(project_dir) / SUMMARY_FILE
+    summary_path.write_text(result.strip() + "\n", encoding="utf-8")
+    log.info(f"成功保存摘要到: {summary_path}")
@@ -0,0 +1,180 @@
+"""
+srt_utils / json3_utils 共用的字幕工具。
+
+核心职责：
+- 根据 project.json / meta.json 下载英文自动字幕（srt 或 json3），读取上传者定义的章节；
+- 根据源字幕摘要判断句子文件是否需要重新生成；
+- 加载句子文件（优先 .sentences.bin，其次 .sentences.md），供预览页面和 LLM 使用。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Literal, TextIO, Tuple, Union
+
+from ytx.core.model.caption_track import CaptionTrack
+from ytx.core.utils.track_file import TrackFile, read_stamp
+
+log = logging.getLogger(__name__)
+
+# [1] 00:00:05 → text                            （srt）
+# [1] 0:00:01.950000 → 0:00:02.200000 text       （json3）
+_SENTENCE_LINE = re.compile(
+    r"\[(\d+)\] (\d{1,2}:\d{2}:\d{2}(?:\.\d{1,6})?|None) → "
+    r"(?:(\d{1,2}:\d{2}:\d{2}(?:\.\d{1,6})?) )?(.*)"
+)
+
+
+def load_metadata(project_dir: str) -> Dict[str, Any]:
+    """project.json → assets.metadata 指向的 yt-dlp 元数据"""
+    project_path = Path(project_dir) / "project.json"
+    if not project_path.exists():
+        raise FileNotFoundError(f"项目配置文件不存在: {project_path}")
+    with project_path.open("r", encoding="utf-8") as f:
+        project_data = json.load(f)
+    meta_filename = project_data.get("assets", {}).get("metadata")
+    if not meta_filename:
+        raise FileNotFoundError(f"project.json 中未找到 assets.metadata 字段: {project_path}")
+    meta_path = Path(project_dir) / meta_filename
+    if not meta_path.exists():
+        raise FileNotFoundError(f"Metadata not found: {meta_path}")
+
+    with meta_path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_chapters(project_dir: str) -> List[Tuple[int, int, str]]:
+    """上传者定义的章节 [(start_ms, end_ms, title)]，按时间排序；没有章节或读取失败时为空"""
+    try:
+        metadata = load_metadata(project_dir)
+    except (OSError, ValueError) as e:
+        log.debug(f"读取章节失败: {e}")
+        return []
+    chapters = []
+    for chapter in metadata.get("chapters") or []:
+        start = chapter.get("start_time")
+        end = chapter.get("end_time")
+        if start is None or end is None or end <= start:
+            continue
+        chapters.append((round(start * 1000), round(end * 1000), (chapter.get("title") or "").strip()))
+    return sorted(chapters)
+
+
+def download_en_captions(project_dir: str, fmt: Literal["srt", "json3"], force: bool = False) -> Path:
+    metadata = load_metadata(project_dir)
+
+    video_id = metadata.get("id") or Path(project_dir).name
+    url = metadata.get("webpage_url")
+    if not url:
+        raise ValueError("Missing 'webpage_url' in metadata.")
+
+    # 专门下载英语字幕，例如 74i7daegNZE.en.srt / 74i7daegNZE.en.json3
+    lang_code = "en"
+    final_path = Path(project_dir) / f"{video_id}.{lang_code}.{fmt}"
+
+    if final_path.exists() and not force:
+        log.info(f"🟡 Captions already cached: {final_path}")
+        return final_path
+
+    log.info(f"📥 Downloading auto captions for video={video_id}, lang={lang_code}, format={fmt}")
+    ydl_opts = {
+        "skip_download": True,
+        "writesubtitles": True,
+        "writeautomaticsub": True,
+        "subtitleslangs": [lang_code],
+        "subtitlesformat": fmt,
+        "outtmpl": str(Path(project_dir) / f"{video_id}"),
+        "quiet": True,
+        "socket_timeout": 10,
+        "retries": 1,
+        "nocheckcertificate": True
+    }
+
+    from yt_dlp import YoutubeDL
+    with YoutubeDL(ydl_opts) as ydl:
+        ydl.download([url])
+
+    if not final_path.exists():
+        raise FileNotFoundError(f"Expected subtitle file not found: {final_path}")
+
+    log.info(f"✅ Captions saved as: {final_path}")
+    return final_path
+
+
+def parse_clock(t: str) -> int:
+    """h:mm:ss[.ffffff] → ms，"None" → -1"""
+    if t == "None":
+        return -1
+    main, _, frac = t.partition(".")
+    h, m, s = main.split(":")
+    ms = int(frac.ljust(6, "0")[:3]) if frac else 0
+    return ((int(h) * 60 + int(m)) * 60 + int(s)) * 1000 + ms
+
+
+def format_clock(ms: int) -> str:
+    """ms → HH:MM:SS.ffffff"""
+    return f"{ms // 3_600_000:02}:{ms // 60_000 % 60:02}:{ms // 1000 % 60:02}.{ms % 1000 * 1000:06}"
+
+
+def sentence_bin_path(md_path: Path) -> Path:
+    """x.en.sentences.md → x.en.sentences.bin"""
+    return md_path.with_suffix(".bin")
+
+
+@contextmanager
+def open_atomic(path: Path) -> Iterator[TextIO]:
+    """
+    写入同目录下的临时文件，正常结束时 os.replace 为 path，出错时删除临时文件、保留原文件。
+    与 TrackWriter 嵌套使用时放在最内层：.md 先替换、.bin 随后提交，.bin 不早于 .md（见 load_sentences）。
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        with tmp_path.open("w", encoding="utf-8") as f:
+            yield f
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def file_digest(path: Path) -> bytes:
+    """文件内容的 sha256 摘要"""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").digest()
+
+
+def is_up_to_date(md_path: Path, source_hash: bytes, source_version: int) -> bool:
+    """句子文件及其 .bin 均存在，且 .bin 记录的源文件摘要与生成器版本都一致"""
+    if not md_path.exists():
+        return False
+    return read_stamp(sentence_bin_path(md_path)) == (source_hash, source_version)
+
+
+def load_sentences(md_path: Path) -> Union[TrackFile, CaptionTrack]:
+    """
+    加载句子轨：优先 mmap 打开同名的 .sentences.bin（不早于 .md），否则解析 markdown。
+    只能解析 markdown 时，srt 格式的句子精确到秒且没有结束时间（ends 为 -1）。
+    两种结果都是上下文管理器，用 with 使用，结束时释放 mmap 和文件句柄。
+    """
+    bin_path = sentence_bin_path(md_path)
+    try:
+        if bin_path.stat().st_mtime_ns >= md_path.stat().st_mtime_ns:
+            return TrackFile(bin_path)
+    except (OSError, ValueError) as e:
+        log.debug(f"句子缓存不可用，改为解析 markdown: {e}")
+    return parse_sentences_md(md_path)
+
+
+def parse_sentences_md(md_path: Path) -> CaptionTrack:
+    def units():
+        with md_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                m = _SENTENCE_LINE.match(line.strip())
+                if m:
+                    end = m.group(3)
+                    yield m.group(4).strip(), parse_clock(m.group(2)), parse_clock(end) if end else -1
+
+    return CaptionTrack.from_units(units())
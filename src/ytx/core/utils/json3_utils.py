@@ -3,146 +3,283 @@ import re
 import logging
 import json
 import html
-from yt_dlp import YoutubeDL
-from datetime import timedelta
+from itertools import chain, islice
+from typing import Any, Iterable, Iterator, List, Optional, TextIO, Tuple
+from ytx.core.model.caption_track import CaptionTrack
+from ytx.core.utils import caption_utils
+from ytx.core.utils.track_file import TrackWriter, read_stamp
 
 log = logging.getLogger(__name__)
 
 def download_en_captions(project_dir: str, force: bool = False) -> Path:
-    project_path = Path(project_dir) / "project.json"
-    if project_path.exists():
-        with project_path.open("r", encoding="utf-8") as f:
-            project_data = json.load(f)
-        meta_filename = project_data.get("assets", {}).get("metadata")
-        if not meta_filename:
-            raise FileNotFoundError(f"project.json 中未找到 assets.metadata 字段: {project_path}")
-        meta_path = Path(project_dir) / meta_filename
-    if not meta_path.exists():
-        raise FileNotFoundError(f"Metadata not found: {meta_path}")
-
-    with meta_path.open("r", encoding="utf-8") as f:
-        metadata = json.load(f)
-
-    video_id = metadata.get("id") or Path(project_dir).name
-    url = metadata.get("webpage_url")
-    if not url:
-        raise ValueError("Missing 'webpage_url' in metadata.")
-
-    lang_code = "en"
-    final_json3 = Path(project_dir) / f"{video_id}.{lang_code}.json3"
-
-    if final_json3.exists() and not force:
-        log.info(f"🟡 Captions already cached: {final_json3}")
-        return final_json3
-
-    log.info(f"📥 Downloading auto captions for video={video_id}, lang={lang_code}, format=json3")
-    ydl_opts = {
-        "skip_download": True,
-        "writesubtitles": True,
-        "writeautomaticsub": True,
-        "subtitleslangs": [lang_code],
-        "subtitlesformat": "json3",
-        "outtmpl": str(Path(project_dir) / f"{video_id}"),
-        "quiet": True,
-        "socket_timeout": 10,
-        "retries": 1,
-        "nocheckcertificate": True
-    }
-
-    with YoutubeDL(ydl_opts) as ydl:
-        ydl.download([url])
-
-    raw_json3 = Path(project_dir) / f"{video_id}.{lang_code}.json3"
-    if not raw_json3.exists():
-        raise FileNotFoundError(f"Expected subtitle file not found: {raw_json3}")
-
-    raw_json3.rename(final_json3)
-    log.info(f"✅ Captions saved as: {final_json3}")
-    return final_json3
+    return caption_utils.download_en_captions(project_dir, "json3", force)
 
 def format_time(ms: int) -> str:
     """格式化时间为 hh:mm:ss.ffffff"""
-    td = timedelta(milliseconds=ms)
-    total_seconds = int(td.total_seconds())
-    micros = int((td.total_seconds() - total_seconds) * 1_000_000)
+    total_seconds, millis = divmod(ms, 1000)
     h = total_seconds // 3600
     m = (total_seconds % 3600) // 60
     s = total_seconds % 60
-    return f"{h}:{m:02}:{s:02}.{micros:06}"
+    return f"{h}:{m:02}:{s:02}.{millis * 1000:06}"
 
-def generate_sentence_md_from_json3(captions_path: Path) -> Path:
-    """基于 json3 中 segs 的 tOffsetMs 精确提取句子及时间范围，输出为 markdown"""
+# 分句逻辑变化时递增，使已生成的句子文件失效
+SEGMENTER_VERSION = 4
+# 句末标点后的空白即为断句点
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+')
+SENTENCE_END = re.compile(r'[.!?](?:\s|$)')
+# 自动字幕常常没有标点：上一个 token 结束到下一个 token 开始的静音达到 PAUSE_MS 即断句，单句最多 MAX_TOKENS 个 token
+PAUSE_MS = 1500
+MAX_TOKENS = 40
+# 根据前 PROBE_TOKENS 个 token 判断字幕是否带标点，带标点时不启用上面两条规则
+PROBE_TOKENS = 200
+# 句首提前 / 句尾延后的时间（ms）
+LEAD_MS = 50
+TAIL_MS = 200
+# 单词时间索引中单个单词的最长持续时间（ms）
+WORD_MAX_MS = 1000
+
+
+class _JsonStream:
+    """在固定大小的缓冲区上逐个解码 JSON 值，已消费的部分随时丢弃"""
+
+    _WS = re.compile(r"\s*")
+
+    def __init__(self, f: TextIO, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size: int) -> bool:
+        chunk = self.f.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _skip_ws(self):
+        while True:
+            self.pos = self._WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self._fill(self.chunk_size):
+                return
+
+    def next_char(self) -> str:
+        self._skip_ws()
+        if self.pos >= len(self.buf):
+            raise ValueError("Unexpected end of json3 stream")
+        c = self.buf[self.pos]
+        self.pos += 1
+        return c
+
+    def peek(self) -> str:
+        self._skip_ws()
+        return self.buf[self.pos] if self.pos < len(self.buf) else ""
+
+    def expect(self, ch: str):
+        c = self.next_char()
+        if c != ch:
+            raise ValueError(f"Malformed json3: expected {ch!r}, got {c!r}")
+
+    def value(self) -> Any:
+        self._skip_ws()
+        size = self.chunk_size
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+                # 值恰好结束于缓冲区末尾时可能被截断（如数字），补充数据后重试
+                if end < len(self.buf) or self.eof or not self._fill(size):
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof or not self._fill(size):
+                    raise
+                size *= 2
+
+
+def iter_json3_events(captions_path: Path, chunk_size: int = 1 << 16) -> Iterator[dict]:
+    """流式读取 json3 顶层的 events 数组，逐个 yield event，内存占用与文件大小无关"""
     with captions_path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
+        stream = _JsonStream(f, chunk_size)
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            key = stream.value()
+            stream.expect(":")
+            if key == "events":
+                stream.expect("[")
+                if stream.peek() == "]":
+                    stream.next_char()
+                else:
+                    while True:
+                        yield stream.value()
+                        if stream.next_char() == "]":
+                            break
+            else:
+                stream.value()  # 跳过 pens / wsWinStyles 等
+            if stream.next_char() == "}":
+                return
+
 
-    events = data.get("events", [])
-    tokens = []  # (text, abs_time)
+_TAG = re.compile(r"\[.*?\]")
 
+
+def iter_tokens(events: Iterable[dict]) -> Iterator[Tuple[str, int, int]]:
+    """
+    从 json3 的 events/segs 中提取 (text, start_ms, end_ms)，start = tStartMs + tOffsetMs。
+    end 取同一 event 中下一个 seg 的开始，最后一个 seg 取 event 结束（tStartMs + dDurationMs，没有时长时为 start），
+    都不超过每词 WORD_MAX_MS：seg 之间可能有停顿，自动字幕的 event 也会滚动显示到下一行之后。
+    """
     for event in events:
         if "segs" not in event or "tStartMs" not in event:
             continue
         base_time = int(event["tStartMs"])
+        event_end = base_time + int(event.get("dDurationMs", 0))
+        segs = []
         for seg in event["segs"]:
             text = html.unescape(seg.get("utf8", "")).strip()
-            if not text or re.fullmatch(r"\[.*?\]", text):  # 去掉 [Music] 等
+            if not text or _TAG.fullmatch(text):  # 去掉 [Music] 等
                 continue
-            offset = int(seg.get("tOffsetMs", 0))
-            abs_time = base_time + offset
-            tokens.append((text, abs_time))
-
-    # 构建 full_text 和时间映射
-    full_text = ""
-    time_map = []  # (char_start_index, token_text, time_ms)
-    for text, time_ms in tokens:
-        if full_text:
-            full_text += " "
-        start_idx = len(full_text)
-        full_text += text
-        time_map.append((start_idx, text, time_ms))
-
-    # 分句
-    sentence_pattern = r'(?<=[.!?])\s+'
-    raw_sentences = re.split(sentence_pattern, full_text)
-
-    sentences = []
-    for idx, raw in enumerate(raw_sentences):
-        sentence = raw.strip()
-        if not sentence:
-            continue
+            segs.append((text, base_time + int(seg.get("tOffsetMs", 0))))
+        for k, (text, start_ms) in enumerate(segs):
+            end_ms = segs[k + 1][1] if k + 1 < len(segs) else event_end
+            yield text, start_ms, min(max(end_ms, start_ms), start_ms + WORD_MAX_MS * len(text.split()))
 
-        sent_start = full_text.find(sentence)
-        tokens_in_sentence = []
 
-        for i, (char_idx, token_text, time_ms) in enumerate(time_map):
-            if sent_start <= char_idx < sent_start + len(sentence):
-                tokens_in_sentence.append((token_text, time_ms, i))
+def load_track(captions_path: Path) -> CaptionTrack:
+    """json3 → CaptionTrack，每个单词为一个单元，结束时间见 iter_tokens"""
+    return CaptionTrack.from_units(
+        (text, start_ms, end_ms) for text, start_ms, end_ms in iter_tokens(iter_json3_events(captions_path))
+    )
 
-        if not tokens_in_sentence:
-            continue
 
-        first_token_time = tokens_in_sentence[0][1]
-        last_token_time = tokens_in_sentence[-1][1]
-        last_token_index = tokens_in_sentence[-1][2]
-
-        # 尾音最多延迟 400ms，不超过下一个 token 的时间
-        if last_token_index + 1 < len(time_map):
-            next_token_time = time_map[last_token_index + 1][2]
-            end_time_ms = min(last_token_time + 400, next_token_time)
-        else:
-            end_time_ms = last_token_time + 400
-        
-        # 我的调整
-        first_token_time = first_token_time - 50
-        end_time_ms = last_token_time + 200
-
-        t_start = format_time(first_token_time)
-        t_end = format_time(end_time_ms)
-        sentences.append((idx + 1, t_start, t_end, sentence))
-
-    # 写入 markdown
+def probe_punctuation(
+    tokens: Iterable[Tuple[Any, ...]], limit: int = PROBE_TOKENS
+) -> Tuple[bool, Iterator[Tuple[Any, ...]]]:
+    """
+    查看前 limit 个 token 中是否有句末标点，返回 (是否带标点, 与原序列相同的 token 迭代器)。
+    只缓存被查看的 token，不影响流式处理。
+    """
+    tokens = iter(tokens)
+    head = list(islice(tokens, limit))
+    punctuated = any(SENTENCE_END.search(token[0]) for token in head)
+    return punctuated, chain(head, tokens)
+
+
+def segment_tokens(
+    tokens: Iterable[Tuple[Any, ...]],
+    pause_ms: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+) -> Iterator[Tuple[int, int, str, int, int]]:
+    """
+    单遍游标分句：按顺序消费 token，一次扫描同时得到句子文本、token 区间和起止时间。
+
+    token 为 (text, start_ms, end_ms)，也可以只有 (text, start_ms)，此时结束时间按起始时间计。
+    token 之间以空格连接，句子边界为句末标点后的空白（可能落在两个 token 之间，
+    也可能落在一个 token 内部）。token 归属于其起点所在的句子；token 内部断句后
+    没有 token 起点的完整句子归属于该 token，句末未完的尾段并入下一个句子，文本不会丢失。
+
+    对没有标点的自动字幕，另外在两个 token 之间断句（当前句子已有 token 起点时才生效）：
+    - 上一个 token 结束到当前 token 开始的静音 >= pause_ms（停顿）；
+    - 当前句子已有 max_tokens 个 token（长度上限）。
+    默认 None 关闭对应规则；带标点的字幕不应启用，以免在句中停顿处截断（见 probe_punctuation）。
+
+    yield (start_ms, end_ms, text, first_token_index, last_token_index)
+    """
+    parts: List[str] = []      # 当前句子的文本片段
+    first = last = -1          # 当前句子的首/末 token 下标
+    first_ms = last_ms = 0
+    count = 0                  # 当前句子的 token 数
+    prev = -1                  # 上一个 token 的下标
+    prev_ms = prev_end = 0     # 上一个 token 的起止时间
+
+    def flush():
+        if first >= 0:
+            return (max(first_ms - LEAD_MS, 0), last_ms + TAIL_MS, " ".join(parts), first, last)
+        if parts and parts[0]:
+            # token 内部断出的完整句子，时间和下标取其所在的 token
+            return (max(prev_ms - LEAD_MS, 0), prev_ms + TAIL_MS, " ".join(parts), prev, prev)
+        return None
+
+    for i, (text, time_ms, *end) in enumerate(tokens):
+        # 上一个 token 以句末标点结尾：token 间的空格就是断句点；停顿过长或句子过长同样断句
+        if parts and (
+            parts[-1][-1] in ".!?"
+            or first >= 0 and pause_ms is not None and time_ms - prev_end >= pause_ms
+            or first >= 0 and max_tokens is not None and count >= max_tokens
+        ):
+            sentence = flush()
+            if sentence:
+                yield sentence
+            parts, first, count = [], -1, 0
+
+        pieces = SENTENCE_BREAK.split(text)
+        parts.append(pieces[0])
+        if first < 0:
+            first, first_ms = i, time_ms
+        last, last_ms = i, time_ms
+        count += 1
+        prev, prev_ms = i, time_ms
+        prev_end = max(end[0], time_ms) if end else time_ms
+
+        # token 内部断句：后续片段各自开启新句子，当前 token 只归属第一句
+        for piece in pieces[1:]:
+            sentence = flush()
+            if sentence:
+                yield sentence
+            parts, first, count = [piece], -1, 0
+
+    sentence = flush()
+    if sentence:
+        yield sentence
+
+
+def _record_words(
+    tokens: Iterable[Tuple[str, int, int]], writer: TrackWriter
+) -> Iterator[Tuple[str, int, int]]:
+    """原样转发 token，同时写入单词时间索引，起止时间与分句使用的相同（见 iter_tokens）"""
+    for token in tokens:
+        writer.append(*token)
+        yield token
+
+
+def generate_sentence_md_from_json3(captions_path: Path, force: bool = False) -> Path:
+    """基于 json3 中 segs 的 tOffsetMs 精确提取句子及时间范围，输出为 markdown"""
     out_path = captions_path.with_name(captions_path.stem + ".precise.sentences.md")
-    with out_path.open("w", encoding="utf-8") as f:
-        for idx, t_start, t_end, text in sentences:
-            f.write(f"[{idx}] {t_start} → {t_end} {text}\n")
+    words_path = word_index_path(captions_path)
+    digest = caption_utils.file_digest(captions_path)
+    if (
+        not force
+        and caption_utils.is_up_to_date(out_path, digest, SEGMENTER_VERSION)
+        and read_stamp(words_path) == (digest, SEGMENTER_VERSION)
+    ):
+        log.info(f"🟡 Sentences up to date: {out_path}")
+        return out_path
+
+    # markdown 供人阅读，同名 .sentences.bin 供程序 mmap 读取，.words.bin 为单词时间索引
+    columns = ["start", "end", "first", "last"]
+    with TrackWriter(words_path, ["start", "end"], digest, SEGMENTER_VERSION) as words_writer, \
+            TrackWriter(caption_utils.sentence_bin_path(out_path), columns, digest, SEGMENTER_VERSION) as writer, \
+            caption_utils.open_atomic(out_path) as f:
+        # events → tokens → sentences → markdown 全程为生成器，不在内存中保留全文
+        tokens = _record_words(iter_tokens(iter_json3_events(captions_path)), words_writer)
+        punctuated, tokens = probe_punctuation(tokens)
+        sentences = segment_tokens(
+            tokens,
+            pause_ms=None if punctuated else PAUSE_MS,
+            max_tokens=None if punctuated else MAX_TOKENS,
+        )
+        for idx, (start_ms, end_ms, text, first, last) in enumerate(sentences, 1):
+            writer.append(text, start_ms, end_ms, first, last)
+            f.write(f"[{idx}] {format_time(start_ms)} → {format_time(end_ms)} {text}\n")
+
+    return out_path
+
 
-    return out_path
\ No newline at end of file
+def word_index_path(captions_path: Path) -> Path:
+    """x.en.json3 → x.en.words.bin"""
+    return captions_path.with_name(captions_path.stem + ".words.bin")
@@ -0,0 +1,185 @@
+"""
+utils/lexical.py
+
+本地评估字幕的语言难度，结果确定、不消耗 token，填充 Overview.difficulty 的
+cefr / syntax / style / vocab 字段：
+
+- cefr：词汇按内置分级词表（data/cefr_words.txt）定级，取覆盖 COVERAGE 比例词次的最低级别；
+  超出词表的词占比决定 C1 / C2，句法复杂时再上调一级
+- syntax：平均句长与每句从属连词 / 关系代词数（从句深度的近似）
+- style：缩略形式、口头语所占比例
+- vocab：各级词汇占比和最常见的低频词
+
+先用一个正则切出全部词并按词形计数，之后只对不同的词形查表，
+三小时的字幕（约三万词）也只需几十毫秒。
+
+用法：
+    from ytx.core.utils import lexical
+    difficulty = lexical.analyze(track.texts())
+    # {"cefr": "B1", "syntax": "中等", "style": "自然", "vocab": "基础词汇为主（A1-A2 占 88%）..."}
+"""
+
+import re
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+WORDLIST_PATH = Path(__file__).parent.parent.parent / "data" / "cefr_words.txt"
+
+LEVELS = ("A1", "A2", "B1", "B2")
+OFF_LIST = len(LEVELS)  # 不在词表中的词
+
+# 词次覆盖率达到该比例的最低级别即为词汇级别
+COVERAGE = 0.90
+# 超出词表的词占比不超过该值时为 C1，否则 C2
+C1_OFF_LIST_SHARE = 0.15
+
+# 从属连词和关系代词，近似统计从句数
+SUBORDINATORS = frozenset(
+    "after although because before if once since though unless until when whenever where whereas "
+    "wherever whether which while who whom whose".split()
+)
+FILLERS = frozenset("um uh hmm ah yeah yep nope okay ok gonna wanna gotta".split())
+# 没有标点的自动字幕分句后句子会很长，此时不用句长判断句法
+MAX_SENTENCE_WORDS = 60
+
+_WORD = re.compile(r"[A-Za-z]+(?:['’][A-Za-z]+)*")
+_NEGATION = {"ca": "can", "wo": "will", "sha": "shall"}
+
+
+@lru_cache(maxsize=1)
+def load_word_levels(path: Path = WORDLIST_PATH) -> Dict[str, int]:
+    """词表 → {词: 级别下标}，同一个词取最低级别"""
+    levels: Dict[str, int] = {}
+    level = 0
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("["):
+            level = LEVELS.index(line.strip("[]"))
+            continue
+        for word in line.split():
+            levels.setdefault(word, level)
+    return levels
+
+
+def _candidates(word: str) -> Iterator[str]:
+    """小写词 → 可能的词元：原形、去掉缩略、去掉规则屈折后缀"""
+    word = word.replace("’", "'")
+    if word.endswith("n't"):
+        base = word[:-3]
+        yield _NEGATION.get(base, base)
+        return
+    word = word.split("'", 1)[0]
+    yield word
+    for suffix, repl in (("ies", "y"), ("ied", "y"), ("ier", "y"), ("iest", "y"), ("ily", "y"),
+                         ("es", ""), ("s", ""), ("ed", ""), ("ed", "e"), ("ing", ""), ("ing", "e"),
+                         ("er", ""), ("er", "e"), ("est", ""), ("est", "e"), ("ly", "")):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+            stem = word[:-len(suffix)]
+            yield stem + repl
+            # stopped → stop, running → run
+            if not repl and len(stem) >= 3 and stem[-1] == stem[-2]:
+                yield stem[:-1]
+
+
+def word_level(word: str, levels: Optional[Dict[str, int]] = None) -> int:
+    """小写词的级别下标，不在词表中时为 OFF_LIST"""
+    levels = levels if levels is not None else load_word_levels()
+    for candidate in _candidates(word):
+        if candidate in levels:
+            return levels[candidate]
+    return OFF_LIST
+
+
+def analyze(sentences: Iterable[str]) -> Dict[str, str]:
+    """每个元素为一句，返回 difficulty 的 cefr / syntax / style / vocab；没有英文单词时返回空 dict"""
+    n_sentences = 0
+    counts: Counter = Counter()
+    for sentence in sentences:
+        words = _WORD.findall(sentence)
+        if words:
+            n_sentences += 1
+            counts.update(words)
+    if not counts:
+        return {}
+
+    levels = load_word_levels()
+    lower: Counter = Counter()
+    for word, n in counts.items():
+        lower[word.lower()] += n
+
+    by_level = [0] * (OFF_LIST + 1)
+    off_list: Counter = Counter()
+    for word, n in lower.items():
+        level = word_level(word, levels)
+        if level == OFF_LIST and word not in counts:
+            continue  # 只以大写形式出现且不在词表中，视为专有名词
+        by_level[level] += n
+        if level == OFF_LIST:
+            off_list[word] += n
+
+    total = sum(by_level)
+    n_words = sum(counts.values())
+    mean_length = n_words / n_sentences
+    clause_rate = sum(lower[w] for w in SUBORDINATORS) / n_sentences
+    syntax = _syntax(mean_length, clause_rate, n_words, lower)
+
+    return {
+        "cefr": _cefr(by_level, total, bump=syntax == "复杂"),
+        "syntax": syntax,
+        "style": _style(lower, n_words),
+        "vocab": _vocab(by_level, total, off_list),
+    }
+
+
+def _cefr(by_level: List[int], total: int, bump: bool) -> str:
+    if not total:
+        return "N/A"
+    names = LEVELS + ("C1", "C2")
+    covered = 0
+    for i in range(len(LEVELS)):
+        covered += by_level[i]
+        if covered >= COVERAGE * total:
+            level = i
+            break
+    else:
+        level = len(LEVELS) if by_level[OFF_LIST] <= C1_OFF_LIST_SHARE * total else len(LEVELS) + 1
+    if bump:
+        level = min(level + 1, len(names) - 1)
+    return names[level]
+
+
+def _syntax(mean_length: float, clause_rate: float, n_words: int, lower: Counter) -> str:
+    if mean_length > MAX_SENTENCE_WORDS:
+        # 缺少标点，按每百词的从属连词数判断
+        per_100 = sum(lower[w] for w in SUBORDINATORS) * 100 / n_words
+        return "简单" if per_100 < 4 else "复杂" if per_100 > 8 else "中等"
+    if mean_length > 20 or clause_rate > 2:
+        return "复杂"
+    if mean_length < 10 and clause_rate < 0.8:
+        return "简单"
+    return "中等"
+
+
+def _style(lower: Counter, n_words: int) -> str:
+    informal = sum(n for w, n in lower.items() if "'" in w or "’" in w or w in FILLERS)
+    rate = informal * 100 / n_words
+    return "口语化" if rate >= 6 else "自然" if rate >= 2 else "正式"
+
+
+def _vocab(by_level: List[int], total: int, off_list: Counter) -> str:
+    if not total:
+        return "N/A"
+    basic = round((by_level[0] + by_level[1]) * 100 / total)
+    advanced = round((by_level[3] + by_level[4]) * 100 / total)
+    if basic >= 85:
+        label = f"基础词汇为主（A1-A2 占 {basic}%）"
+    elif advanced >= 10:
+        label = f"进阶词汇较多（B2 及以上占 {advanced}%）"
+    else:
+        label = f"词汇难度适中（A1-A2 占 {basic}%，B2 及以上占 {advanced}%）"
+    rare = [w for w, _ in off_list.most_common(3)]
+    return label + (f"；低频词：{'、'.join(rare)}" if rare else "")
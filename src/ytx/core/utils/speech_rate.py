@@ -0,0 +1,90 @@
+"""
+utils/speech_rate.py
+
+由字幕时间轴在本地计算语速指标，结果确定、不消耗 token：
+
+- wpm：说话时间内的平均语速（词数 / 有字幕覆盖的分钟数）
+- voice_coverage：有字幕覆盖的时长占视频时长的百分比（重叠的字幕段先合并）
+- speech_rate：按分钟分桶的语速曲线，每段字幕的词数按时间均匀摊到所跨的分钟里
+
+输入为任意 (text, start_ms, end_ms) 序列（CaptionTrack、TrackFile 均可），按起始时间有序；
+结束时间未知（-1）时取下一段的起始时间。单次遍历，O(单元数 + 分钟数)。
+
+用法：
+    from ytx.core.utils import speech_rate
+    stats = speech_rate.compute(srt_utils.load_track(srt_path), duration_ms=754_000)
+    stats["wpm"], stats["voice_coverage"], stats["speech_rate"]
+"""
+
+import math
+from array import array
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+BUCKET_MS = 60_000
+
+
+def _intervals(units: Iterable[Tuple[str, int, int]]) -> Iterator[Tuple[int, int, int]]:
+    """(text, start, end) → (start, end, 词数)，补全未知的结束时间，跳过没有时间的单元"""
+    pending = None
+    for text, start_ms, end_ms in units:
+        if start_ms < 0:
+            continue
+        if pending is not None:
+            p_start, p_end, p_words = pending
+            yield p_start, p_end if p_end >= 0 else max(start_ms, p_start), p_words
+        pending = (start_ms, end_ms, len(text.split()))
+    if pending is not None:
+        p_start, p_end, p_words = pending
+        yield p_start, max(p_end, p_start), p_words
+
+
+def compute(
+    units: Iterable[Tuple[str, int, int]],
+    duration_ms: Optional[int] = None,
+    bucket_ms: int = BUCKET_MS,
+) -> Dict[str, Any]:
+    """duration_ms 缺省时以最后一段字幕的结束时间作为视频时长"""
+    words = array("d")  # 每个分桶的词数
+    total_words = 0
+    speech_ms = 0
+    span_start = span_end = -1  # 当前合并中的说话区间
+    last_end = 0
+
+    for start_ms, end_ms, n in _intervals(units):
+        total_words += n
+        last_end = max(last_end, end_ms)
+
+        # 合并重叠区间，累计说话时长
+        if start_ms > span_end:
+            speech_ms += span_end - span_start
+            span_start, span_end = start_ms, end_ms
+        else:
+            span_end = max(span_end, end_ms)
+
+        # 词数按时间比例摊到所跨的分桶
+        last_bucket = max(end_ms - 1, start_ms) // bucket_ms
+        if len(words) <= last_bucket:
+            words.extend([0.0] * (last_bucket + 1 - len(words)))
+        if end_ms <= start_ms:
+            words[start_ms // bucket_ms] += n
+            continue
+        for b in range(start_ms // bucket_ms, last_bucket + 1):
+            overlap = min(end_ms, (b + 1) * bucket_ms) - max(start_ms, b * bucket_ms)
+            words[b] += n * overlap / (end_ms - start_ms)
+    speech_ms += span_end - span_start
+
+    duration_ms = duration_ms or last_end
+    n_buckets = max(math.ceil(duration_ms / bucket_ms), len(words)) if duration_ms else 0
+    words.extend([0.0] * (n_buckets - len(words)))
+
+    curve = []
+    for b, w in enumerate(words):
+        # 最后一个分桶不满一分钟时按实际长度换算
+        length = min(bucket_ms, max(duration_ms, last_end) - b * bucket_ms)
+        curve.append(round(w * 60_000 / length) if length > 0 else 0)
+
+    return {
+        "wpm": round(total_words * 60_000 / speech_ms) if speech_ms > 0 else 0,
+        "voice_coverage": min(100, round(speech_ms * 100 / duration_ms)) if duration_ms else 0,
+        "speech_rate": curve,
+    }
@@ -1,111 +1,241 @@
 from pathlib import Path
-import pysrt 
 import re
 import logging
-import json
-from yt_dlp import YoutubeDL
-from pathlib import Path
+import mmap
+from array import array
+from itertools import accumulate, repeat
+from operator import floordiv, mul, sub
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from ytx.core.model.caption_track import CaptionTrack, SENTENCE_BREAK, SENTENCE_END
+from ytx.core.utils import caption_utils
+from ytx.core.utils.track_file import TrackWriter
 
 log = logging.getLogger(__name__)
 
 def download_en_captions(project_dir: str, force: bool = False) -> Path:
-    project_path = Path(project_dir) / "project.json"
-    if project_path.exists():
-        with project_path.open("r", encoding="utf-8") as f:
-            project_data = json.load(f)
-        meta_filename = project_data.get("assets", {}).get("metadata")
-        if not meta_filename:
-            raise FileNotFoundError(f"project.json 中未找到 assets.metadata 字段: {project_path}")
-        meta_path = Path(project_dir) / meta_filename
-    if not meta_path.exists():
-        raise FileNotFoundError(f"Metadata not found: {meta_path}")
-
-    with meta_path.open("r", encoding="utf-8") as f:
-        metadata = json.load(f)
-
-    video_id = metadata.get("id") or Path(project_dir).name
-    url = metadata.get("webpage_url")
-    if not url:
-        raise ValueError("Missing 'webpage_url' in metadata.")
-
-    # 专门下载英语字幕
-    lang_code = "en"
-    final_srt = Path(project_dir) / f"{video_id}.{lang_code}.srt"  # 例如 74i7daegNZE.en.srt
-
-    # Step 2: 检查缓存
-    if final_srt.exists() and not force:
-        log.info(f"🟡 Captions already cached: {final_srt}")
-        return final_srt
-
-    # Step 3: 下载 SRT 自动字幕
-    log.info(f"📥 Downloading auto captions for video={video_id}, lang={lang_code}")
-    from yt_dlp import YoutubeDL
-    ydl_opts = {
-        "skip_download": True,
-        "writesubtitles": True,
-        "writeautomaticsub": True,
-        "subtitleslangs": [lang_code],
-        "subtitlesformat": "srt",
-        "outtmpl": str(Path(project_dir) / f"{video_id}"),
-        "quiet": True,
-        "socket_timeout": 10,
-        "retries": 1,
-        "nocheckcertificate": True
-    }
-
-    with YoutubeDL(ydl_opts) as ydl:
-        ydl.download([url])
-
-    # Step 4: 重命名为 video-id.en.srt
-    raw_srt = Path(project_dir) / f"{video_id}.{lang_code}.srt"
-    if not raw_srt.exists():
-        raise FileNotFoundError(f"Expected subtitle file not found: {raw_srt}")
-
-    raw_srt.rename(final_srt)
-    log.info(f"✅ Captions saved as: {final_srt}")
-    return final_srt
-
-def generate_sentence_md_from_srt(srt_path: Path) -> Path:
-    # 加载 SRT 文件
-    subs = pysrt.open(srt_path, encoding='utf-8')
-
-    # 合并字幕文本并记录每段的起始时间
-    full_text = ""
-    time_marks = []
-    for sub in subs:
-        clean_text = sub.text.replace('\n', ' ').strip()
-        # 去掉中括号内容，如 [Music], [Applause] 等
-        clean_text = re.sub(r'\[.*?\]', '', clean_text).strip()
-        if clean_text:
-            if full_text:
-                full_text += " "  # 保证中间有空格
-            time_marks.append((len(full_text), sub.start.to_time()))
-            full_text += clean_text
-
-    # 用正则分句：按英文句末标点加空格断句
-    sentence_pattern = r'(?<=[.!?。！？])\s+'
-    raw_sentences = re.split(sentence_pattern, full_text)
-
-    # 匹配每个句子对应的时间
-    sentences = []
-    for idx, sentence in enumerate(raw_sentences):
-        sentence = sentence.strip()
-        if not sentence:
-            continue
-        # 查找该句在全文的位置
-        start_idx = full_text.find(sentence)
-        # 找到最靠前的不超过此位置的时间点
-        time_str = "None"
-        for offset, t in reversed(time_marks):
-            if offset <= start_idx:
-                time_str = t.strftime("%H:%M:%S")
+    return caption_utils.download_en_captions(project_dir, "srt", force)
+
+# 时间行 + 其后连续的非空行（字幕文本），整份文件只用这一个正则扫描
+_CUE = re.compile(
+    rb'^[ \t]*(\d+:\d\d:\d\d[,.]\d{3})[ \t]*-->[ \t]*(\d+:\d\d:\d\d[,.]\d{3})[^\r\n]*(?:\r?\n|\Z)'
+    rb'((?:[ \t]*\S[^\r\n]*)(?:\r?\n[ \t]*\S[^\r\n]*)*)?',
+    re.M,
+)
+
+
+class CueTable:
+    """紧凑的字幕表：起止时间为整数毫秒数组，所有文本存放在同一个字符串中，按偏移切片"""
+
+    __slots__ = ("starts", "ends", "offsets", "text")
+
+    def __init__(self):
+        self.starts = array("q")
+        self.ends = array("q")
+        self.offsets = array("q", [0])  # offsets[i]:offsets[i+1] 为第 i 条字幕文本
+        self.text = ""
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def text_at(self, i: int) -> str:
+        return self.text[self.offsets[i]:self.offsets[i + 1]]
+
+    def __iter__(self) -> Iterator[Tuple[int, int, str]]:
+        for i in range(len(self.starts)):
+            yield self.starts[i], self.ends[i], self.text_at(i)
+
+
+def _timestamp_ms(ts: bytes) -> int:
+    # b"01:02:03,004" → 10203004 → 3723004
+    v = int(ts.translate(None, b":,."))
+    return ((v // 10_000_000 * 60 + v // 100_000 % 100) * 60 + v // 1000 % 100) * 1000 + v % 1000
+
+
+def _timestamps_ms(stamps: Tuple[bytes, ...]) -> array:
+    """
+    整列转换：拼接后一次去掉分隔符、一次 split，int 只调用一次/条，算术用内置 map 在 C 层完成。
+    v = HHMMSSmmm → v - 40000 * (v // 10^5) - 2400000 * (v // 10^7)，小时数超过两位也成立。
+    """
+    v = list(map(int, b" ".join(stamps).translate(None, b":,.").split()))
+    return array("q", map(
+        sub,
+        map(sub, v, map(mul, map(floordiv, v, repeat(100_000)), repeat(40_000))),
+        map(mul, map(floordiv, v, repeat(10_000_000)), repeat(2_400_000)),
+    ))
+
+
+def read_srt(srt_path: Path) -> CueTable:
+    """mmap 整个 SRT 文件，用一个预编译正则批量解析，按列转换，不为每条字幕创建对象"""
+    table = CueTable()
+    with open(srt_path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # 空文件
+            return table
+        with mm:
+            rows = _CUE.findall(mm)
+    if not rows:
+        return table
+
+    starts, ends, bodies = zip(*rows)
+    table.starts = _timestamps_ms(starts)
+    table.ends = _timestamps_ms(ends)
+    # 一次解码所有文本，再按 \x00 切回各条字幕
+    texts = b"\x00".join(bodies).decode("utf-8", errors="replace").replace("\r\n", "\n").split("\x00")
+    table.offsets = array("q", accumulate(map(len, texts), initial=0))
+    table.text = "".join(texts)
+    return table
+
+
+def iter_srt(srt_path: Path) -> Iterator[Tuple[int, int, str]]:
+    """逐条 yield (start_ms, end_ms, text)，mmap 上 finditer 惰性扫描，内存占用与文件大小无关"""
+    with open(srt_path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # 空文件
+            return
+        with mm:
+            for m in _CUE.finditer(mm):
+                start, end, body = m.groups()
+                text = body.decode("utf-8", errors="replace").replace("\r\n", "\n") if body else ""
+                yield _timestamp_ms(start), _timestamp_ms(end), text
+
+
+def _overlap_ms(a_start: int, a_end: int, b_start: int, b_end: int) -> int:
+    return max(0, min(a_end, b_end) - max(a_start, b_start))
+
+
+def align_cues(
+    base: Iterable[Tuple[int, int, str]],
+    other: Iterable[Tuple[int, int, str]],
+) -> Iterator[Tuple[int, int, str, List[str]]]:
+    """
+    按时间对齐两条字幕轨（如原文与译文），两者均需按起始时间有序，双指针单遍 O(n + m)。
+
+    other 的每条字幕归入与其时间重叠最多的 base 字幕；与任何 base 字幕都不重叠时，
+    归入其后的第一条 base 字幕（最后一条之后的归入最后一条）。
+    yield (start_ms, end_ms, base_text, [other_text, ...])，条数与 base 一致。
+    """
+    base = iter(base)
+    cur = next(base, None)
+    if cur is None:
+        return
+    nxt = next(base, None)
+    attached: List[str] = []
+    for start_ms, end_ms, text in other:
+        while nxt is not None:
+            here = _overlap_ms(start_ms, end_ms, cur[0], cur[1])
+            if _overlap_ms(start_ms, end_ms, nxt[0], nxt[1]) <= here and (here or start_ms < cur[1]):
                 break
-        sentences.append((idx + 1, time_str, sentence))
-
-    # 写入 .sentences.md 文件
+            yield cur[0], cur[1], cur[2], attached
+            attached = []
+            cur, nxt = nxt, next(base, None)
+        attached.append(text)
+    yield cur[0], cur[1], cur[2], attached
+    while nxt is not None:
+        yield nxt[0], nxt[1], nxt[2], []
+        nxt = next(base, None)
+
+
+def format_srt_time(ms: int) -> str:
+    """毫秒格式化为 SRT 时间戳 HH:MM:SS,mmm"""
+    return f"{ms // 3_600_000:02}:{ms // 60_000 % 60:02}:{ms // 1000 % 60:02},{ms % 1000:03}"
+
+
+# 分句逻辑变化时递增，使已生成的句子文件失效
+SEGMENTER_VERSION = 3
+# 自动字幕常常没有标点：字幕段之间的静音达到 PAUSE_MS 即断句，单句达到 MAX_WORDS 个词后在下一个字幕段处断句
+PAUSE_MS = 1500
+MAX_WORDS = 40
+
+# 中括号内容，如 [Music], [Applause] 等
+_TAG = re.compile(r'\[.*?\]')
+
+
+# 滚动字幕重叠至少这么多个词才去掉（整条字幕或整行重复时不受此限制）
+MIN_OVERLAP_WORDS = 3
+
+
+def _overlap(prev: List[str], cur: List[str]) -> int:
+    """prev 的后缀与 cur 的前缀最长重合的词数，KMP 前缀函数，O(len(prev) + len(cur))"""
+    seq = cur + [None] + prev
+    pi = [0] * len(seq)
+    for i in range(1, len(seq)):
+        k = pi[i - 1]
+        while k and seq[i] != seq[k]:
+            k = pi[k - 1]
+        if seq[i] == seq[k]:
+            k += 1
+        pi[i] = k
+    return pi[-1] if prev else 0
+
+
+def dedup_rolling_cues(
+    cues: Iterable[Tuple[int, int, str]],
+    stats: Optional[Dict[str, int]] = None,
+) -> Iterator[Tuple[int, int, str]]:
+    """
+    去掉自动字幕的滚动重复：每条字幕会重复上一条的最后一行，例如
+    "line A\nline B" → "line B\nline C"，第二条只保留 "line C"。
+
+    逐条比较相邻字幕，去掉当前字幕开头与上一条（原文）结尾重合的词；
+    重合需达到 MIN_OVERLAP_WORDS 个词，或恰好是当前字幕的整条 / 第一整行。
+    stats 若传入，累加去掉的字符数 "chars" 和词数 "words"。
+    """
+    prev_words: List[str] = []
+    for start_ms, end_ms, text in cues:
+        words = text.split()
+        k = _overlap(prev_words, words)
+        prev_words = words
+        if k and (k >= MIN_OVERLAP_WORDS or k == len(words) or k == len(text.split("\n", 1)[0].split())):
+            kept = " ".join(words[k:])
+            if stats is not None:
+                stats["chars"] = stats.get("chars", 0) + len(text) - len(kept)
+                stats["words"] = stats.get("words", 0) + k
+            text = kept
+        yield start_ms, end_ms, text
+
+
+def load_track(srt_path: Path, dedup: bool = True) -> CaptionTrack:
+    """SRT → CaptionTrack，每条字幕为一个单元，去掉滚动重复、换行和 [Music] 等标记"""
+    cues: Iterable[Tuple[int, int, str]] = read_srt(srt_path)
+    stats: Dict[str, int] = {}
+    if dedup:
+        cues = dedup_rolling_cues(cues, stats)
+    track = CaptionTrack.from_units(
+        (_TAG.sub('', text.replace('\n', ' ')).strip(), start_ms, end_ms)
+        for start_ms, end_ms, text in cues
+    )
+    if stats:
+        log.info(f"滚动字幕去重: 去掉 {stats['chars']} 个字符 / {stats['words']} 个词 ({srt_path.name})")
+    return track
+
+
+def generate_sentence_md_from_srt(srt_path: Path, force: bool = False) -> Path:
     out_path = srt_path.with_name(srt_path.stem + ".sentences.md")
-    with out_path.open("w", encoding="utf-8") as f:
-        for idx, t, s in sentences:
-            f.write(f"[{idx}] {t} → {s}\n")
+    digest = caption_utils.file_digest(srt_path)
+    if not force and caption_utils.is_up_to_date(out_path, digest, SEGMENTER_VERSION):
+        log.info(f"🟡 Sentences up to date: {out_path}")
+        return out_path
+
+    track = load_track(srt_path)
+    # 停顿和长度规则只用于没有标点的字幕，带标点的字幕按标点断句，长句不被截断
+    punctuated = SENTENCE_END.search(track.text) is not None
+    sentences = track.sentences(
+        SENTENCE_BREAK,
+        attach="cue",
+        pause_ms=None if punctuated else PAUSE_MS,
+        max_words=None if punctuated else MAX_WORDS,
+    )
+
+    # 在全文上分句，按位置二分查找所在字幕段，重复的句子也能对应到各自的时间
+    # markdown 供人阅读，同名 .sentences.bin 供程序 mmap 读取
+    bin_path = caption_utils.sentence_bin_path(out_path)
+    with TrackWriter(bin_path, ["start", "end"], digest, SEGMENTER_VERSION) as writer, \
+            caption_utils.open_atomic(out_path) as f:
+        for idx, (start_ms, end_ms, sentence, _, _) in enumerate(sentences, 1):
+            # markdown 只精确到秒，.bin 保留毫秒及结束字幕段的结束时间
+            writer.append(sentence, start_ms, end_ms)
+            f.write(f"[{idx}] {format_srt_time(start_ms)[:8]} → {sentence}\n")
 
     return out_path
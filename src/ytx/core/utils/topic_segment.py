@@ -0,0 +1,173 @@
+"""
+utils/topic_segment.py
+
+本地检测字幕的话题转换点（TextTiling 式词汇衔接分段），不消耗 token：
+
+1. 每句切词、转小写、去掉停用词和过短的词
+2. 在每个句间空隙两侧各取约 WINDOW_WORDS 个词的窗口，按词频向量计算余弦相似度
+3. 相似度曲线做滑动平均后，对每个局部低谷计算深度（两侧峰值与谷值之差的和）
+4. 深度超过 均值 + 标准差 / 2 且不低于 MIN_DEPTH 的低谷为候选边界（比 TextTiling 原文的阈值保守，
+   章节宜粗不宜细），按深度从大到小选取，相邻边界至少间隔 MIN_SEGMENT_MS
+
+窗口按词数滑动、逐个空隙更新词频，整体 O(词数)，三小时的字幕也只需几十毫秒。
+起始时间未知（-1）的句子沿用上一句的时间；全部没有时间时不分段。
+
+用法：
+    from ytx.core.utils import topic_segment
+    topic_segment.boundaries(transcript_units(sentence_path))
+    # [(0, 0), (42, 185_000), (97, 431_000)]  每段的 (起始句下标, 起始时间 ms)
+"""
+
+import re
+from collections import Counter, deque
+from statistics import fmean, pstdev
+from typing import Deque, List, Sequence, Tuple
+
+# 相似度窗口每侧的词数（不含停用词）
+WINDOW_WORDS = 80
+# 相似度曲线的平滑宽度（空隙数，奇数）
+SMOOTHING = 5
+# 低谷深度的绝对下限（余弦相似度之差），避免同一话题内的随机起伏被当成边界
+MIN_DEPTH = 0.25
+# 相邻话题边界的最小间隔
+MIN_SEGMENT_MS = 90_000
+
+STOPWORDS = frozenset(
+    "a about above after again all also am an and any are as at be because been before being below between both "
+    "but by can could did do does doing don down during each even few for from further get gets getting go going "
+    "got had has have having he her here hers herself him himself his how i if in into is it its itself just know "
+    "let like me more most much my myself no nor not now of off on once one only or other our ours ourselves out "
+    "over own really right same say said she should so some something such than that the their theirs them "
+    "themselves then there these they thing things think this those through to too under until up us very want "
+    "was way we well were what when where which while who whom why will with would yeah yes you your yours "
+    "yourself yourselves gonna um uh okay ok oh".split()
+)
+
+_WORD = re.compile(r"[a-z]+(?:'[a-z]+)*")
+
+
+def _terms(text: str) -> List[str]:
+    terms = []
+    for word in _WORD.findall(text.lower().replace("’", "'")):
+        word = word.split("'", 1)[0]
+        if len(word) < 3 or word in STOPWORDS:
+            continue
+        # 简单归并复数形式
+        if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def _cosine(left: Counter, right: Counter) -> float:
+    if len(left) > len(right):
+        left, right = right, left
+    dot = sum(n * right[w] for w, n in left.items() if w in right)
+    if not dot:
+        return 0.0
+    norm = (sum(n * n for n in left.values()) * sum(n * n for n in right.values())) ** 0.5
+    return dot / norm
+
+
+def _remove(counter: Counter, terms: List[str]):
+    for term in terms:
+        counter[term] -= 1
+        if not counter[term]:
+            del counter[term]
+
+
+def _gap_scores(sentences: List[List[str]]) -> List[float]:
+    """scores[i] 为第 i 句之前的空隙两侧窗口的相似度，i 从 1 开始（scores[0] 不使用）"""
+    scores = [0.0] * len(sentences)
+    left: Counter = Counter()
+    right: Counter = Counter()
+    left_q: Deque[List[str]] = deque()
+    left_words = 0
+    right_words = 0
+    right_end = 0  # 右窗口覆盖 [i, right_end)
+
+    for i in range(1, len(sentences)):
+        # 第 i-1 句移入左窗口，左窗口过大时从头部移出
+        prev = sentences[i - 1]
+        left.update(prev)
+        left_q.append(prev)
+        left_words += len(prev)
+        while left_q and left_words - len(left_q[0]) >= WINDOW_WORDS:
+            old = left_q.popleft()
+            _remove(left, old)
+            left_words -= len(old)
+
+        # 第 i-1 句移出右窗口，右窗口不足时向后扩展
+        if right_end >= i:
+            _remove(right, prev)
+            right_words -= len(prev)
+        else:
+            right_end = i
+        while right_end < len(sentences) and right_words < WINDOW_WORDS:
+            right.update(sentences[right_end])
+            right_words += len(sentences[right_end])
+            right_end += 1
+
+        scores[i] = _cosine(left, right)
+    return scores
+
+
+def _smooth(values: List[float], width: int) -> List[float]:
+    half = width // 2
+    smoothed = []
+    for i in range(len(values)):
+        window = values[max(1, i - half): i + half + 1]
+        smoothed.append(fmean(window) if window else 0.0)
+    return smoothed
+
+
+def _depths(scores: List[float]) -> List[Tuple[float, int]]:
+    """局部低谷的 (深度, 空隙下标)"""
+    depths = []
+    for i in range(1, len(scores)):
+        s = scores[i]
+        if i > 1 and scores[i - 1] < s or i + 1 < len(scores) and scores[i + 1] < s:
+            continue
+        left_peak = s
+        j = i - 1
+        while j >= 1 and scores[j] >= left_peak:
+            left_peak = scores[j]
+            j -= 1
+        right_peak = s
+        j = i + 1
+        while j < len(scores) and scores[j] >= right_peak:
+            right_peak = scores[j]
+            j += 1
+        depth = left_peak - s + right_peak - s
+        if depth > 0:
+            depths.append((depth, i))
+    return depths
+
+
+def boundaries(units: Sequence[Tuple[int, str]]) -> List[Tuple[int, int]]:
+    """units 为按时间排序的 [(起始时间 ms, 句子)]，返回每段的 (起始句下标, 起始时间 ms)，第一段从 0 开始"""
+    if not units:
+        return []
+    starts = []
+    last = 0
+    for start_ms, _ in units:
+        last = start_ms if start_ms >= 0 else last
+        starts.append(last)
+    sentences = [_terms(text) for _, text in units]
+
+    depths = _depths(_smooth(_gap_scores(sentences), SMOOTHING))
+    if not depths:
+        return [(0, starts[0])]
+    values = [d for d, _ in depths]
+    cutoff = max(fmean(values) + pstdev(values) / 2, MIN_DEPTH)
+
+    chosen: List[int] = []
+    for depth, i in sorted(depths, key=lambda x: (-x[0], x[1])):
+        if depth <= cutoff:
+            break
+        t = starts[i]
+        if t - starts[0] < MIN_SEGMENT_MS or starts[-1] - t < MIN_SEGMENT_MS:
+            continue
+        if all(abs(t - starts[j]) >= MIN_SEGMENT_MS for j in chosen):
+            chosen.append(i)
+    return [(0, starts[0])] + [(i, starts[i]) for i in sorted(chosen)]
@@ -0,0 +1,223 @@
+"""
+紧凑的二进制字幕轨文件（如 .sentences.bin），与 CaptionTrack 对应，读取时 mmap 零拷贝访问。
+
+文件布局（整数均为本机字节序的 int64，区块按 8 字节对齐）：
+
+    header   64 字节：magic "YTXT" | 字节序 '<'/'>' | 格式版本 | 列数 | 生成器版本 | 单元数 n | 文本长度
+             | 源文件 sha256（用于判断是否需要重新生成）
+    blob     所有单元文本的 UTF-8 字节，依次拼接
+    names    每列 8 字节的列名，如 b"start", b"end"
+    offsets  n + 1 个 int64，第 i 个单元文本为 blob[offsets[i]:offsets[i + 1]]
+    columns  每列 n 个 int64
+
+写入时文本直接流式写入文件，整数列分块暂存到临时文件，内存占用固定；写完后原子替换目标文件。
+"""
+
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+MAGIC = b"YTXT"
+FORMAT_VERSION = 2
+_HEADER = struct.Struct("<4scBHIQQ32s")
+_HEADER_SIZE = 64
+_BYTEORDER = b"<" if sys.byteorder == "little" else b">"
+
+
+def _pad(n: int) -> int:
+    return -n % 8
+
+
+class _ColumnSpool:
+    """int64 列：攒满一块后写入临时文件，内存占用固定"""
+
+    CHUNK = 8192
+
+    def __init__(self):
+        self.buf = array("q")
+        self.file = tempfile.TemporaryFile()
+        self.count = 0
+
+    def append(self, value: int):
+        self.buf.append(value)
+        self.count += 1
+        if len(self.buf) >= self.CHUNK:
+            self.file.write(self.buf.tobytes())
+            del self.buf[:]
+
+    def copy_to(self, f):
+        self.file.write(self.buf.tobytes())
+        self.file.seek(0)
+        shutil.copyfileobj(self.file, f)
+
+    def close(self):
+        self.file.close()
+
+
+class TrackWriter:
+    """
+    逐个追加单元：writer.append(text, start, end, ...)，列值顺序与 columns 一致。
+    source_hash / source_version 记录生成该文件的输入摘要和生成器版本，见 read_stamp()。
+    """
+
+    def __init__(self, path: Path, columns: Sequence[str], source_hash: bytes = b"", source_version: int = 0):
+        if any(len(name.encode()) > 8 for name in columns):
+            raise ValueError("列名最长 8 字节")
+        self.path = Path(path)
+        self.columns = list(columns)
+        self._stamp = (source_version, source_hash)
+        self._tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self._f = None
+        self._values: List[_ColumnSpool] = []
+        self._offsets: Optional[_ColumnSpool] = None
+        self._blob_len = 0
+
+    def __enter__(self) -> "TrackWriter":
+        self._f = self._tmp_path.open("wb")
+        self._f.write(b"\0" * _HEADER_SIZE)
+        self._values = [_ColumnSpool() for _ in self.columns]
+        self._offsets = _ColumnSpool()
+        self._offsets.append(0)
+        return self
+
+    def append(self, text: str, *values: int):
+        data = text.encode("utf-8")
+        self._f.write(data)
+        self._blob_len += len(data)
+        self._offsets.append(self._blob_len)
+        for column, value in zip(self._values, values, strict=True):
+            column.append(value)
+
+    def _write_tail(self):
+        f = self._f
+        f.write(b"\0" * _pad(self._blob_len))
+        for name in self.columns:
+            f.write(name.encode().ljust(8, b"\0"))
+        self._offsets.copy_to(f)
+        for column in self._values:
+            column.copy_to(f)
+        f.seek(0)
+        source_version, source_hash = self._stamp
+        f.write(_HEADER.pack(MAGIC, _BYTEORDER, FORMAT_VERSION, len(self.columns), source_version,
+                             self._offsets.count - 1, self._blob_len, source_hash))
+
+    def __exit__(self, exc_type, exc, tb):
+        ok = False
+        try:
+            if exc_type is None:
+                self._write_tail()
+                ok = True
+        finally:
+            self._f.close()
+            for column in [self._offsets, *self._values]:
+                column.close()
+            if ok:
+                os.replace(self._tmp_path, self.path)
+            else:
+                self._tmp_path.unlink(missing_ok=True)
+
+
+def read_stamp(path: Path) -> Optional[Tuple[bytes, int]]:
+    """只读文件头，返回 (source_hash, source_version)；文件不存在或格式不符时返回 None"""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+        magic, byteorder, version, _, source_version, _, _, source_hash = _HEADER.unpack(header)
+    except (OSError, struct.error):
+        return None
+    if magic != MAGIC or byteorder != _BYTEORDER or version != FORMAT_VERSION:
+        return None
+    return source_hash, source_version
+
+
+class TrackFile:
+    """
+    mmap 打开的字幕轨文件。接口与 CaptionTrack 一致：
+    len(track) / track[i] / iter(track) 得到 (text, start, end)，track.texts()，
+    track.starts / track.ends 为可二分查找的 int64 视图，track.column(name) 取任意列。
+    """
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._load()
+        except Exception:
+            self._mm.close()
+            raise
+
+    def _load(self):
+        magic, byteorder, version, ncols, source_version, n, blob_len, source_hash = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or byteorder != _BYTEORDER or version != FORMAT_VERSION:
+            raise ValueError("不支持的字幕轨文件")
+        if len(self._mm) < _HEADER_SIZE + blob_len + _pad(blob_len) + 8 * (ncols + n + 1 + ncols * n):
+            raise ValueError("字幕轨文件不完整")
+        view = memoryview(self._mm)
+        pos = _HEADER_SIZE
+        self._blob = view[pos:pos + blob_len]
+        pos += blob_len + _pad(blob_len)
+        names = [bytes(view[pos + 8 * i:pos + 8 * (i + 1)]).rstrip(b"\0").decode() for i in range(ncols)]
+        pos += 8 * ncols
+        self.offsets = view[pos:pos + 8 * (n + 1)].cast("q")
+        pos += 8 * (n + 1)
+        self._columns: Dict[str, memoryview] = {}
+        for name in names:
+            self._columns[name] = view[pos:pos + 8 * n].cast("q")
+            pos += 8 * n
+        self._n = n
+        self._view = view
+        self.source_version = source_version
+        self.source_hash = source_hash
+
+    def column(self, name: str) -> memoryview:
+        return self._columns[name]
+
+    @property
+    def starts(self) -> memoryview:
+        return self._columns["start"]
+
+    @property
+    def ends(self) -> memoryview:
+        return self._columns["end"]
+
+    def __len__(self) -> int:
+        return self._n
+
+    def unit_text(self, i: int) -> str:
+        return str(self._blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __getitem__(self, i: int) -> Tuple[str, int, int]:
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("TrackFile index out of range")
+        return self.unit_text(i), self.starts[i], self.ends[i]
+
+    def __iter__(self) -> Iterator[Tuple[str, int, int]]:
+        starts, ends = self.starts, self.ends
+        for i in range(self._n):
+            yield self.unit_text(i), starts[i], ends[i]
+
+    def texts(self) -> Iterator[str]:
+        for i in range(self._n):
+            yield self.unit_text(i)
+
+    def close(self):
+        for column in self._columns.values():
+            column.release()
+        self.offsets.release()
+        self._blob.release()
+        self._view.release()
+        self._mm.close()
+
+    def __enter__(self) -> "TrackFile":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,90 @@
+"""
+单词级时间索引：由 json3_utils.generate_sentence_md_from_json3 生成的
+x.en.words.bin（单词）与 x.en.precise.sentences.bin（句子及其单词区间）组成，
+mmap 打开后所有查询均为二分查找，O(log n)，无需重新解析字幕。
+
+用法：
+    from ytx.core.utils.word_index import WordIndex
+    with WordIndex.open(captions_path) as index:
+        w = index.word_at(61_500)         # 61.5s 时正在说的单词
+        s = index.sentence_at(61_500)     # 61.5s 时所在的句子
+        index.span(w, w + 5)              # 第 w..w+5 个单词的 (start_ms, end_ms)
+"""
+
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Tuple
+
+from ytx.core.utils import caption_utils, json3_utils
+from ytx.core.utils.track_file import TrackFile
+
+
+class WordIndex:
+    def __init__(self, words: TrackFile, sentences: TrackFile):
+        self.words = words
+        self.sentences = sentences
+        self._first = sentences.column("first")
+        self._last = sentences.column("last")
+
+    @classmethod
+    def open(cls, captions_path: Path) -> "WordIndex":
+        """打开 json3 字幕对应的索引，需先运行 generate_sentence_md_from_json3"""
+        md_path = captions_path.with_name(captions_path.stem + ".precise.sentences.md")
+        words = TrackFile(json3_utils.word_index_path(captions_path))
+        try:
+            sentences = TrackFile(caption_utils.sentence_bin_path(md_path))
+        except Exception:
+            words.close()
+            raise
+        return cls(words, sentences)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def word(self, i: int) -> Tuple[str, int, int]:
+        """第 i 个单词的 (text, start_ms, end_ms)"""
+        return self.words[i]
+
+    def word_at(self, ms: int) -> int:
+        """时间 ms 时正在说（或刚说完）的单词下标，早于第一个单词时为 -1"""
+        return bisect_right(self.words.starts, ms) - 1
+
+    def sentence_at(self, ms: int) -> int:
+        """时间 ms 时所在的句子下标（按单词归属），早于第一个单词时为 -1"""
+        return self.sentence_of(self.word_at(ms))
+
+    def sentence_of(self, word: int) -> int:
+        """第 word 个单词所属的句子下标"""
+        if word < 0:
+            return -1
+        i = bisect_right(self._first, word) - 1
+        return i if i >= 0 and word <= self._last[i] else -1
+
+    def sentence_words(self, sentence: int) -> Tuple[int, int]:
+        """第 sentence 句包含的单词区间 [first, last]"""
+        return self._first[sentence], self._last[sentence]
+
+    def span(self, first: int, last: int) -> Tuple[int, int]:
+        """第 first..last 个单词（含）的时间范围 (start_ms, end_ms)"""
+        return self.words.starts[first], self.words.ends[last]
+
+    def words_between(self, start_ms: int, end_ms: int) -> Tuple[int, int]:
+        """开始时间落在 [start_ms, end_ms) 的单词区间 [first, last]，没有时 first > last"""
+        starts = self.words.starts
+        return bisect_left(starts, start_ms), bisect_left(starts, end_ms) - 1
+
+    def text(self, first: int, last: int) -> str:
+        """第 first..last 个单词（含）的文本"""
+        return " ".join(self.words.unit_text(i) for i in range(first, last + 1))
+
+    def close(self):
+        self._first.release()
+        self._last.release()
+        self.words.close()
+        self.sentences.close()
+
+    def __enter__(self) -> "WordIndex":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,78 @@
+import pytest
+
+from ytx.core.model.caption_track import CaptionTrack
+
+
+@pytest.fixture
+def track():
+    return CaptionTrack.from_units([
+        ("Hello", 0, 400),
+        ("", 450, 500),
+        ("world.", 500, 900),
+        ("How are", 2000, 2600),
+        ("you? Fine.", 2600, 3500),
+    ])
+
+
+def test_from_units_builds_single_buffer(track):
+    assert len(track) == 4
+    assert track.text == "Hello world. How are you? Fine."
+    assert list(track.offsets) == [0, 6, 13, 21, 32]
+    assert list(track.starts) == [0, 500, 2000, 2600]
+    assert track[1] == ("world.", 500, 900)
+    assert track[-1] == ("you? Fine.", 2600, 3500)
+    with pytest.raises(IndexError):
+        track[4]
+
+
+def test_slice(track):
+    sub = track[1:3]
+    assert sub.text == "world. How are"
+    assert list(sub) == [("world.", 500, 900), ("How are", 2000, 2600)]
+    assert len(track[3:1]) == 0
+
+
+def test_time_queries(track):
+    assert track.index_at(-1) == -1
+    assert track.index_at(700) == 1
+    assert track.index_at(10_000) == 3
+    assert list(track.time_range(500, 2600).texts()) == ["world.", "How are"]
+
+
+def test_sentences_attach_cue(track):
+    assert list(track.sentences()) == [
+        (0, 900, "Hello world.", 0, 1),
+        (2000, 3500, "How are you?", 2, 3),
+        (2600, 3500, "Fine.", 3, 3),
+    ]
+
+
+def test_sentences_attach_token(track):
+    # "Fine." 起点落在单元内部，没有属于它的单元
+    assert list(track.sentences(attach="token")) == [
+        (0, 900, "Hello world.", 0, 1),
+        (2000, 3500, "How are you?", 2, 3),
+    ]
+
+
+def test_sentences_split_unpunctuated_on_pause_and_length():
+    track = CaptionTrack.from_units([
+        ("so today we", 0, 1000),
+        ("talk about", 1000, 2000),
+        ("captions", 4000, 5000),
+        ("and more", 5000, 6000),
+    ])
+    assert list(track.sentences(pause_ms=1500)) == [
+        (0, 2000, "so today we talk about", 0, 1),
+        (4000, 6000, "captions and more", 2, 3),
+    ]
+    assert [s[2] for s in track.sentences(max_words=4)] == ["so today we talk about", "captions and more"]
+    assert [s[2] for s in track.sentences(max_words=3)] == ["so today we", "talk about captions", "and more"]
+    assert len(list(track.sentences())) == 1
+
+
+def test_empty_track():
+    track = CaptionTrack.from_units([])
+    assert len(track) == 0
+    assert track.text == ""
+    assert list(track.sentences()) == []
@@ -22,7 +22,8 @@ def sample_overview_data():
             "syntax": "中等",
             "style": "自然",
             "vocab": "短语丰富，含少量俚语"
-        }
+        },
+        "speech_rate": [128, 141, 136]
     }
 
 
@@ -44,6 +45,7 @@ def test_overview_initialization(overview_instance, sample_overview_data):
     assert overview_instance.summary == sample_overview_data["summary"]
     assert overview_instance.language == sample_overview_data["language"]
     assert overview_instance.difficulty == sample_overview_data["difficulty"]
+    assert overview_instance.speech_rate == sample_overview_data["speech_rate"]
 
 
 def test_to_dict(overview_instance, sample_overview_data):
@@ -99,6 +101,14 @@ def test_format_date():
     assert format_date("invalid-date") == "invalid-date"
 
 
+def test_format_curve():
+    """测试语速曲线格式化"""
+    overview = Overview()
+
+    assert overview._format_curve([]) == "N/A"
+    assert overview._format_curve([0, 80, 160]) == "▁▅█（峰值 160 WPM）"
+
+
 def test_to_pretty_text(overview_instance):
     """测试to_pretty_text方法"""
     result = overview_instance.to_pretty_text()
@@ -124,8 +134,8 @@ def test_to_table(overview_instance):
     assert table is not None
     assert table.title == "📊 视频概要"
     
-    # 检查表格行数（实际有15行：标题、作者、发布时间、语言、时长、播放量、点赞数、评论数、CEFR等级、语音覆盖率、语速、句法复杂度、风格、词汇特点、摘要）
-    expected_rows = 15
+    # 检查表格行数（实际有16行：标题、作者、发布时间、语言、时长、播放量、点赞数、评论数、CEFR等级、语音覆盖率、语速、语速曲线、句法复杂度、风格、词汇特点、摘要）
+    expected_rows = 16
     assert len(table.rows) == expected_rows
 
 
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+import pytest
+
+from ytx.core.llm import cache as llm_cache
+
+
+@pytest.fixture
+def write_sentences():
+    """
+    写一个 .sentences.md 文件。items 可以是：
+    - 句子数 n：生成 "Sentence number 1." ... "Sentence number n."
+    - 句子文本列表，或 (秒, 文本) 列表；没有给出时间时第 i 句在第 i 秒
+    """
+
+    def write(path, items):
+        if isinstance(items, int):
+            items = [f"Sentence number {i}." for i in range(1, items + 1)]
+        rows = [item if isinstance(item, tuple) else (i, item) for i, item in enumerate(items, 1)]
+        path.write_text(
+            "".join(f"[{i}] {s // 3600:02}:{s // 60 % 60:02}:{s % 60:02} → {text}\n"
+                    for i, (s, text) in enumerate(rows, 1)),
+            encoding="utf-8",
+        )
+
+    return write
+
+
+@pytest.fixture
+def cache_env(tmp_path, monkeypatch):
+    """LLM 缓存写到 tmp_path 下的独立数据库，结束时关闭"""
+    monkeypatch.setenv("YTX_LLM_CACHE", str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(llm_cache, "_default_cache", None)
+    yield
+    if llm_cache._default_cache is not None:
+        llm_cache._default_cache.close()
+
+
+@pytest.fixture
+def no_cache(monkeypatch):
+    """关闭 LLM 缓存"""
+    monkeypatch.setenv("YTX_LLM_CACHE", "off")
+
+
+@pytest.fixture
+def response():
+    """构造只有一条 message 的 chat completion 响应"""
+
+    def build(content):
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    return build
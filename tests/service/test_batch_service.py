@@ -0,0 +1,185 @@
+"""
+测试 Batch API 批量模式：用本地 HTTP 服务模拟 files / batches 接口
+"""
+
+import email.parser
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+import pytest
+
+from ytx.core.llm import batch as llm_batch
+from ytx.core.llm import summary as llm_summary
+from ytx.core.service import batch_service
+
+pytestmark = pytest.mark.usefixtures("no_cache")
+
+
+def respond(body):
+    """模拟模型输出"""
+    prompt = body["messages"][-1]["content"]
+    if "JSON" in prompt:
+        return json.dumps({"summary": "批量摘要"}, ensure_ascii=False)
+    if "以上是一段视频字幕" in prompt:
+        return "要点"
+    if "分段要点" in prompt:
+        return "1. 汇总章节"
+    return "1. 单次章节"
+
+
+class StubBatchServer:
+    def __init__(self):
+        self.files = {}
+        self.batches = {}
+        self.retrievals = {}
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, payload, raw=False):
+                data = payload if raw else json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream" if raw else "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if self.path == "/v1/files":
+                    message = email.parser.BytesParser().parsebytes(
+                        b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + body
+                    )
+                    content = next(p.get_payload(decode=True) for p in message.get_payload()
+                                   if p.get_param("name", header="content-disposition") == "file")
+                    self._send(server.add_file(content))
+                elif self.path == "/v1/batches":
+                    self._send(server.create_batch(json.loads(body)))
+
+            def do_GET(self):
+                parts = self.path.strip("/").split("/")
+                if parts[1] == "batches":
+                    self._send(server.retrieve_batch(parts[2]))
+                elif parts[1] == "files" and parts[-1] == "content":
+                    self._send(server.files[parts[2]], raw=True)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+
+    def add_file(self, content):
+        file_id = f"file-{len(self.files)}"
+        self.files[file_id] = content
+        return {"id": file_id, "object": "file", "bytes": len(content), "created_at": 0,
+                "filename": "input.jsonl", "purpose": "batch", "status": "processed"}
+
+    def create_batch(self, params):
+        lines = [json.loads(line) for line in self.files[params["input_file_id"]].decode().splitlines() if line]
+        self.requests.append(lines)
+        output = "\n".join(json.dumps({
+            "id": f"resp-{n}",
+            "custom_id": line["custom_id"],
+            "response": {"status_code": 200, "body": {
+                "id": f"chat-{n}", "object": "chat.completion", "created": 0, "model": line["body"]["model"],
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": respond(line["body"])}}],
+            }},
+            "error": None,
+        }, ensure_ascii=False) for n, line in enumerate(lines))
+        output_id = self.add_file(output.encode())["id"]
+        batch_id = f"batch-{len(self.batches)}"
+        self.batches[batch_id] = {
+            "id": batch_id, "object": "batch", "endpoint": params["endpoint"], "errors": None,
+            "input_file_id": params["input_file_id"], "completion_window": params["completion_window"],
+            "status": "validating", "output_file_id": None, "error_file_id": None, "created_at": 0,
+            "request_counts": {"total": len(lines), "completed": 0, "failed": 0},
+            "_output": output_id,
+        }
+        return self._public(batch_id)
+
+    def retrieve_batch(self, batch_id):
+        # 第一次查询仍在处理中，之后完成
+        self.retrievals[batch_id] = self.retrievals.get(batch_id, 0) + 1
+        batch = self.batches[batch_id]
+        if self.retrievals[batch_id] >= 2:
+            batch.update(status="completed", output_file_id=batch["_output"])
+            counts = batch["request_counts"]
+            counts["completed"] = counts["total"]
+        else:
+            batch["status"] = "in_progress"
+        return self._public(batch_id)
+
+    def _public(self, batch_id):
+        return {k: v for k, v in self.batches[batch_id].items() if not k.startswith("_")}
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubBatchServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def client(stub):
+    return openai.OpenAI(api_key="test", base_url=stub.base_url, max_retries=0)
+
+
+def _make_project(root, video_id, n_sentences):
+    project_dir = root / video_id
+    project_dir.mkdir()
+    (project_dir / "project.json").write_text(json.dumps({
+        "video_id": video_id, "url": f"https://www.youtube.com/watch?v={video_id}", "lang": "en",
+        "assets": {"metadata": f"{video_id}.meta.json"},
+    }), encoding="utf-8")
+    (project_dir / f"{video_id}.meta.json").write_text(json.dumps({
+        "id": video_id, "title": f"Video {video_id}", "webpage_url": f"https://www.youtube.com/watch?v={video_id}",
+    }), encoding="utf-8")
+    (project_dir / f"{video_id}.en.srt").write_text("".join(
+        f"{i + 1}\n00:00:{i:02},000 --> 00:00:{i:02},900\nSentence number {i} is spoken here.\n\n"
+        for i in range(n_sentences)
+    ), encoding="utf-8")
+    return str(project_dir)
+
+
+def test_batch_run_round_trip(stub, client):
+    requests = {"a": {"prompt": "hello"}, "b": {"prompt": "world", "temperature": 0.5}}
+
+    results = llm_batch.run(requests, client, poll_interval=0)
+
+    assert results == {"a": "1. 单次章节", "b": "1. 单次章节"}
+    sent = stub.requests[0]
+    assert [line["custom_id"] for line in sent] == ["a", "b"]
+    assert sent[1]["url"] == "/v1/chat/completions"
+    assert sent[1]["body"]["temperature"] == 0.5
+
+
+def test_batch_service_writes_back(stub, client, tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_summary, "SINGLE_CALL_TOKENS", 200)
+    monkeypatch.setattr(llm_summary, "CHUNK_TOKENS", 100)
+    short = _make_project(tmp_path, "short", 3)
+    long = _make_project(tmp_path, "long", 40)
+
+    status = batch_service.run([short, long], poll_interval=0, client=client)
+
+    assert status == {short: {"overview": True, "summary": True}, long: {"overview": True, "summary": True}}
+    # 第一阶段：2 个 overview + 1 个单次摘要 + 若干分块；第二阶段：1 个汇总
+    assert len(stub.requests) == 2
+    assert [line["custom_id"] for line in stub.requests[1]] == ["1:summary"]
+    assert sum(line["custom_id"].startswith("1:chunk:") for line in stub.requests[0]) > 1
+
+    for project_dir, expected in ((short, "1. 单次章节"), (long, "1. 汇总章节")):
+        overview = json.loads((tmp_path / project_dir / "overview.json").read_text(encoding="utf-8"))
+        assert overview["summary"] == "批量摘要"
+        assert overview["difficulty"]["cefr"] == "A2"  # 本地评估
+        assert (tmp_path / project_dir / "summary.txt").read_text(encoding="utf-8") == expected + "\n"
@@ -6,7 +6,7 @@ import json
 import os
 import pytest
 from unittest.mock import patch, mock_open
-from ytx.core.service.download_service import get_project
+from ytx.core.service.download_service import get_project, merge_captions
 
 
 class TestGetProject:
@@ -74,4 +74,28 @@ class TestGetProject:
                 with pytest.raises(IOError) as exc_info:
                     get_project()
                 
-                assert "文件读取失败" in str(exc_info.value) 
\ No newline at end of file
+                assert "文件读取失败" in str(exc_info.value) 
+
+class TestMergeCaptions:
+    """测试 merge_captions 函数"""
+
+    def test_merge_aligns_by_time(self, tmp_path):
+        """中文字幕条数不同时按时间对齐，而不是按序号"""
+        (tmp_path / "abcdefghijk.orig.srt").write_text(
+            "1\n00:00:00,000 --> 00:00:02,000\nhello\n\n"
+            "2\n00:00:02,000 --> 00:00:04,000\nworld\n",
+            encoding="utf-8",
+        )
+        (tmp_path / "abcdefghijk.zh.srt").write_text(
+            "1\n00:00:00,000 --> 00:00:01,000\n你\n\n"
+            "2\n00:00:01,000 --> 00:00:01,900\n好\n\n"
+            "3\n00:00:02,100 --> 00:00:03,900\n世界\n",
+            encoding="utf-8",
+        )
+
+        merged = merge_captions("https://www.youtube.com/watch?v=abcdefghijk", str(tmp_path))
+
+        assert open(merged, encoding="utf-8").read() == (
+            "1\n00:00:00,000 --> 00:00:02,000\nhello\n你\n好\n\n"
+            "2\n00:00:02,000 --> 00:00:04,000\nworld\n世界\n\n"
+        )
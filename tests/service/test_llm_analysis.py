@@ -0,0 +1,99 @@
+"""
+测试合并分析（一次调用生成摘要和章节）与字幕在前的提示词布局
+"""
+
+import json
+from unittest.mock import patch
+
+from ytx.core.llm import analysis, overview as llm_overview, summary as llm_summary
+from ytx.core.llm.prompt import SYSTEM_PROMPT, transcript_lines
+from ytx.core.model.overview_model import Overview
+from ytx.core.service import analysis_service
+
+RESULT = {
+    "summary": "一段关于搬家的视频",
+    "chapters": [
+        {"start": "00:00", "end": "00:02", "title": "开场", "content": "作者打招呼。"},
+        {"start": "00:02", "end": "00:05", "title": "搬家", "content": "讲述搬到纽约。"},
+    ],
+    "key_points": ["独自生活需要适应"],
+}
+
+
+@patch("ytx.core.llm.analysis.call_llm")
+def test_run_fills_summary_and_returns_chapters(mock_call_llm, tmp_path, write_sentences):
+    path = tmp_path / "test.sentences.md"
+    write_sentences(path, 3)
+    mock_call_llm.return_value = RESULT
+    overview = Overview(title="Moving")
+
+    text = analysis.run(overview, path)
+
+    assert overview.summary == "一段关于搬家的视频"
+    assert text == ("1. 开场 (00:00 - 00:02)\n作者打招呼。\n\n"
+                    "2. 搬家 (00:02 - 00:05)\n讲述搬到纽约。\n\n"
+                    "核心观点：\n- 独自生活需要适应")
+    assert mock_call_llm.call_count == 1
+
+
+@patch("ytx.core.llm.analysis.call_llm")
+def test_run_returns_none_for_long_or_incomplete(mock_call_llm, tmp_path, monkeypatch, write_sentences):
+    path = tmp_path / "test.sentences.md"
+    write_sentences(path, 30)
+    mock_call_llm.return_value = {"summary": "只有摘要"}
+    overview = Overview()
+
+    assert analysis.run(overview, path) is None
+    assert overview.summary == ""
+
+    monkeypatch.setattr(llm_summary, "SINGLE_CALL_TOKENS", 10)
+    assert analysis.run(overview, path) is None
+    assert mock_call_llm.call_count == 1
+
+
+def test_prompts_share_transcript_prefix(tmp_path, write_sentences):
+    path = tmp_path / "test.sentences.md"
+    write_sentences(path, 5)
+    overview = Overview(title="Moving")
+    transcript = "\n".join(transcript_lines(path))
+
+    overview_request = llm_overview.build_request(overview, path)
+    _, [summary_request] = llm_summary.build_requests(path)
+    analysis_request = analysis._request(overview, transcript)
+
+    prefix = f"### 字幕内容：\n{transcript}\n\n"
+    for request in (overview_request, summary_request, analysis_request):
+        assert request["system_prompt"] == SYSTEM_PROMPT
+        assert request["prompt"].startswith(prefix)
+
+
+def test_service_falls_back_to_separate_passes(tmp_path, write_sentences):
+    path = tmp_path / "test.sentences.md"
+    write_sentences(path, 3)
+
+    def fake_update(overview, sentence_path):
+        overview.summary = "单独摘要"
+
+    with patch.object(analysis_service.overview_service, "prepare", return_value=(Overview(), path)), \
+            patch.object(analysis_service.llm_analysis, "run", return_value=None), \
+            patch.object(analysis_service.llm_overview, "update", side_effect=fake_update), \
+            patch.object(analysis_service.llm_summary, "run", return_value="1. 单独章节"):
+        overview, summary = analysis_service.run(str(tmp_path))
+
+    assert summary == "1. 单独章节"
+    saved = json.loads((tmp_path / "overview.json").read_text(encoding="utf-8"))
+    assert saved["summary"] == "单独摘要"
+    assert (tmp_path / "summary.txt").read_text(encoding="utf-8") == "1. 单独章节\n"
+
+
+def test_overview_service_saves_into_project_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+
+    with patch.object(analysis_service.overview_service, "prepare", return_value=(Overview(), None)), \
+            patch.object(analysis_service.overview_service.llm_overview, "update"):
+        analysis_service.overview_service.run(str(project_dir))
+
+    assert (project_dir / "overview.json").exists()
+    assert not (tmp_path / "overview.json").exists()
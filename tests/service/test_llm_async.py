@@ -0,0 +1,80 @@
+"""
+测试异步 LLM 调用：并发上限、超时，以及 overview / summary 的异步入口
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from ytx.core.llm import common, summary
+from ytx.core.llm.common import acall_llm
+from ytx.core.llm.overview import aupdate
+from ytx.core.model.overview_model import Overview
+
+
+pytestmark = pytest.mark.usefixtures("no_cache")
+
+
+def test_acall_llm_bounds_concurrency(monkeypatch, response):
+    monkeypatch.setattr(common, "MAX_CONCURRENCY", 3)
+    in_flight = 0
+    peak = 0
+
+    async def create(**kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return response(kwargs["messages"][-1]["content"])
+
+    async def main():
+        return await asyncio.gather(*(acall_llm(f"p{i}", return_raw=True) for i in range(10)))
+
+    with patch.object(common, "_async_client") as client:
+        client.chat.completions.create = create
+        results = asyncio.run(main())
+
+    assert results == [f"p{i}" for i in range(10)]
+    assert peak == 3
+
+
+def test_acall_llm_timeout():
+    async def create(**kwargs):
+        await asyncio.sleep(1)
+
+    with patch.object(common, "_async_client") as client:
+        client.chat.completions.create = create
+        with pytest.raises(RuntimeError, match="timed out"):
+            asyncio.run(acall_llm("hello", timeout=0.01))
+
+
+@patch("ytx.core.llm.overview.acall_llm", new_callable=AsyncMock)
+def test_aupdate_many_videos_concurrently(mock_acall_llm, tmp_path):
+    mock_acall_llm.return_value = {"summary": "摘要"}
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"v{i}.sentences.md"
+        path.write_text(f"[1] 00:00:01 → Video {i}.", encoding="utf-8")
+        paths.append(path)
+    overviews = [Overview() for _ in paths]
+
+    async def main():
+        await asyncio.gather(*(aupdate(o, p) for o, p in zip(overviews, paths)))
+
+    asyncio.run(main())
+
+    assert mock_acall_llm.await_count == 3
+    assert all(o.summary == "摘要" for o in overviews)
+
+
+@patch("ytx.core.llm.summary.acall_llm", new_callable=AsyncMock)
+def test_arun_map_reduce(mock_acall_llm, tmp_path):
+    path = tmp_path / "test.sentences.md"
+    path.write_text("[1] 00:00:01 → One.\n[2] 00:00:02 → Two.\n", encoding="utf-8")
+    mock_acall_llm.return_value = "notes"
+
+    assert asyncio.run(summary.arun(path, mode="map_reduce")) == "notes"
+    assert mock_acall_llm.await_count == 2
+    assert "分段要点" in mock_acall_llm.await_args.args[0]
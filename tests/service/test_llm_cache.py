@@ -0,0 +1,116 @@
+"""
+测试 LLM 响应缓存
+"""
+
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+from ytx.core.llm import cache as llm_cache
+from ytx.core.llm.cache import LLMCache, make_key
+from ytx.core.llm.common import call_llm
+
+
+def test_make_key_is_order_independent():
+    assert make_key(model="m", prompt="p") == make_key(prompt="p", model="m")
+    assert make_key(model="m", prompt="p") != make_key(model="m", prompt="q")
+
+
+def test_get_put_and_counters(tmp_path):
+    cache = LLMCache(tmp_path / "c.sqlite3")
+    assert cache.get("a") is None
+    cache.put("a", "1")
+    assert cache.get("a") == "1"
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+    # 持久化
+    reopened = LLMCache(tmp_path / "c.sqlite3")
+    assert reopened.get("a") == "1"
+    reopened.close()
+
+
+def test_lru_eviction(tmp_path):
+    cache = LLMCache(tmp_path / "c.sqlite3", max_entries=2)
+    with patch("ytx.core.llm.cache.time.time", side_effect=[1, 2, 3, 4]):
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")       # a 最近被访问
+        cache.put("c", "3")  # 淘汰 b
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    cache.close()
+
+
+def test_ttl_expiry(tmp_path):
+    cache = LLMCache(tmp_path / "c.sqlite3", ttl=10)
+    with patch("ytx.core.llm.cache.time.time", side_effect=[100, 105, 111]):
+        cache.put("a", "1")
+        assert cache.get("a") == "1"
+        assert cache.get("a") is None
+    assert len(cache) == 0
+    cache.close()
+
+
+def test_locked_database_is_a_miss(tmp_path):
+    # 另一个 ytx 进程正在写同一个缓存文件
+    cache = LLMCache(tmp_path / "c.sqlite3")
+    cache._conn.execute("PRAGMA busy_timeout = 0")
+    cache.put("a", "1")
+    other = sqlite3.connect(tmp_path / "c.sqlite3", isolation_level=None)
+    other.execute("BEGIN EXCLUSIVE")
+
+    assert cache.get("a") is None
+    cache.put("b", "2")
+
+    other.execute("ROLLBACK")
+    other.close()
+    assert cache.get("a") == "1"
+    assert cache.get("b") is None
+    cache.close()
+
+
+@patch("ytx.core.llm.common._client")
+def test_call_llm_uses_cache(mock_client, cache_env, response):
+    mock_client.chat.completions.create.return_value = response('{"a": 1}')
+
+    assert call_llm("hello") == {"a": 1}
+    assert call_llm("hello") == {"a": 1}
+    assert call_llm("hello", return_raw=True) == '{"a": 1}'
+    assert mock_client.chat.completions.create.call_count == 1
+
+    # 参数不同或显式绕过时请求 API
+    call_llm("hello", temperature=0.5)
+    call_llm("hello", use_cache=False)
+    assert mock_client.chat.completions.create.call_count == 3
+
+
+@patch("ytx.core.llm.common._client")
+def test_call_llm_does_not_cache_invalid_json(mock_client, cache_env, response):
+    mock_client.chat.completions.create.return_value = response("not json")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            call_llm("hello")
+    assert mock_client.chat.completions.create.call_count == 2
+
+
+@patch("ytx.core.llm.common._client")
+def test_cache_disabled_by_env(mock_client, no_cache, response):
+    mock_client.chat.completions.create.return_value = response("ok")
+
+    call_llm("hello", return_raw=True)
+    call_llm("hello", return_raw=True)
+    assert mock_client.chat.completions.create.call_count == 2
+
+
+def test_ttl_from_env(cache_env, monkeypatch):
+    monkeypatch.setenv("YTX_LLM_CACHE_TTL", "3600")
+    assert llm_cache.get_cache().ttl == 3600
+
+
+def test_no_ttl_by_default(cache_env, monkeypatch):
+    monkeypatch.delenv("YTX_LLM_CACHE_TTL", raising=False)
+    assert llm_cache.get_cache().ttl is None
@@ -0,0 +1,87 @@
+"""
+测试按上传者章节生成摘要：章节来自 meta.json，按章节时间切分字幕并逐章生成描述
+"""
+
+import json
+from unittest.mock import patch
+
+from ytx.core.llm import summary
+from ytx.core.llm.summary_store import SummaryStore
+from ytx.core.utils import caption_utils
+
+CHAPTERS = [(0, 60_000, "开场"), (60_000, 120_000, "正题"), (120_000, 180_000, "总结")]
+
+
+def fake_call_llm(prompt, **kwargs):
+    for _, _, title in CHAPTERS:
+        if f"「{title}」" in prompt:
+            return f"{title}的描述"
+    return "SINGLE"
+
+
+def test_slice_chapters():
+    units = [(0, "a"), (30_000, "b"), (-1, "c"), (70_000, "d"), (150_000, "e")]
+    slices = summary._slice_chapters(units, CHAPTERS)
+    assert [(chapter[2], lines) for chapter, lines in slices] == [
+        ("开场", ["a", "b", "c"]), ("正题", ["d"]), ("总结", ["e"]),
+    ]
+
+
+def test_slice_chapters_skips_empty():
+    units = [(10_000, "a"), (130_000, "b")]
+    slices = summary._slice_chapters(units, CHAPTERS)
+    assert [chapter[2] for chapter, _ in slices] == ["开场", "总结"]
+
+
+@patch("ytx.core.llm.summary.call_llm", side_effect=fake_call_llm)
+def test_run_with_chapters(mock_call_llm, tmp_path, write_sentences):
+    path = tmp_path / "test.sentences.md"
+    write_sentences(path, [(5, "Hello."), (65, "Main topic."), (125, "Bye.")])
+
+    result = summary.run(path, chapters=CHAPTERS)
+
+    assert result == (
+        "1. 开场 (00:00 - 01:00)\n开场的描述\n\n"
+        "2. 正题 (01:00 - 02:00)\n正题的描述\n\n"
+        "3. 总结 (02:00 - 03:00)\n总结的描述"
+    )
+    # 每个章节一次调用，不再请求模型划分章节
+    assert mock_call_llm.call_count == 3
+    prompts = [c.args[0] for c in mock_call_llm.call_args_list]
+    assert all("生成视频章节" not in p for p in prompts)
+    assert any("[01:05] Main topic." in p and "「正题」" in p for p in prompts)
+
+
+@patch("ytx.core.llm.summary.call_llm", side_effect=fake_call_llm)
+def test_stream_with_chapters_reuses_store(mock_call_llm, tmp_path, write_sentences):
+    path = tmp_path / "test.sentences.md"
+    write_sentences(path, [(5, "Hello."), (65, "Main topic."), (125, "Bye.")])
+    store = SummaryStore(tmp_path / "summary.chunks.json")
+
+    streamed = "".join(summary.run_stream(path, store=store, chapters=CHAPTERS))
+    assert streamed == summary.run(path, store=SummaryStore(store.path), chapters=CHAPTERS)
+    assert mock_call_llm.call_count == 3
+
+
+@patch("ytx.core.llm.summary.call_llm", side_effect=fake_call_llm)
+def test_without_chapters_falls_back(mock_call_llm, tmp_path, write_sentences):
+    path = tmp_path / "test.sentences.md"
+    write_sentences(path, [(5, "Hello."), (65, "Main topic.")])
+
+    assert summary.run(path, chapters=CHAPTERS[:1]) == "SINGLE"
+    assert mock_call_llm.call_count == 1
+
+
+def test_load_chapters(tmp_path):
+    (tmp_path / "project.json").write_text(json.dumps({"assets": {"metadata": "meta.json"}}), encoding="utf-8")
+    (tmp_path / "meta.json").write_text(json.dumps({"chapters": [
+        {"start_time": 90.5, "end_time": 200.0, "title": " Part 2 "},
+        {"start_time": 0.0, "end_time": 90.5, "title": "Intro"},
+        {"start_time": 200.0, "end_time": 200.0, "title": "Empty"},
+    ]}), encoding="utf-8")
+
+    assert caption_utils.load_chapters(str(tmp_path)) == [(0, 90_500, "Intro"), (90_500, 200_000, "Part 2")]
+
+
+def test_load_chapters_missing(tmp_path):
+    assert caption_utils.load_chapters(str(tmp_path)) == []
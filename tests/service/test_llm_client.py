@@ -0,0 +1,219 @@
+"""
+测试 LLM 客户端层：重试、退避、Retry-After 与对冲请求
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from ytx.core.llm import client as llm_client
+from ytx.core.llm.client import LatencyTracker, is_retryable, retry_delay, with_retry, awith_retry
+
+
+class FakeStatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+@pytest.fixture(autouse=True)
+def fresh_latency(monkeypatch):
+    monkeypatch.setattr(llm_client, "latency", LatencyTracker())
+    monkeypatch.setattr(llm_client, "HEDGE", False)
+
+
+def _flaky(errors, result="ok"):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return fn, calls
+
+
+def test_is_retryable():
+    assert is_retryable(FakeStatusError(429))
+    assert is_retryable(FakeStatusError(503))
+    assert not is_retryable(FakeStatusError(400))
+    assert not is_retryable(FakeStatusError(401))
+    assert not is_retryable(ValueError("bad"))
+
+
+def test_retry_delay_honors_retry_after():
+    assert retry_delay(FakeStatusError(429, {"retry-after": "3"}), 0) == 3
+    assert retry_delay(FakeStatusError(429, {"retry-after-ms": "250"}), 5) == 0.25
+    assert retry_delay(FakeStatusError(429, {"retry-after": "9999"}), 0) == llm_client.BACKOFF_MAX
+
+
+def test_retry_delay_exponential_with_jitter():
+    for attempt in range(6):
+        cap = min(llm_client.BACKOFF_MAX, llm_client.BACKOFF_BASE * 2 ** attempt)
+        delays = [retry_delay(FakeStatusError(500), attempt) for _ in range(50)]
+        assert all(0 <= d <= cap for d in delays)
+        assert len(set(delays)) > 1
+
+
+@patch("ytx.core.llm.client.time.sleep")
+def test_with_retry_recovers(mock_sleep):
+    fn, calls = _flaky([FakeStatusError(429, {"retry-after": "2"}), FakeStatusError(502)])
+
+    assert with_retry(fn) == "ok"
+    assert len(calls) == 3
+    assert mock_sleep.call_args_list[0].args == (2.0,)
+
+
+@patch("ytx.core.llm.client.time.sleep")
+def test_with_retry_gives_up(mock_sleep, monkeypatch):
+    monkeypatch.setattr(llm_client, "MAX_RETRIES", 2)
+    fn, calls = _flaky([FakeStatusError(500)] * 5)
+
+    with pytest.raises(FakeStatusError):
+        with_retry(fn)
+    assert len(calls) == 3
+
+
+@patch("ytx.core.llm.client.time.sleep")
+def test_with_retry_does_not_retry_client_errors(mock_sleep):
+    fn, calls = _flaky([FakeStatusError(400)])
+
+    with pytest.raises(FakeStatusError):
+        with_retry(fn)
+    assert len(calls) == 1
+    mock_sleep.assert_not_called()
+
+
+def test_awith_retry(monkeypatch):
+    monkeypatch.setattr(llm_client, "BACKOFF_BASE", 0.001)
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        if len(calls) == 1:
+            raise FakeStatusError(503)
+        return "ok"
+
+    assert asyncio.run(awith_retry(fn)) == "ok"
+    assert len(calls) == 2
+
+
+def test_latency_percentile(monkeypatch):
+    monkeypatch.setattr(llm_client, "HEDGE_MIN_SAMPLES", 10)
+    tracker = LatencyTracker()
+    for i in range(9):
+        tracker.record(i)
+    assert tracker.percentile(0.95) is None
+    for i in range(9, 100):
+        tracker.record(i)
+    assert tracker.percentile(0.95) == 95
+
+
+def _enable_hedge(monkeypatch, after):
+    monkeypatch.setattr(llm_client, "HEDGE", True)
+    monkeypatch.setattr(llm_client, "HEDGE_MIN_SAMPLES", 1)
+    llm_client.latency.record(after)
+
+
+def test_sync_hedge_returns_faster_request(monkeypatch):
+    _enable_hedge(monkeypatch, 0.02)
+    calls = []
+    lock = threading.Lock()
+
+    def fn():
+        with lock:
+            calls.append(1)
+            n = len(calls)
+        time.sleep(0.5 if n == 1 else 0.01)
+        return n
+
+    start = time.perf_counter()
+    assert with_retry(fn) == 2
+    assert time.perf_counter() - start < 0.4
+
+
+class FakeStream:
+    def __init__(self, n):
+        self.n = n
+        self.closed = threading.Event()
+
+    def close(self):
+        self.closed.set()
+
+
+def test_sync_hedge_closes_losing_result(monkeypatch):
+    _enable_hedge(monkeypatch, 0.02)
+    streams = []
+    lock = threading.Lock()
+
+    def fn():
+        with lock:
+            stream = FakeStream(len(streams) + 1)
+            streams.append(stream)
+        time.sleep(0.3 if stream.n == 1 else 0.01)
+        return stream
+
+    winner = with_retry(fn)
+
+    assert winner.n == 2 and len(streams) == 2
+    # 落后的第一个请求结束后被关闭，返回的结果保持打开
+    assert streams[0].closed.wait(2)
+    assert not winner.closed.is_set()
+
+
+def test_with_retry_without_hedge(monkeypatch):
+    _enable_hedge(monkeypatch, 0.001)
+    fn, calls = _flaky([])
+    samples = len(llm_client.latency._samples)
+
+    def slow():
+        time.sleep(0.05)
+        return fn()
+
+    assert with_retry(slow, hedge=False) == "ok"
+    assert len(calls) == 1
+    assert len(llm_client.latency._samples) == samples
+
+
+def test_sync_hedge_not_fired_for_fast_request(monkeypatch):
+    _enable_hedge(monkeypatch, 1.0)
+    fn, calls = _flaky([])
+
+    assert with_retry(fn) == "ok"
+    assert len(calls) == 1
+
+
+def test_async_hedge_cancels_slower_request(monkeypatch):
+    _enable_hedge(monkeypatch, 0.02)
+    calls = []
+    cancelled = []
+
+    async def fn():
+        calls.append(1)
+        n = len(calls)
+        try:
+            await asyncio.sleep(0.5 if n == 1 else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(n)
+            raise
+        return n
+
+    async def main():
+        result = await awith_retry(fn)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(main()) == 2
+    assert cancelled == [1]
+
+
+def test_pool_limits(monkeypatch):
+    httpx = pytest.importorskip("httpx")
+    monkeypatch.setattr(llm_client, "POOL_SIZE", 7)
+    assert llm_client._limits() == httpx.Limits(max_connections=7, max_keepalive_connections=7)
@@ -33,7 +33,9 @@ class TestLLMOverview(unittest.TestCase):
         
         # 测试加载
         result = _load_sentences(sentence_path)
-        expected = "Hello, welcome to this video. Today we will discuss AI technology. Let's begin."
+        expected = ("[00:01] Hello, welcome to this video.\n"
+                    "[00:05] Today we will discuss AI technology.\n"
+                    "[00:10] Let's begin.")
         self.assertEqual(result, expected)
     
     @patch('ytx.core.llm.overview.call_llm')
@@ -69,9 +71,10 @@ class TestLLMOverview(unittest.TestCase):
         
         # 验证结果
         self.assertEqual(overview.summary, "这是一个关于AI技术的视频")
-        self.assertEqual(overview.difficulty["cefr"], "B2")
-        self.assertEqual(overview.difficulty["wpm"], 150)
-        self.assertEqual(overview.difficulty["voice_coverage"], 85)
+        # 难度在本地计算，不采用 LLM 的结果
+        self.assertEqual(overview.difficulty["cefr"], "N/A")
+        self.assertEqual(overview.difficulty["wpm"], 0)
+        self.assertEqual(overview.difficulty["voice_coverage"], 0)
         
         # 验证 LLM 被调用
         mock_call_llm.assert_called_once()
@@ -0,0 +1,123 @@
+"""
+测试流式输出：stream_llm、summary.run_stream 与 summary_service.stream
+"""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from ytx.core.llm.common import stream_llm
+from ytx.core.llm.summary import run_stream
+from ytx.core.llm.summary_store import SummaryStore
+from ytx.core.service import summary_service
+
+
+def _chunks(*texts):
+    for text in texts:
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+    yield SimpleNamespace(choices=[])  # 结尾的 usage 块没有 choices
+
+
+@patch("ytx.core.llm.common._client")
+def test_stream_llm_yields_deltas_and_caches(mock_client, cache_env):
+    mock_client.chat.completions.create.side_effect = lambda **kwargs: _chunks("1. 开", None, "场\n", "2. 结尾")
+
+    assert list(stream_llm("hello")) == ["1. 开", "场\n", "2. 结尾"]
+    assert mock_client.chat.completions.create.call_args.kwargs["stream"] is True
+
+    # 第二次命中缓存，一次返回全文
+    assert list(stream_llm("hello")) == ["1. 开场\n2. 结尾"]
+    assert mock_client.chat.completions.create.call_count == 1
+
+
+@patch("ytx.core.llm.common._client")
+def test_stream_llm_is_not_hedged(mock_client, no_cache):
+    mock_client.chat.completions.create.side_effect = lambda **kwargs: _chunks("a")
+
+    with patch("ytx.core.llm.common.llm_client.with_retry", side_effect=lambda fn, **kwargs: fn()) as with_retry:
+        assert list(stream_llm("hello")) == ["a"]
+    assert with_retry.call_args.kwargs == {"hedge": False}
+
+
+@patch("ytx.core.llm.summary.stream_llm")
+def test_run_stream(mock_stream_llm, tmp_path):
+    path = tmp_path / "test.sentences.md"
+    path.write_text("[1] 00:00:01 → Hello.\n", encoding="utf-8")
+    mock_stream_llm.return_value = iter(["a", "b"])
+
+    assert list(run_stream(path)) == ["a", "b"]
+    assert "[00:01] Hello." in mock_stream_llm.call_args.args[0]
+
+
+def _fake_stream(texts, completed):
+    yield from texts
+    return completed
+
+
+def test_service_stream_persists_full_text(tmp_path):
+    with patch.object(summary_service.srt_utils, "download_en_captions"), \
+            patch.object(summary_service.srt_utils, "generate_sentence_md_from_srt"), \
+            patch.object(summary_service.llm_summary, "run_stream", return_value=_fake_stream(["1. ", "开场"], True)):
+        stream = summary_service.stream(str(tmp_path))
+        assert next(stream) == "1. "
+        assert not (tmp_path / "summary.txt").exists()
+        assert list(stream) == ["开场"]
+
+    assert (tmp_path / "summary.txt").read_text(encoding="utf-8") == "1. 开场\n"
+
+
+def test_service_does_not_persist_errors(tmp_path):
+    with patch.object(summary_service.srt_utils, "download_en_captions"), \
+            patch.object(summary_service.srt_utils, "generate_sentence_md_from_srt"), \
+            patch.object(summary_service.llm_summary, "run_stream",
+                         return_value=_fake_stream(["Error occurred: boom"], False)):
+        list(summary_service.stream(str(tmp_path)))
+
+    assert not (tmp_path / "summary.txt").exists()
+
+
+@patch("ytx.core.llm.summary.stream_llm")
+def test_service_keeps_summary_when_stream_fails_midway(mock_stream_llm, tmp_path):
+    def failing_stream(prompt, **kwargs):
+        yield "partial "
+        raise RuntimeError("boom")
+
+    mock_stream_llm.side_effect = failing_stream
+    path = tmp_path / "test.sentences.md"
+    path.write_text("[1] 00:00:01 → Hello.\n", encoding="utf-8")
+    (tmp_path / "summary.txt").write_text("旧的摘要\n", encoding="utf-8")
+
+    with patch.object(summary_service.srt_utils, "download_en_captions"), \
+            patch.object(summary_service.srt_utils, "generate_sentence_md_from_srt", return_value=path):
+        texts = list(summary_service.stream(str(tmp_path)))
+
+    assert texts == ["partial ", "Error occurred: boom"]
+    assert (tmp_path / "summary.txt").read_text(encoding="utf-8") == "旧的摘要\n"
+
+
+@patch("ytx.core.llm.common._client")
+def test_stream_llm_does_not_cache_empty_output(mock_client, cache_env):
+    mock_client.chat.completions.create.side_effect = lambda **kwargs: _chunks(None, " ")
+
+    assert list(stream_llm("hello")) == [" "]
+    assert list(stream_llm("hello")) == [" "]
+    assert mock_client.chat.completions.create.call_count == 2
+
+
+@patch("ytx.core.llm.summary.stream_llm")
+def test_run_stream_does_not_store_empty_output(mock_stream_llm, tmp_path):
+    path = tmp_path / "test.sentences.md"
+    path.write_text("[1] 00:00:01 → Hello.\n", encoding="utf-8")
+    store = SummaryStore(tmp_path / "summary.json")
+    mock_stream_llm.side_effect = lambda prompt, **kwargs: iter([])
+
+    with pytest.raises(StopIteration) as stop:
+        next(run_stream(path, store=store))
+    assert stop.value.value is False  # 未完整生成，调用方不保存
+    assert json.loads((tmp_path / "summary.json").read_text(encoding="utf-8"))["summaries"] == {}
+
+    mock_stream_llm.side_effect = lambda prompt, **kwargs: iter(["a"])
+    assert list(run_stream(path, store=store)) == ["a"]
+    assert mock_stream_llm.call_count == 2
@@ -0,0 +1,159 @@
+"""
+测试 LLM 目录和摘要（分块 map-reduce）
+"""
+
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from ytx.core.llm import summary, tokens
+from ytx.core.llm.prompt import transcript_lines
+from ytx.core.llm.summary import _chunk_lines, run
+from ytx.core.utils.srt_utils import generate_sentence_md_from_srt
+from ytx.core.utils.track_file import TrackFile
+
+
+def test_transcript_lines_keeps_timestamps(tmp_path):
+    path = tmp_path / "test.sentences.md"
+    path.write_text("[1] 00:00:05 → Hello there. [Music]\n[2] 01:02:03 → Bye.\n[3] 00:00:09 → [Music]\n",
+                    encoding="utf-8")
+
+    assert transcript_lines(path) == ["[00:05] Hello there.", "[1:02:03] Bye."]
+
+
+def test_transcript_lines_closes_mapped_track(tmp_path):
+    srt_path = tmp_path / "abc.en.srt"
+    srt_path.write_text("1\n00:00:01,000 --> 00:00:02,000\nHello.\n", encoding="utf-8")
+    md_path = generate_sentence_md_from_srt(srt_path)
+
+    with patch.object(TrackFile, "close", autospec=True, side_effect=TrackFile.close) as close:
+        assert transcript_lines(md_path) == ["[00:01] Hello."]
+    close.assert_called_once()
+
+
+def test_chunk_lines_respects_budget_and_order(monkeypatch):
+    monkeypatch.setattr(summary, "count_tokens", len)
+    lines = [f"line {i:03}" for i in range(100)]  # 每行 8 + 1 个 token
+
+    chunks = _chunk_lines(lines, budget=36)
+
+    assert [line for chunk in chunks for line in chunk] == lines
+    assert all(3 <= len(chunk) <= 4 for chunk in chunks[:-1])
+
+
+def test_chunk_lines_splits_oversized_line(monkeypatch):
+    monkeypatch.setattr(summary, "count_tokens", len)
+    monkeypatch.setattr(tokens, "count_tokens", lambda text, model=None: len(text))
+    # 没有标点的自动字幕整段只有一行，也要按预算切块
+    words = [f"w{i:03}" for i in range(100)]  # 每词 4 + 1 个 token
+    huge = " ".join(words)
+
+    chunks = _chunk_lines(["[00:00] intro", huge, "[09:00] end"], budget=36)
+
+    assert len(chunks) > 10
+    assert all(sum(len(line) + 1 for line in chunk) <= 36 for chunk in chunks)
+    flat = " ".join(line for chunk in chunks for line in chunk)
+    assert flat == f"[00:00] intro {huge} [09:00] end"
+
+
+def test_chunk_boundaries_are_content_defined(monkeypatch):
+    monkeypatch.setattr(summary, "count_tokens", len)
+    lines = [f"line {i:04}" for i in range(3000)]  # 每行 9 + 1 个 token
+
+    chunks = _chunk_lines(lines, budget=2000)
+    edited = _chunk_lines(["new line"] + lines, budget=2000)
+
+    # 开头插入一句，只有开头附近的块变化
+    keys = {tuple(chunk) for chunk in chunks}
+    assert len(chunks) > 10
+    assert sum(tuple(chunk) not in keys for chunk in edited) <= 2
+
+
+@patch("ytx.core.llm.summary.call_llm")
+def test_short_transcript_uses_single_call(mock_call_llm, tmp_path, write_sentences):
+    path = tmp_path / "test.sentences.md"
+    write_sentences(path, 3)
+    mock_call_llm.return_value = "1. 开场 (00:00 - 00:03)"
+
+    assert run(path) == "1. 开场 (00:00 - 00:03)"
+    assert mock_call_llm.call_count == 1
+    assert "[00:01] Sentence number 1." in mock_call_llm.call_args.args[0]
+
+
+@patch("ytx.core.llm.summary.call_llm")
+def test_long_transcript_map_reduce(mock_call_llm, tmp_path, monkeypatch, write_sentences):
+    path = tmp_path / "test.sentences.md"
+    write_sentences(path, 200)
+    monkeypatch.setattr(summary, "SINGLE_CALL_TOKENS", 1000)
+    monkeypatch.setattr(summary, "CHUNK_TOKENS", 500)
+
+    threads = set()
+
+    def fake_call_llm(prompt, **kwargs):
+        threads.add(threading.get_ident())
+        if "分段要点" in prompt:
+            return "FINAL"
+        return prompt.split("（第 ")[1].split(" 段")[0]
+
+    mock_call_llm.side_effect = fake_call_llm
+
+    assert run(path) == "FINAL"
+    n_chunks = len(_chunk_lines(transcript_lines(path), 500))
+    assert n_chunks > 1
+    assert mock_call_llm.call_count == n_chunks + 1
+    reduce_prompt = mock_call_llm.call_args.args[0]
+    # 各块要点按原顺序汇总
+    positions = [reduce_prompt.index(f"第 {i} 段：\n{i}/{n_chunks}") for i in range(1, n_chunks + 1)]
+    assert positions == sorted(positions)
+    # map 阶段在线程池中执行
+    assert threads - {threading.get_ident()}
+
+
+@patch("ytx.core.llm.summary.call_llm")
+def test_forced_mode(mock_call_llm, tmp_path, write_sentences):
+    path = tmp_path / "test.sentences.md"
+    write_sentences(path, 3)
+    mock_call_llm.return_value = "notes"
+
+    run(path, mode="map_reduce")
+
+    assert mock_call_llm.call_count == 2
+
+
+def test_chunk_lines_splits_at_topic_breaks(monkeypatch):
+    monkeypatch.setattr(summary, "count_tokens", len)
+    lines = [f"line {i:03}" for i in range(100)]  # 每行 8 + 1 个 token
+
+    # 块达到预算的 TOPIC_MIN_SHARE 后才在话题转换点切分
+    chunks = _chunk_lines(lines, budget=900, breaks={1, 40, 70})
+
+    assert [len(chunk) for chunk in chunks] == [40, 30, 30]
+
+
+@pytest.mark.parametrize("mode", ["single", "map_reduce"])
+def test_runners_share_one_plan(mode, tmp_path, write_sentences):
+    path = tmp_path / "test.sentences.md"
+    write_sentences(path, 5)
+    prompts = {"sync": [], "async": [], "stream": []}
+
+    def fake(kind):
+        def call(prompt, **kwargs):
+            prompts[kind].append(prompt)
+            return "notes"
+        return call
+
+    async def fake_acall_llm(prompt, **kwargs):
+        return fake("async")(prompt)
+
+    with patch.object(summary, "call_llm", side_effect=fake("sync")):
+        result = run(path, mode=mode)
+    with patch.object(summary, "acall_llm", side_effect=fake_acall_llm):
+        assert asyncio.run(summary.arun(path, mode=mode)) == result
+    with patch.object(summary, "call_llm", side_effect=fake("stream")), \
+            patch.object(summary, "stream_llm", side_effect=lambda prompt, **kwargs: iter([fake("stream")(prompt)])):
+        assert "".join(summary.run_stream(path, mode=mode)) == result
+
+    assert prompts["sync"] == prompts["async"] == prompts["stream"]
+    assert len(prompts["sync"]) == (1 if mode == "single" else 2)
@@ -0,0 +1,78 @@
+"""
+测试 token 计数与按预算抽样字幕
+"""
+
+from ytx.core.llm import tokens
+from ytx.core.llm.overview import _load_sentences
+from ytx.core.llm.tokens import count_tokens, estimate_tokens, sample_sentences, split_text
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("你好世界") == 4
+    assert count_tokens("hello world") > 0
+
+
+def test_sample_within_budget_returns_everything():
+    sentences = ["One.", "Two.", "Three."]
+    assert sample_sentences(sentences, budget=1000) == [sentences]
+    assert sample_sentences([], budget=10) == []
+
+
+def test_sample_is_stratified_and_bounded(monkeypatch):
+    monkeypatch.setattr(tokens, "count_tokens", lambda text, model=None: 9)  # 每句 10 个 token
+    sentences = [f"s{i}" for i in range(1000)]
+
+    windows = sample_sentences(sentences, budget=500, windows=4)
+
+    flat = [s for window in windows for s in window]
+    assert len(flat) * 10 <= 500
+    assert flat == sorted(set(flat), key=lambda s: int(s[1:]))  # 按时间顺序且不重复
+    assert windows[0][0] == "s0"
+    assert windows[-1][-1] == "s999"
+    assert len(windows) == 6  # 开头 + 4 个中间窗口 + 结尾
+    # 中间窗口大致等距分布
+    starts = [int(window[0][1:]) for window in windows[1:-1]]
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    assert max(gaps) - min(gaps) <= 1
+
+
+def test_overview_load_sentences_samples_long_transcript(tmp_path, monkeypatch):
+    monkeypatch.setattr(tokens, "count_tokens", lambda text, model=None: 9)
+    path = tmp_path / "test.sentences.md"
+    path.write_text("".join(f"[{i}] 00:00:{i % 60:02} → Sentence {i}.\n" for i in range(200)), encoding="utf-8")
+
+    full = _load_sentences(path)
+    sampled = _load_sentences(path, budget=300)
+
+    assert "[...]" not in full and full.count("Sentence") == 200
+    assert sampled.startswith("[00:00] Sentence 0.") and sampled.endswith("Sentence 199.")
+    assert sampled.count("Sentence") <= 30
+    assert "\n[...]\n" in sampled
+
+
+def test_sample_splits_single_huge_sentence():
+    # 没有标点的自动字幕可能只有一"句"，也要在词边界处切开后抽样，而不是返回空
+    words = [f"w{i}" for i in range(5000)]
+    huge = "[00:00] " + " ".join(words)
+
+    windows = sample_sentences([huge], budget=600)
+
+    flat = [piece for window in windows for piece in window]
+    assert flat and flat[0].startswith("[00:00] w0 ")
+    assert flat[-1].endswith(" w4999")
+    assert sum(count_tokens(piece) + 1 for piece in flat) <= 600
+    # 切开的位置在词边界上
+    assert set(" ".join(flat).split()) - {"[00:00]"} <= set(words)
+
+    windows = sample_sentences(["[00:00] short.", huge, "[09:00] end."], budget=600)
+    flat = [piece for window in windows for piece in window]
+    assert flat[0] == "[00:00] short." and flat[-1] == "[09:00] end."
+    assert len(flat) > 2
+
+
+def test_split_text():
+    assert split_text("a b c d", budget=4) == ["a b", "c d"]
+    assert split_text("", budget=4) == []
+    assert split_text("你好世界你好", budget=4) == ["你好世", "界你好"]
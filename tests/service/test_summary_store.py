@@ -0,0 +1,119 @@
+"""
+测试按块持久化的摘要结果：重复运行直接读盘，字幕变化只重新生成变化的块
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from ytx.core.llm import summary
+from ytx.core.llm import summary_store
+from ytx.core.llm.summary_store import SummaryStore
+from ytx.core.service import summary_service
+
+
+def fake_call_llm(prompt, **kwargs):
+    if "分段要点" in prompt:
+        return "FINAL"
+    if "以上是一段视频字幕" in prompt:
+        return "要点"
+    return "SINGLE"
+
+
+@pytest.fixture
+def long_mode(monkeypatch):
+    monkeypatch.setattr(summary, "count_tokens", len)
+    monkeypatch.setattr(summary, "SINGLE_CALL_TOKENS", 1000)
+    monkeypatch.setattr(summary, "CHUNK_TOKENS", 2000)
+
+
+@patch("ytx.core.llm.summary.call_llm", side_effect=fake_call_llm)
+def test_rerun_is_served_from_disk(mock_call_llm, tmp_path, write_sentences):
+    path = tmp_path / "test.sentences.md"
+    write_sentences(path, ["Hello.", "Bye."])
+    store_path = tmp_path / summary_store.STORE_FILE
+
+    assert summary.run(path, store=SummaryStore(store_path)) == "SINGLE"
+    assert summary.run(path, store=SummaryStore(store_path)) == "SINGLE"
+    assert mock_call_llm.call_count == 1
+
+    # reuse=False（--force）时重新生成
+    assert summary.run(path, store=SummaryStore(store_path, reuse=False)) == "SINGLE"
+    assert mock_call_llm.call_count == 2
+
+
+@patch("ytx.core.llm.summary.call_llm", side_effect=fake_call_llm)
+def test_only_changed_chunks_are_resummarized(mock_call_llm, tmp_path, long_mode, write_sentences):
+    path = tmp_path / "test.sentences.md"
+    texts = [f"Sentence number {i}." for i in range(600)]
+    write_sentences(path, texts)
+    store_path = tmp_path / summary_store.STORE_FILE
+
+    assert summary.run(path, store=SummaryStore(store_path)) == "FINAL"
+    n_chunks = mock_call_llm.call_count - 1
+    assert n_chunks > 3
+
+    # 修改中间一句：只有所在的块和汇总需要重新调用
+    texts[300] = "Sentence NUMBER 300."
+    write_sentences(path, texts)
+    mock_call_llm.reset_mock()
+    assert summary.run(path, store=SummaryStore(store_path)) == "FINAL"
+    assert mock_call_llm.call_count == 2
+
+    # 不再使用的块从文件中清除
+    data = json.loads(store_path.read_text(encoding="utf-8"))
+    assert len(data["notes"]) == n_chunks
+    assert len(data["summaries"]) == 1
+
+    # 直接返回已保存的摘要时，各块要点仍然保留
+    assert summary.run(path, store=SummaryStore(store_path)) == "FINAL"
+    assert mock_call_llm.call_count == 2
+    assert json.loads(store_path.read_text(encoding="utf-8")) == data
+
+
+@patch("ytx.core.llm.summary.call_llm")
+def test_failed_chunk_keeps_other_notes(mock_call_llm, tmp_path, long_mode, write_sentences):
+    path = tmp_path / "test.sentences.md"
+    write_sentences(path, [f"Sentence number {i}." for i in range(600)])
+    store_path = tmp_path / summary_store.STORE_FILE
+
+    def failing(prompt, **kwargs):
+        if "Sentence number 300." in prompt and "以上是一段视频字幕" in prompt:
+            raise RuntimeError("boom")
+        return fake_call_llm(prompt)
+
+    mock_call_llm.side_effect = failing
+    assert summary.run(path, store=SummaryStore(store_path)).startswith("Error occurred")
+    n_chunks = mock_call_llm.call_count
+    assert n_chunks > 3
+
+    # 重新运行只为失败的块和汇总调用 LLM
+    mock_call_llm.reset_mock(side_effect=True)
+    mock_call_llm.side_effect = fake_call_llm
+    assert summary.run(path, store=SummaryStore(store_path)) == "FINAL"
+    assert mock_call_llm.call_count == 2
+    assert "Sentence number 300." in mock_call_llm.call_args_list[0].args[0]
+    assert len(json.loads(store_path.read_text(encoding="utf-8"))["notes"]) == n_chunks
+
+
+def test_store_ignores_other_versions(tmp_path, monkeypatch):
+    store_path = tmp_path / summary_store.STORE_FILE
+    store = SummaryStore(store_path)
+    store.put_note("k", "要点")
+    store.save()
+
+    assert SummaryStore(store_path).note("k") == "要点"
+    monkeypatch.setattr(summary_store, "SUMMARY_VERSION", summary_store.SUMMARY_VERSION + 1)
+    assert SummaryStore(store_path).note("k") is None
+
+
+def test_service_honors_force(tmp_path):
+    with patch.object(summary_service.srt_utils, "download_en_captions") as download, \
+            patch.object(summary_service.srt_utils, "generate_sentence_md_from_srt"), \
+            patch.object(summary_service.llm_summary, "run", return_value="1. 开场") as run:
+        summary_service.run(str(tmp_path), force=True)
+
+    assert download.call_args.args == (str(tmp_path), True)
+    assert run.call_args.kwargs["store"].path == tmp_path / summary_store.STORE_FILE
+    assert (tmp_path / "summary.txt").read_text(encoding="utf-8") == "1. 开场\n"
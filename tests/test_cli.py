@@ -0,0 +1,17 @@
+"""
+ytx.cli 启动测试：重依赖只在执行对应命令时才导入
+"""
+
+import os
+import subprocess
+import sys
+
+
+def test_cli_import_does_not_load_heavy_modules():
+    env = {k: v for k, v in os.environ.items() if k != "OPENAI_API_KEY"}
+    code = (
+        "import sys, ytx.cli, ytx.core.service.overview_service, ytx.core.service.summary_service; "
+        "print(','.join(m for m in ('yt_dlp', 'openai', 'jinja2', 'pysrt') if m in sys.modules))"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    assert proc.stdout.strip() == ""
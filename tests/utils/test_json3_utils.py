@@ -0,0 +1,176 @@
+"""
+json3_utils 模块的单元测试
+"""
+
+import json
+
+import pytest
+
+from ytx.core.utils.caption_utils import load_sentences, format_clock
+
+from ytx.core.utils.json3_utils import (
+    iter_json3_events,
+    iter_tokens,
+    segment_tokens,
+    generate_sentence_md_from_json3,
+)
+
+
+def _tokens(*words, step=100):
+    return [(w, i * step) for i, w in enumerate(words)]
+
+
+def test_iter_tokens_skips_tags_and_applies_offset():
+    events = [
+        {"tStartMs": 1000, "segs": [{"utf8": "Hello"}, {"utf8": " [Music]", "tOffsetMs": 200}, {"utf8": " world", "tOffsetMs": 400}]},
+        {"tStartMs": 2000},
+    ]
+    assert list(iter_tokens(events)) == [("Hello", 1000, 1400), ("world", 1400, 1400)]
+
+
+def test_iter_tokens_end_uses_event_duration():
+    events = [
+        # 手动字幕：一行一个 event，结束时间取 event 结束
+        {"tStartMs": 0, "dDurationMs": 2400, "segs": [{"utf8": "How are you today?"}]},
+        # 自动字幕：event 显示到下一行之后，结束时间不超过每词 WORD_MAX_MS
+        {"tStartMs": 5000, "dDurationMs": 8000, "segs": [{"utf8": "so"}, {"utf8": " we", "tOffsetMs": 300}]},
+    ]
+    assert list(iter_tokens(events)) == [
+        ("How are you today?", 0, 2400), ("so", 5000, 5300), ("we", 5300, 6300),
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_iter_json3_events_matches_json_load(tmp_path, chunk_size):
+    data = {
+        "wireMagic": "pb3",
+        "pens": [{}],
+        "events": [
+            {"tStartMs": 0, "dDurationMs": 1234567, "segs": [{"utf8": "caf\u00e9 \"quoted\" [x]"}]},
+            {"tStartMs": 10, "aAppend": 1},
+            {"tStartMs": 20, "segs": [{"utf8": "你好", "tOffsetMs": 99}]},
+        ],
+        "trailer": {"events": []},
+    }
+    captions = tmp_path / "abc.en.json3"
+    captions.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    assert list(iter_json3_events(captions, chunk_size=chunk_size)) == data["events"]
+
+
+def test_iter_json3_events_empty(tmp_path):
+    captions = tmp_path / "abc.en.json3"
+    captions.write_text('{"wireMagic": "pb3", "events": []}', encoding="utf-8")
+    assert list(iter_json3_events(captions, chunk_size=4)) == []
+
+
+def test_segment_tokens_single_pass():
+    sentences = list(segment_tokens(_tokens("Hi", "there.", "How", "are", "you?")))
+    assert [s[2] for s in sentences] == ["Hi there.", "How are you?"]
+    assert [(s[3], s[4]) for s in sentences] == [(0, 1), (2, 4)]
+    assert sentences[1][0] == 200 - 50
+    assert sentences[1][1] == 400 + 200
+
+
+def test_segment_tokens_repeated_sentences_keep_own_timestamps():
+    sentences = list(segment_tokens(_tokens("Yes.", "No.", "Yes.", step=1000)))
+    assert [s[2] for s in sentences] == ["Yes.", "No.", "Yes."]
+    assert [s[3] for s in sentences] == [0, 1, 2]
+    assert sentences[2][0] == 2000 - 50
+
+
+def test_segment_tokens_break_inside_token():
+    sentences = list(segment_tokens(_tokens("Okay. So", "we", "start.")))
+    # token 归属其起点所在的句子，"So we start." 从下一个 token 开始计时
+    assert [s[2] for s in sentences] == ["Okay.", "So we start."]
+    assert [(s[3], s[4]) for s in sentences] == [(0, 0), (1, 2)]
+
+
+def test_segment_tokens_splits_unpunctuated_on_pause():
+    tokens = [("so", 0), ("we", 300), ("start", 600), ("then", 2500), ("we", 2800), ("stop", 3100)]
+    sentences = list(segment_tokens(tokens, pause_ms=1500))
+    assert [s[2] for s in sentences] == ["so we start", "then we stop"]
+    assert [(s[3], s[4]) for s in sentences] == [(0, 2), (3, 5)]
+
+    assert len(list(segment_tokens(tokens, pause_ms=None))) == 1
+
+
+def test_segment_tokens_keeps_tail_across_pause():
+    # token 内部断句后的尾段并入下一句，不因停顿被丢弃
+    tokens = [("Hello there. How are", 0), ("you today? I am", 2500), ("fine thanks.", 5000)]
+    sentences = list(segment_tokens(tokens, pause_ms=1500))
+    assert [s[2] for s in sentences] == ["Hello there.", "How are you today?", "I am fine thanks."]
+    assert [(s[3], s[4]) for s in sentences] == [(0, 0), (1, 1), (2, 2)]
+
+
+def test_segment_tokens_keeps_complete_sentences_inside_token():
+    sentences = list(segment_tokens(_tokens("Hi. Yes. So", "we go. Bye.")))
+    assert [s[2] for s in sentences] == ["Hi.", "Yes.", "So we go.", "Bye."]
+    assert [(s[3], s[4]) for s in sentences] == [(0, 0), (0, 0), (1, 1), (1, 1)]
+
+
+def test_segment_tokens_line_level_events():
+    # 手动字幕：每行一个 event，行间相隔 2 秒以上，但上一行结束到下一行开始几乎没有静音
+    events = [
+        {"tStartMs": 0, "dDurationMs": 2200, "segs": [{"utf8": "When we started the project"}]},
+        {"tStartMs": 2200, "dDurationMs": 2500, "segs": [{"utf8": "nobody believed it would work."}]},
+        {"tStartMs": 4700, "dDurationMs": 2000, "segs": [{"utf8": "But it did,"}]},
+        {"tStartMs": 9000, "dDurationMs": 2000, "segs": [{"utf8": "after a long pause"}]},
+    ]
+    sentences = list(segment_tokens(iter_tokens(events), pause_ms=1500))
+    assert [s[2] for s in sentences] == [
+        "When we started the project nobody believed it would work.", "But it did,", "after a long pause",
+    ]
+
+
+def test_segment_tokens_caps_sentence_length():
+    tokens = _tokens(*["word"] * 10)
+    sentences = list(segment_tokens(tokens, max_tokens=4))
+    assert [(s[3], s[4]) for s in sentences] == [(0, 3), (4, 7), (8, 9)]
+
+
+def test_generate_sentence_md_from_json3(tmp_path):
+    captions = tmp_path / "abc.en.json3"
+    captions.write_text(json.dumps({"events": [
+        {"tStartMs": 0, "segs": [{"utf8": "Hello"}, {"utf8": " world.", "tOffsetMs": 500}]},
+        {"tStartMs": 3000, "segs": [{"utf8": "Bye."}]},
+    ]}), encoding="utf-8")
+
+    out_path = generate_sentence_md_from_json3(captions)
+
+    assert out_path.name == "abc.en.precise.sentences.md"
+    assert out_path.read_text(encoding="utf-8").splitlines() == [
+        "[1] 0:00:00.000000 → 0:00:00.700000 Hello world.",
+        "[2] 0:00:02.950000 → 0:00:03.200000 Bye.",
+    ]
+
+
+def test_generate_applies_pause_rule_only_without_punctuation(tmp_path):
+    captions = tmp_path / "abc.en.json3"
+    long_sentence = " ".join(["word"] * 50)
+    captions.write_text(json.dumps({"events": [
+        {"tStartMs": 0, "dDurationMs": 1000, "segs": [{"utf8": "When we started"}]},
+        {"tStartMs": 4000, "dDurationMs": 1000, "segs": [{"utf8": "it worked."}]},
+        {"tStartMs": 6000, "dDurationMs": 1000, "segs": [{"utf8": long_sentence + "."}]},
+    ]}), encoding="utf-8")
+    with load_sentences(generate_sentence_md_from_json3(captions)) as track:
+        # 带标点：3s 停顿和超过 MAX_TOKENS 的长句都不断开
+        assert list(track.texts()) == ["When we started it worked.", long_sentence + "."]
+
+    captions.write_text(json.dumps({"events": [
+        {"tStartMs": 0, "dDurationMs": 1000, "segs": [{"utf8": "when we started"}]},
+        {"tStartMs": 4000, "dDurationMs": 1000, "segs": [{"utf8": "it worked"}]},
+    ]}), encoding="utf-8")
+    with load_sentences(generate_sentence_md_from_json3(captions)) as track:
+        assert list(track.texts()) == ["when we started", "it worked"]
+
+
+def test_load_sentences_from_json3_md(tmp_path):
+    captions = tmp_path / "abc.en.json3"
+    captions.write_text(json.dumps({"events": [
+        {"tStartMs": 3_723_000, "segs": [{"utf8": "Hello"}, {"utf8": " world.", "tOffsetMs": 500}]},
+    ]}), encoding="utf-8")
+
+    with load_sentences(generate_sentence_md_from_json3(captions)) as track:
+        assert list(track) == [("Hello world.", 3_722_950, 3_723_700)]
+        assert format_clock(track.starts[0]) == "01:02:02.950000"
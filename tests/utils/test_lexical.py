@@ -0,0 +1,68 @@
+import pytest
+
+from ytx.core.utils import lexical
+
+
+@pytest.mark.parametrize("word, level", [
+    ("house", 0),
+    ("running", 0),
+    ("stopped", 0),
+    ("cities", 0),
+    ("don't", 0),
+    ("won't", 0),
+    ("i'm", 0),
+    ("ambition", 2),
+    ("ambiguous", 3),
+    ("necessitate", lexical.OFF_LIST),
+])
+def test_word_level(word, level):
+    assert lexical.word_level(word) == level
+
+
+def test_word_list_levels_are_unique():
+    levels = lexical.load_word_levels()
+    assert levels["hello"] == 0
+    assert set(levels.values()) == set(range(len(lexical.LEVELS)))
+
+
+def test_analyze_simple_conversation():
+    sentences = [
+        "Hello, welcome to my channel.",
+        "Today I'm gonna show you my new apartment.",
+        "It's small, but I love it.",
+        "Let's go to the kitchen.",
+    ]
+
+    result = lexical.analyze(sentences)
+
+    assert result["cefr"] == "A1"
+    assert result["syntax"] == "简单"
+    assert result["style"] == "口语化"
+    assert result["vocab"].startswith("基础词汇为主")
+
+
+def test_analyze_academic_text():
+    sentences = [
+        "Although the infrastructure necessitates rigorous consensus protocols, "
+        "researchers whose hypotheses concern latency have argued that replication mitigates failures "
+        "which would otherwise propagate across heterogeneous clusters.",
+    ] * 3
+
+    result = lexical.analyze(sentences)
+
+    assert result["cefr"] == "C2"
+    assert result["syntax"] == "复杂"
+    assert result["style"] == "正式"
+    assert "necessitates" in result["vocab"]
+
+
+def test_proper_nouns_are_ignored():
+    result = lexical.analyze(["I live in Zagreb with Aleksandra."])
+
+    assert result["cefr"] == "A1"
+    assert "低频词" not in result["vocab"]
+
+
+def test_analyze_empty():
+    assert lexical.analyze([]) == {}
+    assert lexical.analyze(["123", "你好。"]) == {}
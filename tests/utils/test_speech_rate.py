@@ -0,0 +1,55 @@
+import pytest
+
+from ytx.core.model.caption_track import CaptionTrack
+from ytx.core.utils import speech_rate
+
+
+def test_compute_basic():
+    # 两段各 10 个词，各 20 秒，视频 2 分钟
+    track = CaptionTrack.from_units([
+        (" ".join(["word"] * 10), 0, 20_000),
+        (" ".join(["word"] * 10), 70_000, 90_000),
+    ])
+
+    stats = speech_rate.compute(track, duration_ms=120_000)
+
+    assert stats["wpm"] == 30  # 20 词 / 40 秒
+    assert stats["voice_coverage"] == 33
+    assert stats["speech_rate"] == [10, 10]
+
+
+def test_overlapping_cues_are_merged():
+    units = [("a b c", 0, 30_000), ("d e f", 15_000, 45_000)]
+
+    stats = speech_rate.compute(units, duration_ms=60_000)
+
+    assert stats["voice_coverage"] == 75
+    assert stats["wpm"] == 8  # 6 词 / 45 秒
+
+
+def test_words_are_spread_across_minutes():
+    # 跨越第 1、2 分钟边界的一段，词数按时间比例摊分
+    stats = speech_rate.compute([(" ".join(["w"] * 40), 50_000, 70_000)], duration_ms=120_000)
+
+    assert stats["speech_rate"] == [20, 20]
+
+
+def test_partial_last_minute_and_default_duration():
+    # 没有时长时取最后一段的结束时间；最后一分钟只有 30 秒，按实际长度换算
+    stats = speech_rate.compute([("a b", 0, 30_000), ("c d e f", 60_000, 90_000)])
+
+    assert stats["voice_coverage"] == 67
+    assert stats["speech_rate"] == [2, 8]
+
+
+def test_unknown_end_uses_next_start():
+    # .sentences.md 解析出的句子没有结束时间
+    stats = speech_rate.compute([("a b", 0, -1), ("c d", 30_000, -1)], duration_ms=60_000)
+
+    assert stats["voice_coverage"] == 50
+    assert stats["speech_rate"] == [4]
+
+
+@pytest.mark.parametrize("units", [[], [("[Music]", -1, -1)]])
+def test_empty(units):
+    assert speech_rate.compute(units) == {"wpm": 0, "voice_coverage": 0, "speech_rate": []}
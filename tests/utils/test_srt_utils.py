@@ -0,0 +1,278 @@
+"""
+srt_utils 模块的单元测试
+"""
+
+import pysrt
+import pytest
+
+from ytx.core.utils.caption_utils import load_sentences, parse_sentences_md, sentence_bin_path
+from ytx.core.utils.track_file import TrackFile
+from ytx.core.utils.srt_utils import (
+    read_srt,
+    iter_srt,
+    align_cues,
+    format_srt_time,
+    load_track,
+    dedup_rolling_cues,
+    generate_sentence_md_from_srt,
+)
+
+SRT = """1
+00:00:01,000 --> 00:00:03,000
+Yes. [Music]
+
+2
+00:00:05,000 --> 00:00:07,000
+No. Yes.
+Maybe
+
+3
+00:01:10,500 --> 00:01:12,000
+later.
+"""
+
+
+def test_read_srt_matches_pysrt(tmp_path):
+    srt_path = tmp_path / "abc.en.srt"
+    srt_path.write_text(SRT, encoding="utf-8")
+
+    cues = read_srt(srt_path)
+    subs = pysrt.open(str(srt_path), encoding="utf-8")
+
+    assert len(cues) == len(subs) == 3
+    for (start, end, text), sub in zip(cues, subs):
+        assert start == sub.start.ordinal
+        assert end == sub.end.ordinal
+        assert text == sub.text
+    assert list(cues.offsets) == [0, 12, 26, 32]
+
+
+def test_read_srt_crlf_bom_and_empty_cue(tmp_path):
+    srt_path = tmp_path / "abc.en.srt"
+    srt_path.write_bytes(
+        "\ufeff1\r\n00:00:01,000 --> 00:00:02,000\r\n\r\n"
+        "2\r\n01:02:03,004 --> 01:02:04,000\r\nline one\r\nline two".encode("utf-8")
+    )
+
+    cues = read_srt(srt_path)
+
+    assert list(cues) == [(1000, 2000, ""), (3723004, 3724000, "line one\nline two")]
+
+
+def test_timestamps_ms_matches_scalar():
+    from ytx.core.utils.srt_utils import _timestamp_ms, _timestamps_ms
+
+    stamps = (b"00:00:00,000", b"01:02:03,004", b"99:59:59.999", b"123:45:06,789")
+    assert list(_timestamps_ms(stamps)) == [_timestamp_ms(ts) for ts in stamps]
+    assert list(_timestamps_ms(stamps))[1] == 3723004
+
+
+def test_read_srt_empty_file(tmp_path):
+    srt_path = tmp_path / "empty.srt"
+    srt_path.write_bytes(b"")
+    assert len(read_srt(srt_path)) == 0
+
+
+def test_iter_srt_matches_read_srt(tmp_path):
+    srt_path = tmp_path / "abc.en.srt"
+    srt_path.write_text(SRT, encoding="utf-8")
+    assert list(iter_srt(srt_path)) == list(read_srt(srt_path))
+
+    empty = tmp_path / "empty.srt"
+    empty.write_bytes(b"")
+    assert list(iter_srt(empty)) == []
+
+
+def test_align_cues_by_overlap():
+    orig = [(0, 2000, "a"), (2000, 4000, "b"), (4000, 6000, "c"), (9000, 10000, "d")]
+    zh = [
+        (0, 1000, "甲"),        # 只与 a 重叠
+        (1500, 3500, "乙"),     # 与 b 重叠更多
+        (3000, 4500, "丙"),     # 与 b 重叠更多
+        (6500, 7000, "丁"),     # 落在空隙，归入其后的 d
+        (11000, 12000, "戊"),   # 在最后一条之后，归入 d
+    ]
+
+    result = list(align_cues(orig, zh))
+
+    assert result == [
+        (0, 2000, "a", ["甲"]),
+        (2000, 4000, "b", ["乙", "丙"]),
+        (4000, 6000, "c", []),
+        (9000, 10000, "d", ["丁", "戊"]),
+    ]
+
+
+def test_align_cues_uneven_tracks():
+    assert list(align_cues([], [(0, 1000, "甲")])) == []
+    assert list(align_cues([(0, 1000, "a"), (1000, 2000, "b")], [])) == [
+        (0, 1000, "a", []),
+        (1000, 2000, "b", []),
+    ]
+    # 译文更早开始，归入第一条
+    assert list(align_cues([(5000, 6000, "a")], [(0, 1000, "甲")])) == [(5000, 6000, "a", ["甲"])]
+
+
+def test_format_srt_time():
+    assert format_srt_time(3723004) == "01:02:03,004"
+
+
+def test_load_track_cleans_tags_and_newlines(tmp_path):
+    srt_path = tmp_path / "abc.en.srt"
+    srt_path.write_text(SRT, encoding="utf-8")
+
+    track = load_track(srt_path)
+
+    assert track.text == "Yes. No. Yes. Maybe later."
+    assert list(track.starts) == [1000, 5000, 70500]
+
+
+def test_generate_sentence_md_from_srt(tmp_path):
+    srt_path = tmp_path / "abc.en.srt"
+    srt_path.write_text(SRT, encoding="utf-8")
+
+    out_path = generate_sentence_md_from_srt(srt_path)
+
+    assert out_path.name == "abc.en.sentences.md"
+    # 重复的 "Yes." 对应各自所在字幕段的时间
+    assert out_path.read_text(encoding="utf-8").splitlines() == [
+        "[1] 00:00:01 → Yes.",
+        "[2] 00:00:05 → No.",
+        "[3] 00:00:05 → Yes.",
+        "[4] 00:00:05 → Maybe later.",
+    ]
+
+
+def test_load_sentences_roundtrip(tmp_path):
+    srt_path = tmp_path / "abc.en.srt"
+    srt_path.write_text(SRT, encoding="utf-8")
+
+    md_path = generate_sentence_md_from_srt(srt_path)
+
+    # .sentences.bin 保留毫秒和结束时间
+    with load_sentences(md_path) as track:
+        assert isinstance(track, TrackFile)
+        assert list(track) == [
+            ("Yes.", 1000, 3000),
+            ("No.", 5000, 7000),
+            ("Yes.", 5000, 7000),
+            ("Maybe later.", 5000, 72000),
+        ]
+
+    # 没有 .bin 时退回解析 markdown
+    sentence_bin_path(md_path).unlink()
+    with load_sentences(md_path) as track:
+        units = list(track)
+    assert units == list(parse_sentences_md(md_path)) == [
+        ("Yes.", 1000, -1),
+        ("No.", 5000, -1),
+        ("Yes.", 5000, -1),
+        ("Maybe later.", 5000, -1),
+    ]
+
+
+def test_generate_skips_when_source_unchanged(tmp_path, monkeypatch):
+    from ytx.core.utils import srt_utils
+
+    srt_path = tmp_path / "abc.en.srt"
+    srt_path.write_text(SRT, encoding="utf-8")
+    md_path = generate_sentence_md_from_srt(srt_path)
+    bin_path = sentence_bin_path(md_path)
+    stamp = (md_path.stat().st_mtime_ns, bin_path.stat().st_mtime_ns)
+
+    # 源文件未变：不重新解析、不重写
+    monkeypatch.setattr(srt_utils, "load_track", lambda _: pytest.fail("should not re-parse"))
+    assert generate_sentence_md_from_srt(srt_path) == md_path
+    assert (md_path.stat().st_mtime_ns, bin_path.stat().st_mtime_ns) == stamp
+    monkeypatch.undo()
+
+    # 源文件变化 / 分句版本变化 / force：重新生成
+    srt_path.write_text(SRT.replace("Maybe", "Perhaps"), encoding="utf-8")
+    assert "Perhaps later." in generate_sentence_md_from_srt(srt_path).read_text(encoding="utf-8")
+
+    calls = []
+    original = srt_utils.load_track
+    monkeypatch.setattr(srt_utils, "load_track", lambda p: calls.append(p) or original(p))
+    monkeypatch.setattr(srt_utils, "SEGMENTER_VERSION", srt_utils.SEGMENTER_VERSION + 1)
+    generate_sentence_md_from_srt(srt_path)
+    generate_sentence_md_from_srt(srt_path)
+    generate_sentence_md_from_srt(srt_path, force=True)
+    assert len(calls) == 2
+
+
+def test_failed_regenerate_keeps_old_files(tmp_path, monkeypatch):
+    from ytx.core.utils import caption_utils, srt_utils
+
+    srt_path = tmp_path / "abc.en.srt"
+    srt_path.write_text(SRT, encoding="utf-8")
+    md_path = generate_sentence_md_from_srt(srt_path)
+    bin_path = sentence_bin_path(md_path)
+    before = (md_path.read_bytes(), bin_path.read_bytes())
+
+    # 写到第二句时出错：.md 与 .bin 都保持旧内容，不留临时文件
+    calls = []
+
+    def failing(ms):
+        calls.append(ms)
+        if len(calls) == 2:
+            raise RuntimeError("boom")
+        return format_srt_time(ms)
+
+    monkeypatch.setattr(srt_utils, "format_srt_time", failing)
+    with pytest.raises(RuntimeError):
+        generate_sentence_md_from_srt(srt_path, force=True)
+    assert (md_path.read_bytes(), bin_path.read_bytes()) == before
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([srt_path.name, md_path.name, bin_path.name])
+    assert caption_utils.is_up_to_date(md_path, caption_utils.file_digest(srt_path), srt_utils.SEGMENTER_VERSION)
+
+
+def test_dedup_rolling_cues():
+    cues = [
+        (0, 2000, "so today we are going"),
+        (2000, 4000, "so today we are going\nto talk about captions"),
+        (4000, 4010, "to talk about captions"),
+        (4010, 6000, "to talk about captions\nand why they repeat"),
+        (6000, 8000, "repeat after me"),
+    ]
+    stats = {}
+
+    result = list(dedup_rolling_cues(cues, stats))
+
+    assert [text for _, _, text in result] == [
+        "so today we are going",
+        "to talk about captions",
+        "",
+        "and why they repeat",
+        "repeat after me",  # 只重合 1 个词且不是整行，保留
+    ]
+    assert stats == {"words": 13, "chars": 22 + 22 + 23}
+
+
+def test_load_track_dedups_rolling_srt(tmp_path):
+    srt_path = tmp_path / "abc.en.srt"
+    srt_path.write_text(
+        "1\n00:00:00,000 --> 00:00:02,000\nhello there my friends\n\n"
+        "2\n00:00:02,000 --> 00:00:04,000\nhello there my friends\nwelcome back.\n",
+        encoding="utf-8",
+    )
+    assert load_track(srt_path).text == "hello there my friends welcome back."
+    assert load_track(srt_path, dedup=False).text == "hello there my friends hello there my friends welcome back."
+
+
+def test_generate_splits_unpunctuated_srt(tmp_path):
+    # 自动字幕没有标点：按字幕段间的停顿和每句最多 MAX_WORDS 个词断句
+    from ytx.core.utils.srt_utils import MAX_WORDS
+
+    cues = [(i * 2000, i * 2000 + 2000, " ".join(f"w{i}_{k}" for k in range(5))) for i in range(20)]
+    cues.append((60_000, 62_000, "after the pause"))
+    srt_path = tmp_path / "abc.en.srt"
+    srt_path.write_text("".join(
+        f"{i}\n{format_srt_time(start)} --> {format_srt_time(end)}\n{text}\n\n"
+        for i, (start, end, text) in enumerate(cues, 1)
+    ), encoding="utf-8")
+
+    with load_sentences(generate_sentence_md_from_srt(srt_path)) as track:
+        texts = list(track.texts())
+        assert [len(text.split()) for text in texts] == [MAX_WORDS, MAX_WORDS, 20, 3]
+        assert texts[-1] == "after the pause"
+        assert track.starts[-1] == 60_000
@@ -0,0 +1,44 @@
+import random
+
+from ytx.core.utils import topic_segment
+
+TOPICS = [
+    ["galaxy", "telescope", "orbit", "planet", "star", "comet", "nebula", "astronomer"],
+    ["recipe", "flour", "oven", "butter", "dough", "bread", "yeast", "baking"],
+    ["election", "senate", "voter", "ballot", "campaign", "policy", "candidate", "congress"],
+]
+
+
+def _units(topics, per_topic=60, step_ms=5_000):
+    rng = random.Random(1)
+    units = []
+    for words in topics:
+        for _ in range(per_topic):
+            sentence = [rng.choice(words) for _ in range(4)] + ["the", "people", "really", "think", "today"]
+            rng.shuffle(sentence)
+            units.append((len(units) * step_ms, " ".join(sentence)))
+    return units
+
+
+def test_detects_topic_shifts():
+    assert topic_segment.boundaries(_units(TOPICS)) == [(0, 0), (60, 300_000), (120, 600_000)]
+
+
+def test_single_topic_has_no_boundaries():
+    assert topic_segment.boundaries(_units(TOPICS[:1] * 3)) == [(0, 0)]
+
+
+def test_short_segments_are_not_split():
+    # 每个话题只有 30 秒，短于 MIN_SEGMENT_MS
+    assert topic_segment.boundaries(_units(TOPICS, per_topic=6)) == [(0, 0)]
+
+
+def test_unknown_start_uses_previous_time():
+    units = _units(TOPICS)
+    units[60] = (-1, units[60][1])
+
+    assert topic_segment.boundaries(units)[1] == (60, 295_000)
+
+
+def test_empty():
+    assert topic_segment.boundaries([]) == []
@@ -0,0 +1,68 @@
+"""
+track_file 模块的单元测试
+"""
+
+from bisect import bisect_right
+
+import pytest
+
+from ytx.core.utils.track_file import TrackWriter, TrackFile, read_stamp
+
+
+def test_roundtrip(tmp_path):
+    path = tmp_path / "x.sentences.bin"
+    with TrackWriter(path, ["start", "end", "first"]) as writer:
+        writer.append("Hello world.", 0, 900, 0)
+        writer.append("你好。", 1000, 1500, 2)
+        writer.append("", 2000, 2100, 3)
+
+    with TrackFile(path) as track:
+        assert len(track) == 3
+        assert list(track) == [("Hello world.", 0, 900), ("你好。", 1000, 1500), ("", 2000, 2100)]
+        assert track[-2] == ("你好。", 1000, 1500)
+        assert list(track.column("first")) == [0, 2, 3]
+        assert bisect_right(track.starts, 1200) - 1 == 1
+        assert list(track.texts()) == ["Hello world.", "你好。", ""]
+
+
+def test_empty(tmp_path):
+    path = tmp_path / "x.sentences.bin"
+    with TrackWriter(path, ["start", "end"]):
+        pass
+    with TrackFile(path) as track:
+        assert len(track) == 0
+        assert list(track) == []
+
+
+def test_failed_write_keeps_previous_file(tmp_path):
+    path = tmp_path / "x.sentences.bin"
+    with TrackWriter(path, ["start", "end"]) as writer:
+        writer.append("old", 0, 1)
+
+    with pytest.raises(RuntimeError):
+        with TrackWriter(path, ["start", "end"]) as writer:
+            writer.append("new", 0, 1)
+            raise RuntimeError("boom")
+
+    with TrackFile(path) as track:
+        assert list(track.texts()) == ["old"]
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_rejects_invalid_file(tmp_path):
+    path = tmp_path / "x.sentences.bin"
+    path.write_bytes(b"not a track file" * 4)
+    with pytest.raises(ValueError):
+        TrackFile(path)
+
+
+def test_read_stamp(tmp_path):
+    path = tmp_path / "x.sentences.bin"
+    assert read_stamp(path) is None
+
+    with TrackWriter(path, ["start", "end"], source_hash=b"\x01" * 32, source_version=3) as writer:
+        writer.append("a", 0, 1)
+
+    assert read_stamp(path) == (b"\x01" * 32, 3)
+    with TrackFile(path) as track:
+        assert (track.source_hash, track.source_version) == (b"\x01" * 32, 3)
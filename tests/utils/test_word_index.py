@@ -0,0 +1,55 @@
+"""
+word_index 模块的单元测试
+"""
+
+import json
+
+import pytest
+
+from ytx.core.utils.json3_utils import generate_sentence_md_from_json3, word_index_path
+from ytx.core.utils.word_index import WordIndex
+
+
+@pytest.fixture
+def captions(tmp_path):
+    path = tmp_path / "abc.en.json3"
+    path.write_text(json.dumps({"events": [
+        {"tStartMs": 1000, "dDurationMs": 1500,
+         "segs": [{"utf8": "Hello"}, {"utf8": " big", "tOffsetMs": 400}, {"utf8": " world.", "tOffsetMs": 800}]},
+        {"tStartMs": 5000, "dDurationMs": 3500, "segs": [{"utf8": "Bye"}, {"utf8": " now.", "tOffsetMs": 3000}]},
+    ]}), encoding="utf-8")
+    generate_sentence_md_from_json3(path)
+    return path
+
+
+def test_index_written_next_to_captions(captions):
+    assert word_index_path(captions).name == "abc.en.words.bin"
+    assert word_index_path(captions).exists()
+
+
+def test_word_queries(captions):
+    with WordIndex.open(captions) as index:
+        assert len(index) == 5
+        assert index.word_at(999) == -1
+        assert index.word_at(1000) == 0
+        assert index.word_at(1500) == 1
+        assert index.word_at(60_000) == 4
+        # 结束时间与分句相同：同一 event 中下一个单词的开始或 event 结束，每词最长 1s
+        assert index.word(2) == ("world.", 1800, 2500)
+        assert index.word(3) == ("Bye", 5000, 6000)
+        assert index.word(4) == ("now.", 8000, 8500)
+        assert index.span(0, 2) == (1000, 2500)
+        assert index.text(0, 2) == "Hello big world."
+        assert index.words_between(1400, 5001) == (1, 3)
+
+
+def test_sentence_queries(captions):
+    with WordIndex.open(captions) as index:
+        assert index.sentence_at(500) == -1
+        assert index.sentence_at(1900) == 0
+        # 字幕带标点，"Bye" 与 "now." 之间虽有 2s 静音也不断句
+        assert index.sentence_at(5100) == 1
+        assert index.sentence_at(9000) == 1
+        assert index.sentence_words(0) == (0, 2)
+        assert index.sentence_words(1) == (3, 4)
+        assert index.sentence_of(4) == 1